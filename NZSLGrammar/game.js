@@ -1,16 +1,27 @@
+// Rounds (a sentence plus a shuffled word bank with distractors) are fetched
+// a few at a time from /grammar_rounds
+const GAME_ROUNDS = 20;
+const PAGE_SIZE = 4;
+
 class NZSLGrammarGame {
     constructor() {
         this.currentQuestion = 0;
         this.score = 0;
-        this.totalQuestions = Math.min(20, gameData.length);
+        this.totalQuestions = GAME_ROUNDS;
         this.gameQuestions = [];
         this.currentAnswer = [];
         this.correctAnswer = [];
         this.hintUsed = false;
+        this.seed = Math.floor(Math.random() * 2147483647);
+        this.nextOffset = 0;
+        this.pendingPage = null;
         
         this.initializeElements();
         this.setupEventListeners();
-        this.startGame();
+        this.startGame().catch(error => {
+            console.error('Error loading sentences:', error);
+            this.englishText.textContent = 'Error loading sentences. Please refresh the page.';
+        });
     }
 
     initializeElements() {
@@ -38,19 +49,43 @@ class NZSLGrammarGame {
         this.nextBtn.addEventListener('click', () => this.nextQuestion());
     }
 
-    startGame() {
-        // Shuffle the game data and select questions
-        this.gameQuestions = this.shuffleArray([...gameData]).slice(0, this.totalQuestions);
+    async startGame() {
+        // Only the first few rounds are needed to start; the rest load while playing
+        const firstPage = await this.loadMoreQuestions();
+        this.totalQuestions = Math.min(GAME_ROUNDS, firstPage.total);
         this.totalQuestionsElement.textContent = this.totalQuestions;
         this.loadQuestion();
     }
 
-    shuffleArray(array) {
-        for (let i = array.length - 1; i > 0; i--) {
-            const j = Math.floor(Math.random() * (i + 1));
-            [array[i], array[j]] = [array[j], array[i]];
+    loadMoreQuestions() {
+        // One page request at a time; later callers share the pending one
+        if (!this.pendingPage) {
+            const params = new URLSearchParams({ seed: this.seed, offset: this.nextOffset, limit: PAGE_SIZE });
+            this.pendingPage = fetch(`/grammar_rounds?${params}`)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! status: ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(page => {
+                    this.gameQuestions.push(...page.rounds);
+                    this.nextOffset = page.next_offset;
+                    return page;
+                })
+                .finally(() => {
+                    this.pendingPage = null;
+                });
+        }
+        return this.pendingPage;
+    }
+
+    prefetchQuestions() {
+        const remaining = this.gameQuestions.length - this.currentQuestion - 1;
+        const needed = this.gameQuestions.length < this.totalQuestions;
+        if (remaining < 2 && needed && this.nextOffset !== null) {
+            this.loadMoreQuestions().catch(error => console.error('Error prefetching sentences:', error));
         }
-        return array;
     }
 
     parseNZSLGloss(nzslString) {
@@ -73,12 +108,13 @@ class NZSLGrammarGame {
 
         const question = this.gameQuestions[this.currentQuestion];
         this.englishText.textContent = question.english;
+        this.prefetchQuestions();
         
         // Parse the correct NZSL answer
         this.correctAnswer = this.parseNZSLGloss(question.nzsl);
         
-        // Create shuffled word tokens
-        const shuffledWords = this.shuffleArray([...this.correctAnswer]);
+        // Word bank tokens come shuffled, with distractors, from the server
+        const shuffledWords = [...question.tokens];
         this.createWordTokens(shuffledWords);
         
         // Reset game state
@@ -412,11 +448,25 @@ class NZSLGrammarGame {
         this.feedback.className = 'feedback';
     }
 
-    nextQuestion() {
+    async nextQuestion() {
         this.currentQuestion++;
         this.currentQuestionElement.textContent = this.currentQuestion + 1;
         this.submitBtn.style.display = 'inline-block';
         this.nextBtn.style.display = 'none';
+        
+        // Wait for the next page if the prefetch hasn't brought this round in yet
+        try {
+            while (this.currentQuestion < this.totalQuestions &&
+                   this.currentQuestion >= this.gameQuestions.length && this.nextOffset !== null) {
+                await this.loadMoreQuestions();
+            }
+        } catch (error) {
+            console.error('Error loading sentences:', error);
+        }
+        if (this.currentQuestion < this.totalQuestions && this.currentQuestion >= this.gameQuestions.length) {
+            // Out of sentences: finish with the rounds played so far
+            this.totalQuestions = this.currentQuestion;
+        }
         this.loadQuestion();
     }
 
@@ -1,46 +1,217 @@
 #!/usr/bin/env python3
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, abort, g, request, jsonify, send_from_directory, session
 from flask_cors import CORS
 import anthropic
 import json
+import logging
 import os
-import sqlite3
 import random
-import re
+import secrets
+import sqlite3
+import time
 from dotenv import load_dotenv
+from db import get_connection
+from dictionary_search import DEFAULT_SEARCH_RESULTS, MAX_SEARCH_RESULTS, search_signs
+from example_store import load_examples
+from fast_scorer import FastPathStats, fast_score
+from grammar_rounds import (
+    DEFAULT_DISTRACTORS, DEFAULT_ROUNDS_PAGE, DISTRACTOR_COUNTS, MAX_DISTRACTORS, MAX_ROUNDS_PAGE, GrammarRounds
+)
+from grammar_sentences import DIFFICULTY_LENGTHS, GAME_DATA_PATH, GrammarSentences
+from http_caching import cacheable_response, content_version, is_not_modified, make_etag, set_cache_headers
+from media_cache import MEDIA_PROXY_ENABLED, MediaCache, MediaUnavailable, is_media_key, proxy_url, proxy_urls
+from media_health import broken_urls_version, load_broken_urls
+from metering import BudgetExceeded, UsageMeter
+import metrics
+from review_scheduler import ReviewScheduler
+from score_cache import ScoreCache, score_cache_key
+from scoring import (
+    SCORING_TIMEOUT, IncrementalScoreParser, ScoringBusy, ScoringPool, build_prompt,
+    open_score_stream, parse_score_response, request_score
+)
+from session_deck import DEFAULT_DECK_BATCH, MAX_DECK_BATCH, SessionDeck
+from sign_postings import (
+    DEFAULT_SIGN_EXAMPLES, MAX_QUERY_SIGNS, MAX_SIGN_EXAMPLES, SignPostings, example_sequences, sentence_sequences
+)
+from sign_definitions import lookup_sign_definitions
+from static_assets import StaticAssets, is_public_source
 
 # Load environment variables
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+# The HTTP clients log every Claude request at INFO
+for noisy_logger in ('anthropic', 'httpx', 'httpcore'):
+    logging.getLogger(noisy_logger).setLevel(max(logger.getEffectiveLevel(), logging.WARNING))
+
+# Per-request INFO lines (such as Claude usage) are logged for this fraction
+# of requests; /metrics has the complete counts
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
+
+def log_sampled(message, *args):
+    """Log an INFO line for a sample of requests"""
+    if random.random() < LOG_SAMPLE_RATE:
+        logger.info(message, *args)
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Simple usage tracking
-usage_stats = {
-    'total_requests': 0,
-    'total_input_tokens': 0,
-    'total_output_tokens': 0,
-    'estimated_cost': 0.0
-}
+# Signs the session cookie that holds each learner's deck position
+app.secret_key = os.getenv('SECRET_KEY')
+if not app.secret_key:
+    # Shared by workers forked under --preload, but sessions reset on restart
+    logger.warning("SECRET_KEY not set; using a random key for this process")
+    app.secret_key = secrets.token_hex(32)
+
+# Claude usage, cost and latency, aggregated across workers in SQLite
+usage_meter = UsageMeter()
 
 # Initialize Claude client
 try:
     client = anthropic.Anthropic(
-        api_key=os.getenv('ANTHROPIC_API_KEY')
+        api_key=os.getenv('ANTHROPIC_API_KEY'),
+        timeout=SCORING_TIMEOUT,
+        max_retries=1
     )
 except Exception as e:
-    print(f"Error initializing Anthropic client: {e}")
+    logger.error("Error initializing Anthropic client: %s", e)
     client = None
 
+# Claude calls run here, with a per-worker in-flight limit and timeout
+scoring_pool = ScoringPool()
+
+metrics.SCORING_IN_FLIGHT.set_function(lambda: scoring_pool.in_flight)
+
+# Scores for repeated (example, normalized interpretation) pairs
+score_cache = ScoreCache()
+
+# How often the local fast-path scorer skips the Claude call
+fast_path_stats = FastPathStats()
+
+# Videos media_health.py found broken; their examples are left out of
+# everything served (the example index is rebuilt without them when
+# examples.bin predates the check)
+broken_media = load_broken_urls()
+if broken_media:
+    logger.info("Leaving out examples of %d broken media URLs", len(broken_media))
+media_health_version = '-' + broken_urls_version(broken_media) if broken_media else ''
+
+# Load the /random_video examples once at startup: the memory-mapped
+# examples.bin when it is current (shared by all workers through the page
+# cache), otherwise an index built from nzsl.db under gunicorn --preload.
+try:
+    example_index = load_examples()
+    logger.info("Loaded %d example videos", len(example_index))
+except Exception as e:
+    logger.error("Error building example index: %s", e)
+    example_index = None
+
+# Per-session shuffles of the examples, dealt in batches by /session_deck
+session_deck = SessionDeck(example_index) if example_index is not None else None
+
+# Spaced-repetition schedules: scored signs come back in the deck when due
+try:
+    review_scheduler = ReviewScheduler()
+except sqlite3.Error as e:
+    logger.error("Error opening learner database: %s", e)
+    review_scheduler = None
+
+# Optional local cache of the sign videos, served by /media; responses then
+# point their media URLs at it
+media_cache = MediaCache() if MEDIA_PROXY_ENABLED else None
+if media_cache is not None:
+    logger.info("Proxying media from %s through %s", media_cache.origin, media_cache.directory)
+
+# Proxied and direct media URLs are different representations
+media_version = '-media' if media_cache is not None else ''
+
+# Content version of nzsl.db, used to validate cached definition responses
+try:
+    nzsl_db_version = content_version('nzsl.db') + media_version
+except OSError as e:
+    logger.error("Error reading nzsl.db version: %s", e)
+    nzsl_db_version = 'unversioned'
+
+# Fingerprinted, precompressed assets from build_assets.py; without them
+# (or when a source has changed since they were built) files are served
+# straight from the source tree
+static_assets = StaticAssets.load()
+
+# Grammar game sentences, dealt as rounds by /grammar_rounds and listed by
+# /sign_examples
+try:
+    grammar_sentences = GrammarSentences.load(broken_urls=broken_media)
+    grammar_data_version = content_version(GAME_DATA_PATH) + media_version + media_health_version
+    logger.info("Loaded %d grammar sentences", len(grammar_sentences))
+except Exception as e:
+    logger.error("Error loading grammar sentences: %s", e)
+    grammar_sentences = None
+
+# Grammar game rounds with co-occurrence distractors, for /grammar_rounds
+grammar_rounds = GrammarRounds(grammar_sentences) if grammar_sentences is not None else None
+
+# Sign ID -> the served examples and grammar sentences using it, for
+# /sign_examples
+example_postings = SignPostings(example_sequences(example_index)) if example_index is not None else None
+sentence_postings = SignPostings(sentence_sequences(grammar_sentences)) if grammar_sentences is not None else None
+try:
+    sign_examples_version = make_etag(nzsl_db_version, content_version('matched_signs.json'),
+                                      grammar_sentences and grammar_data_version, media_health_version)
+except OSError as e:
+    logger.error("Error reading matched_signs.json version: %s", e)
+    sign_examples_version = 'unversioned'
+
+# Upper bound on sign IDs in one /get_sign_definitions request
+MAX_DEFINITION_IDS = 200
+
+# Snapshots left by workers of an earlier run would be merged into /metrics
+metrics.REGISTRY.remove_stale()
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    metrics.REGISTRY.ensure_writer()
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, route=route)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error):
+    if 'request_started' in g:
+        metrics.HTTP_IN_FLIGHT.dec()
+
+def media_body(body):
+    """A JSON body with its media URLs pointed at /media when the proxy is on"""
+    return proxy_urls(body) if media_cache is not None else body
+
+def media_url(url):
+    return proxy_url(url) if media_cache is not None else url
+
+def built_asset(path):
+    """Response for a built asset, or None to fall back to the source file"""
+    return static_assets.response(path) if static_assets is not None else None
+
 @app.route('/')
 def index():
     """Serve the main HTML page"""
-    return send_from_directory('.', 'index.html')
+    return built_asset('index.html') or send_from_directory('.', 'index.html')
 
 @app.route('/script.js')
 def script():
     """Serve the JavaScript file"""
+    built = built_asset('script.js')
+    if built:
+        return built
     response = send_from_directory('.', 'script.js')
     response.headers['Content-Type'] = 'application/javascript; charset=utf-8'
     return response
@@ -48,6 +219,12 @@ def script():
 @app.route('/<path:filename>')
 def static_files(filename):
     """Serve static files from root directory"""
+    built = built_asset(filename)
+    if built:
+        return built
+    # Only web assets: the app directory also holds code and the SQLite stores
+    if not is_public_source(filename):
+        abort(404)
     if filename.endswith('.js'):
         response = send_from_directory('.', filename)
         response.headers['Content-Type'] = 'application/javascript; charset=utf-8'
@@ -57,6 +234,9 @@ def static_files(filename):
 @app.route('/NZSLGrammar/<filename>')
 def nzsl_grammar_files(filename):
     """Serve NZSLGrammar files"""
+    built = built_asset(f'NZSLGrammar/{filename}')
+    if built:
+        return built
     if filename.endswith('.js'):
         response = send_from_directory('NZSLGrammar', filename)
         response.headers['Content-Type'] = 'application/javascript; charset=utf-8'
@@ -77,152 +257,181 @@ def nzsl_grammar_files(filename):
 @app.route('/assets/icons/<filename>')
 def serve_icons(filename):
     """Serve favicon and icon files"""
-    return send_from_directory('assets/icons', filename)
+    return built_asset(f'assets/icons/{filename}') or send_from_directory('assets/icons', filename)
 
 # Also serve favicon.ico from root for default browser requests
 @app.route('/favicon.ico')
 def favicon():
     """Serve favicon from root path"""
-    return send_from_directory('assets/icons', 'favicon.ico')
+    return built_asset('assets/icons/favicon.ico') or send_from_directory('assets/icons', 'favicon.ico')
+
+@app.route('/media/<path:key>')
+def get_media(key):
+    """Serve a sign video from the local media cache"""
+    try:
+        if media_cache is None or not is_media_key(key):
+            return jsonify({'error': 'Not found'}), 404
+        return media_cache.response(key)
+    except MediaUnavailable as e:
+        logger.warning("Media unavailable: %s", e)
+        return jsonify({'error': 'Video unavailable'}), e.status
+    except Exception as e:
+        logger.exception("Error serving media: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/usage_stats')
 def get_usage_stats():
     """Get current usage statistics"""
-    return jsonify(usage_stats)
+    return jsonify({
+        **usage_meter.stats(),
+        'score_cache': score_cache.stats(),
+        'fast_path': fast_path_stats.stats()
+    })
 
-def parse_sign_sequence(sentence):
-    """Extract sign IDs from sentence notation"""
-    if not sentence:
-        return []
-    pattern = r'([a-zA-Z\-\^:]+)\[(\d+)\]'
-    matches = re.findall(pattern, sentence)
-    return [{'word': word, 'id': int(sign_id)} for word, sign_id in matches]
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics for every worker"""
+    return app.response_class(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 @app.route('/random_video')
 def get_random_video():
     """Get a random video with enhanced sign sequence data"""
     try:
-        # Load matched signs data
-        with open('matched_signs.json', 'r') as f:
-            matched_signs = json.load(f)
-        
-        # Connect to database
-        conn = sqlite3.connect('nzsl.db')
-        cursor = conn.cursor()
-        
-        # Get a random sign from top 350
-        random_sign = random.choice(matched_signs[:350])
-        sign_id = random_sign['sign_id']
-        
-        # Get actual word definition
-        cursor.execute("""
-            SELECT w.gloss, w.minor, v.url 
-            FROM words w
-            LEFT JOIN videos v ON w.id = v.word_id AND v.video_type = 'main' AND v.url LIKE '%.mp4'
-            WHERE w.id = ?
-            LIMIT 1
-        """, (sign_id,))
-        
-        word_data = cursor.fetchone()
-        if word_data:
-            actual_gloss, minor_meanings, definition_video_url = word_data
-        else:
-            actual_gloss = random_sign['common_word']
-            minor_meanings = ""
-            definition_video_url = None
-        
-        # Get all example videos for this sign
-        cursor.execute("""
-            SELECT word_id, video_type, url, display_order
-            FROM videos 
-            WHERE word_id = ? AND video_type LIKE 'finalexample%'
-            ORDER BY video_type, display_order
-        """, (sign_id,))
-        
-        videos = cursor.fetchall()
-        
-        if not videos:
-            # Try another random sign if no videos found
-            conn.close()
-            return get_random_video()  # Recursive call
-        
-        # Pick a random video from available examples
-        word_id, video_type, video_url, display_order = random.choice(videos)
-        
-        # Get example sentence data
-        cursor.execute("""
-            SELECT sentence, translation 
-            FROM examples 
-            WHERE word_id = ? AND display_order = ?
-        """, (word_id, int(video_type.replace('finalexample', ''))))
-        
-        example_data = cursor.fetchone()
-        
-        if example_data:
-            sentence, translation = example_data
-            sign_sequence = parse_sign_sequence(sentence)
-        else:
-            sentence = ""
-            translation = f"Example for {random_sign['common_word']}"
-            sign_sequence = []
-        
-        # Enhance sign sequence with definition data
-        enhanced_sign_sequence = []
-        for sign in sign_sequence:
-            cursor.execute("""
-                SELECT w.gloss, w.minor, v.url 
-                FROM words w
-                INNER JOIN videos v ON w.id = v.word_id AND v.video_type = 'main' AND v.url LIKE '%.mp4'
-                WHERE w.id = ?
-                LIMIT 1
-            """, (str(sign['id']),))
-            
-            sign_data = cursor.fetchone()
-            if sign_data:
-                enhanced_sign = {
-                    'word': sign['word'],
-                    'id': sign['id'],
-                    'gloss': sign_data[0],
-                    'minor_meanings': sign_data[1] or '',
-                    'definition_video_url': sign_data[2]
-                }
-            else:
-                enhanced_sign = {
-                    'word': sign['word'],
-                    'id': sign['id'],
-                    'gloss': sign['word'],
-                    'minor_meanings': '',
-                    'definition_video_url': None
-                }
-            enhanced_sign_sequence.append(enhanced_sign)
-        
-        # Build response
-        video_data = {
-            'word_id': word_id,
-            'example_number': int(video_type.replace('finalexample', '')),
-            'video_type': video_type,
-            'common_word': random_sign['common_word'],
-            'actual_gloss': actual_gloss,
-            'minor_meanings': minor_meanings,
-            'definition_video_url': definition_video_url,
-            'rank': random_sign['rank'],
-            'confidence': random_sign['confidence'],
-            'video_url': video_url,
-            'english_translation': translation,
-            'sign_sequence': enhanced_sign_sequence,
-            'raw_sentence': sentence
-        }
-        
-        conn.close()
-        return jsonify(video_data)
-        
+        if example_index is None or not len(example_index):
+            return jsonify({'error': 'No example videos available'}), 500
+
+        # Entries are pre-serialized, so this is just a pick and a copy
+        return app.response_class(media_body(example_index.choose()), mimetype='application/json')
+
     except Exception as e:
-        import traceback
-        print(f"Error getting random video: {e}")
-        print("Full traceback:")
-        traceback.print_exc()
+        logger.exception("Error getting random video: %s", e)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+@app.route('/session_deck', methods=['POST'])
+def get_session_deck():
+    """Deal the next batch of examples from this session's shuffled deck"""
+    try:
+        if session_deck is None or not len(session_deck):
+            return jsonify({'error': 'No example videos available'}), 500
+
+        data = request.get_json(silent=True) or {}
+        try:
+            count = int(data.get('count', DEFAULT_DECK_BATCH))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'count must be an integer'}), 400
+        count = max(1, min(count, MAX_DECK_BATCH))
+
+        # Signs due for review come first, then new cards from the deck
+        learner_id = session.setdefault('learner_id', secrets.token_hex(16))
+        cards = []
+        reviewed_signs = set()
+        if review_scheduler is not None:
+            with metrics.SQLITE_QUERY_SECONDS.time(query='deal_due'):
+                due_signs = review_scheduler.deal_due(learner_id, count)
+                reviewed_signs = review_scheduler.reviewed_signs(learner_id)
+            for sign_id in due_signs:
+                if session_deck.sign_rank(sign_id) is not None:
+                    cards.append(session_deck.sign_example(sign_id))
+
+        # The deck is a seeded shuffle, so the session only keeps the seed and
+        # a cursor; a new deck starts if the examples have been rebuilt
+        seed = session.get('deck_seed')
+        cursor = session.get('deck_cursor', 0)
+        if seed is None or session.get('deck_size') != len(session_deck):
+            seed, cursor = session_deck.new_seed(), 0
+        if len(cards) < count:
+            new_cards, seed, cursor = session_deck.deal(seed, cursor, count - len(cards), reviewed_signs)
+            cards.extend(new_cards)
+        session['deck_seed'] = seed
+        session['deck_cursor'] = cursor
+        session['deck_size'] = len(session_deck)
+
+        # Entries are pre-serialized JSON, so the batch is spliced together
+        body = b'{"examples":[' + b','.join(card.rstrip(b'\n') for card in cards) + \
+            f'],"remaining":{len(session_deck) - cursor}}}\n'.encode('ascii')
+        return app.response_class(media_body(body), mimetype='application/json')
+
+    except Exception as e:
+        logger.exception("Error dealing session deck: %s", e)
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+
+def record_usage(usage, latency, mode):
+    """Meter one Claude call's token usage, cost and latency"""
+    input_tokens = usage.input_tokens
+    output_tokens = usage.output_tokens
+    request_cost = usage_meter.record(input_tokens, output_tokens, latency)
+    metrics.CLAUDE_REQUEST_SECONDS.observe(latency, mode=mode)
+    metrics.CLAUDE_TOKENS.inc(input_tokens, direction='input')
+    metrics.CLAUDE_TOKENS.inc(output_tokens, direction='output')
+    
+    log_sampled("[Usage] Input: %d, Output: %d, Cost: $%.6f, Latency: %.2fs",
+                input_tokens, output_tokens, request_cost, latency)
+
+def record_review(learner_id, sign_id, result):
+    """Schedule the scored sign's next review for this learner"""
+    if review_scheduler is None or session_deck is None or learner_id is None:
+        return
+    if not isinstance(sign_id, str):
+        return
+    rank = session_deck.sign_rank(sign_id)
+    if rank is None:
+        return
+    try:
+        with metrics.SQLITE_QUERY_SECONDS.time(query='record_review'):
+            review_scheduler.record(learner_id, sign_id, rank, result['score'])
+    except sqlite3.Error as e:
+        logger.error("Recording review failed: %s", e)
+
+def score_without_claude(original_translation, user_translation):
+    """Score from the local fast path or the cache; returns (result, cache_key)"""
+    # Clear (near-)exact matches are scored locally without Claude
+    local_result = fast_score(original_translation, user_translation)
+    fast_path_stats.record(local_result is not None)
+    metrics.CACHE_REQUESTS.inc(cache='fast_path', result='miss' if local_result is None else 'hit')
+    if local_result is not None:
+        return local_result, None
+    
+    # Repeated answers to the same example reuse the earlier score
+    cache_key = score_cache_key(original_translation, user_translation)
+    result = score_cache.get(cache_key)
+    metrics.CACHE_REQUESTS.inc(cache='score', result='miss' if result is None else 'hit')
+    return result, cache_key
+
+def unparsed_score_result(error, response_text):
+    """Fallback result when Claude's reply cannot be parsed or validated"""
+    metrics.SCORE_PARSE_FAILURES.inc()
+    if isinstance(error, json.JSONDecodeError):
+        # Detailed fallback if JSON parsing fails
+        logger.error("JSON parsing failed: %s; response: %r", error, response_text)
+        return {
+            'score': 5.0,
+            'feedback': f'Unable to parse scoring response. JSON error: {str(error)}. Please try again.'
+        }
+    logger.error("Validation error: %s; response: %r", error, response_text)
+    return {
+        'score': 5.0,
+        'feedback': f'Response validation failed: {str(error)}. Please try again.'
+    }
+
+def busy_response(error):
+    """429 telling the client when to retry scoring"""
+    metrics.SCORING_REJECTED.inc(reason='busy')
+    response = jsonify({'error': 'Scoring is busy, please try again shortly.'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def budget_response(error):
+    """429 while a scoring spend cap is reached"""
+    metrics.SCORING_REJECTED.inc(reason='budget')
+    log_sampled("[Usage] %s", error)
+    response = jsonify({'error': 'Scoring is paused because the usage budget has been reached. Please try again later.'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def sse_event(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @app.route('/score_translation', methods=['POST'])
 def score_translation():
@@ -235,126 +444,146 @@ def score_translation():
         original_translation = data.get('original_translation')
         user_translation = data.get('user_translation')
         sign_sequence = data.get('sign_sequence', [])
+        sign_id = data.get('word_id')
+        learner_id = session.get('learner_id')
         
         if not original_translation or not user_translation:
             return jsonify({'error': 'Missing interpretation data'}), 400
         
-        # Create sign sequence string for context
-        signs_text = " → ".join([sign['word'] for sign in sign_sequence])
-        
-        # Create prompt for Claude
-        prompt = f"""You are scoring NZSL (New Zealand Sign Language) interpretation accuracy. Be encouraging and supportive.
-
-Original signed sentence signs: {signs_text}
-Official English translation: "{original_translation}"
-User's interpretation: "{user_translation}"
-
-IMPORTANT: Read the user's interpretation VERY carefully before scoring. The user is interpreting what they saw signed in the video. When the signer uses "I" in the original, the user should also use "I" in their interpretation - this shows they correctly understood the signer was talking about their own experience. The user is translating/interpreting, not describing what they observed.
-
-Before scoring, carefully check if the user's interpretation contains the same key information as the official translation, even if worded differently.
-
-Please score this interpretation on a scale of 0-10 where:
-- 10 = Perfect or near-perfect meaning match (minor differences like "I" vs "i", "nine" vs "9" don't matter)
-- 9 = Excellent - captures all meaning with very minor wording differences
-- 8 = Very good - captures main meaning with small differences  
-- 6-7 = Good - captures core idea but misses some details
-- 4-5 = Partially correct but significant gaps
-- 2-3 = Some elements correct but major misunderstanding
-- 0-1 = Completely incorrect or unrelated
-
-BE ACCURATE with scoring. If the user's interpretation is about completely different topics or concepts than the original, score it very low (0-2). Only give high scores when the interpretations are actually about the same topic and events.
-
-Focus on semantic meaning rather than exact word-for-word matching. Minor differences in capitalization, numbers vs words (9 vs nine), or slight rephrasing should not reduce the score if the meaning is the same. Examples of equivalent meanings: "burglar/intruder/scary person", "phone/call/ring", "neighbour/neighbor", "arrived home/got home/came home".
-
-Use encouraging, friendly language. Address the learner directly as "you". Focus on what they got right first, then gently explain what could be improved. Use phrases like "Excellent work!", "Perfect interpretation!", "You nailed it!", "Good catch on...", "You understood...".
-
-CRITICAL: Before giving feedback about what the user "missed", double-check that they actually missed it. Do not claim they missed something that is clearly present in their interpretation.
-
-REALITY CHECK: Ask yourself - are the user's interpretation and the official translation actually about the same topic/situation? If not, do not try to find connections that don't exist. Be honest about significant misunderstandings.
-
-Respond with ONLY a JSON object in this format:
-{{"score": X, "feedback": "Encouraging explanation addressing the learner directly about what they captured well and what to focus on next time"}}"""
-
-        # Call Claude API
-        message = client.messages.create(
-            model="claude-3-5-haiku-20241022",
-            max_tokens=300,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        # Log token usage and update stats
-        input_tokens = message.usage.input_tokens
-        output_tokens = message.usage.output_tokens
+        result, cache_key = score_without_claude(original_translation, user_translation)
+        if result is not None:
+            record_review(learner_id, sign_id, result)
+            return jsonify(result)
         
-        # Claude 3.5 Haiku pricing (approximate)
-        input_cost = input_tokens * 0.000001  # $1.00 per 1M tokens
-        output_cost = output_tokens * 0.000005  # $5.00 per 1M tokens
-        request_cost = input_cost + output_cost
+        try:
+            usage_meter.check_budget()
+        except BudgetExceeded as e:
+            return budget_response(e)
         
-        # Update global stats
-        usage_stats['total_requests'] += 1
-        usage_stats['total_input_tokens'] += input_tokens
-        usage_stats['total_output_tokens'] += output_tokens
-        usage_stats['estimated_cost'] += request_cost
+        # Call Claude on the bounded scoring pool so slow calls cannot tie
+        # up every request thread
+        prompt = build_prompt(original_translation, user_translation, sign_sequence)
+        started = time.perf_counter()
+        try:
+            message = scoring_pool.run(request_score, client, prompt)
+        except ScoringBusy as e:
+            return busy_response(e)
+        except (TimeoutError, anthropic.APITimeoutError):
+            metrics.SCORING_REJECTED.inc(reason='timeout')
+            logger.error("Claude call exceeded %ss", scoring_pool.timeout)
+            return jsonify({'error': 'Scoring timed out, please try again.'}), 504
         
-        print(f"[Usage] Input: {input_tokens}, Output: {output_tokens}, Cost: ${request_cost:.6f}, Total Cost: ${usage_stats['estimated_cost']:.4f}")
+        record_usage(message.usage, time.perf_counter() - started, 'blocking')
         
         # Parse Claude's response
         response_text = message.content[0].text.strip()
+        logger.debug("Raw Claude response: %r", response_text)
         
-        # Log the raw response for debugging
-        print(f"[Debug] Raw Claude response: {repr(response_text)}")
-        
-        # Try to extract JSON from response
         try:
-            # Remove any markdown formatting
-            cleaned_text = response_text
-            if response_text.startswith('```json'):
-                cleaned_text = response_text.replace('```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                cleaned_text = response_text.replace('```', '').strip()
-            
-            print(f"[Debug] Cleaned text for JSON parsing: {repr(cleaned_text)}")
+            result = parse_score_response(response_text)
+            score_cache.put(cache_key, result)
+            record_review(learner_id, sign_id, result)
+            return jsonify(result)
+        except ValueError as e:
+            # Also covers json.JSONDecodeError
+            return jsonify(unparsed_score_result(e, response_text))
             
-            result = json.loads(cleaned_text)
+    except Exception as e:
+        logger.exception("Error in score_translation: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/score_translation_stream', methods=['POST'])
+def score_translation_stream():
+    """Score like /score_translation, streaming the result as server-sent events.
+
+    Sends a 'score' event as soon as Claude's score is parsed, 'feedback'
+    events with each new piece of feedback text, then 'done' with the
+    complete result (or 'error').
+    """
+    try:
+        if client is None:
+            return jsonify({'error': 'Claude client not initialized. Check API key.'}), 500
             
-            # Validate response format
-            if 'score' not in result or 'feedback' not in result:
-                print(f"[Error] Missing required fields in response: {result}")
-                raise ValueError("Invalid response format - missing score or feedback")
+        data = request.get_json()
+        original_translation = data.get('original_translation')
+        user_translation = data.get('user_translation')
+        sign_sequence = data.get('sign_sequence', [])
+        sign_id = data.get('word_id')
+        # The session isn't available once the response starts streaming
+        learner_id = session.get('learner_id')
+        
+        if not original_translation or not user_translation:
+            return jsonify({'error': 'Missing interpretation data'}), 400
+        
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        
+        result, cache_key = score_without_claude(original_translation, user_translation)
+        if result is not None:
+            record_review(learner_id, sign_id, result)
+            events = [
+                sse_event('score', {'score': result['score']}),
+                sse_event('feedback', {'text': result['feedback']}),
+                sse_event('done', result)
+            ]
+            return app.response_class(events, mimetype='text/event-stream', headers=headers)
+        
+        try:
+            usage_meter.check_budget()
+        except BudgetExceeded as e:
+            return budget_response(e)
+        
+        # Claim a scoring slot up front so a full pool still answers 429
+        prompt = build_prompt(original_translation, user_translation, sign_sequence)
+        try:
+            slot = scoring_pool.acquire()
+        except ScoringBusy as e:
+            return busy_response(e)
+        
+        def generate():
+            try:
+                started = time.perf_counter()
+                parser = IncrementalScoreParser()
+                with open_score_stream(client, prompt) as stream:
+                    for text in stream.text_stream:
+                        for event, value in parser.feed(text):
+                            if event == 'score':
+                                yield sse_event('score', {'score': value})
+                            else:
+                                yield sse_event('feedback', {'text': value})
+                    message = stream.get_final_message()
                 
-            # Ensure score is within range
-            score = float(result['score'])
-            if score < 0 or score > 10:
-                print(f"[Warning] Score {score} out of range, clamping to 0-10")
-                score = max(0, min(10, score))  # Clamp to 0-10 range
+                record_usage(message.usage, time.perf_counter() - started, 'stream')
+                logger.debug("Raw Claude response: %r", parser.raw_text)
                 
-            result['score'] = score
-            
-            return jsonify(result)
-            
-        except json.JSONDecodeError as e:
-            # Detailed fallback if JSON parsing fails
-            print(f"[Error] JSON parsing failed: {e}")
-            print(f"[Error] Failed to parse: {repr(response_text)}")
-            return jsonify({
-                'score': 5.0,
-                'feedback': f'Unable to parse scoring response. JSON error: {str(e)}. Please try again.'
-            })
-        except ValueError as e:
-            print(f"[Error] Validation error: {e}")
-            print(f"[Error] Response content: {repr(response_text)}")
-            return jsonify({
-                'score': 5.0,
-                'feedback': f'Response validation failed: {str(e)}. Please try again.'
-            })
-            
+                try:
+                    result = parser.result()
+                    score_cache.put(cache_key, result)
+                    record_review(learner_id, sign_id, result)
+                except ValueError as e:
+                    result = unparsed_score_result(e, parser.raw_text)
+                yield sse_event('done', result)
+                
+            except Exception as e:
+                logger.exception("Error in score_translation_stream: %s", e)
+                yield sse_event('error', {'error': 'Internal server error'})
+            finally:
+                scoring_pool.release(slot)
+        
+        return app.response_class(generate(), mimetype='text/event-stream', headers=headers)
+        
     except Exception as e:
-        print(f"Error in score_translation: {e}")
+        logger.exception("Error in score_translation_stream: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+def definition_payload(definition):
+    """JSON shape of one sign definition"""
+    gloss, minor_meanings, definition_video_url = definition
+    return {
+        'gloss': gloss,
+        'minor_meanings': minor_meanings or '',
+        'definition_video_url': media_url(definition_video_url)
+    }
+
 @app.route('/get_sign_definition', methods=['POST'])
 def get_sign_definition():
     """Get sign definition data for the grammar game glosses"""
@@ -365,34 +594,162 @@ def get_sign_definition():
         if not sign_id:
             return jsonify({'error': 'Missing sign_id'}), 400
         
-        # Connect to database
-        conn = sqlite3.connect('nzsl.db')
-        cursor = conn.cursor()
-        
-        # Get sign definition
-        cursor.execute("""
-            SELECT w.gloss, w.minor, v.url 
-            FROM words w
-            LEFT JOIN videos v ON w.id = v.word_id AND v.video_type = 'main' AND v.url LIKE '%.mp4'
-            WHERE w.id = ?
-            LIMIT 1
-        """, (sign_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        # Get sign definition (served from the shared cache when warm)
+        cursor = get_connection().cursor()
+        with metrics.SQLITE_QUERY_SECONDS.time(query='sign_definitions'):
+            result = lookup_sign_definitions(cursor, [sign_id])[str(sign_id)]
         
         if result:
-            gloss, minor_meanings, definition_video_url = result
-            return jsonify({
-                'gloss': gloss,
-                'minor_meanings': minor_meanings or '',
-                'definition_video_url': definition_video_url
-            })
+            return jsonify(definition_payload(result))
         else:
             return jsonify({'error': 'Sign not found'}), 404
             
     except Exception as e:
-        print(f"Error in get_sign_definition: {e}")
+        logger.exception("Error in get_sign_definition: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/get_sign_definitions')
+def get_sign_definitions():
+    """Get definitions for many signs in one cacheable GET request"""
+    try:
+        sign_ids = [part.strip() for part in request.args.get('ids', '').split(',') if part.strip()]
+        
+        if not sign_ids:
+            return jsonify({'error': 'Missing ids'}), 400
+        if not all(part.isascii() and part.isdigit() for part in sign_ids):
+            return jsonify({'error': 'Sign ids must be numeric'}), 400
+        
+        # Canonical order so the same set of signs always shares one ETag
+        sign_ids = sorted(set(sign_ids), key=int)
+        if len(sign_ids) > MAX_DEFINITION_IDS:
+            return jsonify({'error': f'At most {MAX_DEFINITION_IDS} ids per request'}), 400
+        
+        etag = make_etag(nzsl_db_version, *sign_ids)
+        if is_not_modified(etag):
+            return set_cache_headers(app.response_class(status=304), etag)
+        
+        cursor = get_connection().cursor()
+        with metrics.SQLITE_QUERY_SECONDS.time(query='sign_definitions'):
+            definitions = lookup_sign_definitions(cursor, sign_ids)
+        
+        result = {'definitions': {}, 'missing': []}
+        for sign_id in sign_ids:
+            if definitions[sign_id]:
+                result['definitions'][sign_id] = definition_payload(definitions[sign_id])
+            else:
+                result['missing'].append(sign_id)
+        
+        return set_cache_headers(jsonify(result), etag)
+        
+    except Exception as e:
+        logger.exception("Error in get_sign_definitions: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/search_signs')
+def get_search_signs():
+    """Search the dictionary by English word for typeahead"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', DEFAULT_SEARCH_RESULTS, type=int)
+        
+        if not query:
+            return jsonify({'error': 'Missing q'}), 400
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}'}), 400
+        
+        etag = make_etag(nzsl_db_version, query.lower(), limit)
+        if is_not_modified(etag):
+            return set_cache_headers(app.response_class(status=304), etag)
+        
+        cursor = get_connection().cursor()
+        with metrics.SQLITE_QUERY_SECONDS.time(query='dictionary_search'):
+            rows = search_signs(cursor, query, limit)
+        
+        results = [
+            {'id': word_id, 'gloss': gloss, 'minor_meanings': minor or '', 'rank': rank}
+            for word_id, gloss, minor, rank in rows
+        ]
+        return set_cache_headers(jsonify({'query': query, 'results': results}), etag)
+        
+    except Exception as e:
+        logger.exception("Error in search_signs: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/sign_examples')
+def get_sign_examples():
+    """Examples and grammar sentences that use every one of the given signs"""
+    try:
+        sign_ids = [part.strip() for part in request.args.get('signs', '').split(',') if part.strip()]
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', DEFAULT_SIGN_EXAMPLES, type=int)
+        
+        if not sign_ids:
+            return jsonify({'error': 'Missing signs'}), 400
+        if not all(part.isascii() and part.isdigit() for part in sign_ids):
+            return jsonify({'error': 'Sign ids must be numeric'}), 400
+        if len(set(sign_ids)) > MAX_QUERY_SIGNS:
+            return jsonify({'error': f'At most {MAX_QUERY_SIGNS} signs per request'}), 400
+        if offset < 0 or not 1 <= limit <= MAX_SIGN_EXAMPLES:
+            return jsonify({'error': f'offset must be >= 0 and limit between 1 and {MAX_SIGN_EXAMPLES}'}), 400
+        
+        sign_ids = sorted({int(part) for part in sign_ids})
+        etag = make_etag(sign_examples_version, *sign_ids, offset, limit)
+        
+        # Both result lists are paged with the same offset and limit
+        examples = example_postings.containing(sign_ids) if example_postings is not None else []
+        sentences = sentence_postings.containing(sign_ids) if sentence_postings is not None else []
+        
+        # Example entries are pre-serialized JSON, so the page is spliced together
+        example_page = b','.join(example_index.entry(position).rstrip(b'\n')
+                                 for position in examples[offset:offset + limit])
+        sentence_page = json.dumps([grammar_sentences.sentence(position)
+                                    for position in sentences[offset:offset + limit]],
+                                   separators=(',', ':')).encode('utf-8')
+        body = b'{"signs":' + json.dumps(sign_ids).encode('ascii') + \
+            b',"examples":[' + example_page + b'],"total_examples":' + str(len(examples)).encode('ascii') + \
+            b',"sentences":' + sentence_page + b',"total_sentences":' + str(len(sentences)).encode('ascii') + b'}\n'
+        return cacheable_response(media_body(body), etag)
+        
+    except Exception as e:
+        logger.exception("Error in get_sign_examples: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/grammar_rounds')
+def get_grammar_rounds():
+    """Get one page of a seeded grammar game's ready-made rounds"""
+    try:
+        if grammar_rounds is None:
+            return jsonify({'error': 'No grammar sentences available'}), 404
+        
+        seed = request.args.get('seed', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', DEFAULT_ROUNDS_PAGE, type=int)
+        difficulty = request.args.get('difficulty')
+        if seed is None:
+            return jsonify({'error': 'Missing seed'}), 400
+        if offset < 0 or not 1 <= limit <= MAX_ROUNDS_PAGE:
+            return jsonify({'error': f'offset must be >= 0 and limit between 1 and {MAX_ROUNDS_PAGE}'}), 400
+        if difficulty is not None and difficulty not in DIFFICULTY_LENGTHS:
+            return jsonify({'error': f"difficulty must be one of {', '.join(DIFFICULTY_LENGTHS)}"}), 400
+        distractors = request.args.get('distractors', DISTRACTOR_COUNTS.get(difficulty, DEFAULT_DISTRACTORS), type=int)
+        if not 0 <= distractors <= MAX_DISTRACTORS:
+            return jsonify({'error': f'distractors must be between 0 and {MAX_DISTRACTORS}'}), 400
+        
+        min_length, max_length = DIFFICULTY_LENGTHS.get(difficulty, (1, None))
+        
+        etag = make_etag(grammar_data_version, 'rounds', seed, offset, limit, min_length, max_length, distractors)
+        rounds, total = grammar_rounds.page(seed, offset, limit, min_length, max_length, distractors)
+        next_offset = offset + len(rounds)
+        body = json.dumps({
+            'rounds': rounds,
+            'offset': offset,
+            'next_offset': next_offset if next_offset < total else None,
+            'total': total
+        }, separators=(',', ':')).encode('utf-8')
+        return cacheable_response(media_body(body), etag)
+        
+    except Exception as e:
+        logger.exception("Error in get_grammar_rounds: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark startup time and memory of the /random_video example formats.
+
+Builds video_examples.json (pretty-printed, as extract_video_data_expanded.py
+writes it) and examples.bin from the same examples. Then, in a fresh process
+per format, it measures load time, resident memory and choose() latency. It
+also starts several workers forked from one loaded parent (as gunicorn
+--preload does) and reports their total private memory. Needs a prepared
+nzsl.db in the repo root:
+
+    python benchmarks/bench_example_store.py --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from example_store import build_groups, store_sources, write_example_store
+
+# Runs in a fresh interpreter: load one format, touch every entry, report
+CHILD = r'''
+import gc, json, os, random, sys, time
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+from example_index import ExampleIndex
+from example_store import ExampleStore
+
+def memory():
+    """Resident and private (not shared) memory of this process, in KiB"""
+    fields = {{}}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+baseline_rss, baseline_private = memory()
+start = time.perf_counter()
+if {fmt!r} == 'json':
+    with open({json_path!r}) as f:
+        video_data = json.load(f)
+    groups = {{}}
+    for entry in video_data:
+        groups.setdefault(entry['rank'], []).append(
+            (json.dumps(entry, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8'))
+    examples = ExampleIndex(list(groups.values()))
+else:
+    examples = ExampleStore({store_path!r})
+    # Touch every page so the comparison is with the store fully in memory
+    for position in range(len(examples)):
+        examples.entry(position)
+load_seconds = time.perf_counter() - start
+gc.collect()
+
+rng = random.Random(1)
+start = time.perf_counter()
+for _ in range(5000):
+    examples.choose(rng)
+choose_us = (time.perf_counter() - start) / 5000 * 1e6
+
+rss, private = memory()
+
+def worker_private():
+    """Fork workers from this loaded process and sum their private memory"""
+    pids = []
+    reads = []
+    for _ in range({workers}):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(2000):
+                examples.choose(rng)
+            os.write(write_fd, str(memory()[1]).encode())
+            os._exit(0)
+        os.close(write_fd)
+        pids.append(pid)
+        reads.append(read_fd)
+    total = 0
+    for pid, read_fd in zip(pids, reads):
+        total += int(os.read(read_fd, 64) or 0)
+        os.waitpid(pid, 0)
+    return total
+
+print(json.dumps({{
+    'load_ms': load_seconds * 1000,
+    'rss_kib': rss - baseline_rss,
+    'private_kib': private - baseline_private,
+    'choose_us': choose_us,
+    'workers_private_kib': worker_private(),
+}}))
+'''
+
+
+def measure(fmt, json_path, store_path, workers):
+    code = CHILD.format(root=ROOT, fmt=fmt, json_path=json_path, store_path=store_path, workers=workers)
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='Forked workers for the shared-memory check')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    groups = build_groups()
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'video_examples.json')
+        store_path = os.path.join(tmp, 'examples.bin')
+        with open(json_path, 'w') as f:
+            json.dump([entry for group in groups for entry in group], f, indent=2)
+        write_example_store(store_path, groups, store_sources())
+
+        print(f"{sum(map(len, groups))} examples; video_examples.json {os.path.getsize(json_path) / 1024:.0f} KiB, "
+              f"examples.bin {os.path.getsize(store_path) / 1024:.0f} KiB")
+        print(f"{'format':8} {'load':>9} {'rss':>10} {'private':>10} {'choose':>9}  "
+              f"{args.workers} forked workers, private total")
+        for fmt in ('json', 'store'):
+            result = measure(fmt, json_path, store_path, args.workers)
+            print(f"{fmt:8} {result['load_ms']:7.1f}ms {result['rss_kib']:7.0f}KiB {result['private_kib']:7.0f}KiB "
+                  f"{result['choose_us']:7.1f}us  {result['workers_private_kib']:7.0f}KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark match_signs.py matching against the old full SequenceMatcher scan.
+
+Builds a synthetic dictionary and vocabulary list, matches a sample with the old
+scan-every-gloss loop and the whole list with GlossMatcher, and checks that
+both give identical results on the sample. Needs no nzsl.db:
+
+    python benchmarks/bench_match_signs.py --words 20000 --glosses 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from match_signs import GlossMatcher, match_words, normalize_word, similarity
+
+SYLLABLES = ['ka', 'ro', 'te', 'ing', 'ed', 'st', 'ar', 'ou', 'ch', 'pl', 'un', 'le',
+             'mi', 'sh', 'o', 'a', 'e', 're', 'th', 'al']
+
+
+def legacy_find_best_match(target_word, db_words):
+    """The old matcher: score every gloss and minor meaning of every row"""
+    normalized_target = normalize_word(target_word)
+    best_match = None
+    best_score = 0
+    for word_id, gloss, minor in db_words:
+        for gloss_word in [w.strip() for w in gloss.split(',')]:
+            score = similarity(normalized_target, normalize_word(gloss_word))
+            if score > best_score:
+                best_score = score
+                best_match = (word_id, gloss_word, score, 'gloss')
+        if minor:
+            for minor_word in [w.strip() for w in minor.split(',')]:
+                score = similarity(normalized_target, normalize_word(minor_word))
+                if score > best_score:
+                    best_score = score
+                    best_match = (word_id, minor_word, score, 'minor')
+    return best_match
+
+
+def make_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+
+def make_dictionary(size, rng):
+    """Rows shaped like the words table, with NZSL-style notation mixed in"""
+    rows = []
+    for word_id in range(1, size + 1):
+        glosses = [make_word(rng) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.1:
+            glosses[0] = rng.choice(['ix-', 'pcl-', 'nms-']) + glosses[0]
+        minor = ', '.join(make_word(rng) for _ in range(rng.randint(0, 3))) or None
+        rows.append((word_id, ', '.join(glosses), minor))
+    return rows
+
+
+def make_vocabulary(size, db_words, rng):
+    """Exact glosses, misspellings and unknown words"""
+    words = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < 0.4:
+            words.append(rng.choice(db_words)[1].split(',')[0].strip())
+        elif roll < 0.8:
+            word = list(rng.choice(db_words)[1].split(',')[0].strip())
+            word[rng.randrange(len(word))] = rng.choice('aeioust')
+            words.append(''.join(word))
+        else:
+            words.append(make_word(rng))
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=20000, help='Vocabulary size')
+    parser.add_argument('--glosses', type=int, default=5000, help='Dictionary rows')
+    parser.add_argument('--legacy-sample', type=int, default=200,
+                        help='Words matched with the old scan for timing and comparison')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    db_words = make_dictionary(args.glosses, rng)
+    words = make_vocabulary(args.words, db_words, rng)
+    sample = words[:args.legacy_sample]
+
+    start = time.perf_counter()
+    legacy = [legacy_find_best_match(word, db_words) for word in sample]
+    legacy_per_word = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    GlossMatcher(db_words)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = match_words(words, db_words, args.workers)
+    indexed = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(legacy, matched))
+    print(f"{args.glosses} dictionary rows, {args.words} words")
+    print(f"legacy scan   {legacy_per_word * 1000:8.2f}ms/word  "
+          f"(~{legacy_per_word * args.words:.0f}s for the whole list)")
+    print(f"GlossMatcher  {indexed / args.words * 1000:8.2f}ms/word  "
+          f"{indexed:.1f}s total, index build {build:.2f}s")
+    print(f"identical on {len(sample)} sampled words: {'yes' if not mismatches else f'NO ({mismatches} differ)'}")
+
+
+if __name__ == "__main__":
+    main()
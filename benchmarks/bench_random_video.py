@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark /random_video example selection as the share of empty signs grows.
+
+Compares the old "pick a sign, recurse if it has no videos" selection with
+ExampleIndex.choose. Runs on synthetic data, so no nzsl.db is needed:
+
+    python benchmarks/bench_random_video.py
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from example_index import ExampleIndex, TOP_SIGNS
+
+EMPTY_SHARES = [0.0, 0.25, 0.5, 0.75, 0.9, 0.97]
+SAMPLES = 2000
+
+
+def make_groups(empty_share, rng):
+    """Synthetic top-N signs where a share of them have no example videos"""
+    groups = []
+    for i in range(TOP_SIGNS):
+        if rng.random() < empty_share and i > 0:
+            groups.append([])
+        else:
+            groups.append([f'{{"sign":{i},"example":{n}}}\n'.encode() for n in range(rng.randint(1, 4))])
+    return groups
+
+
+def legacy_choose(matched_signs_json, groups, rng):
+    """The old selection: reparse matched signs, pick one, recurse when empty"""
+    matched_signs = json.loads(matched_signs_json)
+    position = rng.randrange(len(matched_signs[:TOP_SIGNS]))
+    videos = groups[position]
+    if not videos:
+        return legacy_choose(matched_signs_json, groups, rng)
+    return rng.choice(videos)
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (statistics.median(timings),
+            timings[min(len(timings) - 1, int(len(timings) * 0.99))])
+
+
+def measure(choose):
+    timings = []
+    failures = 0
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        try:
+            choose()
+        except RecursionError:
+            failures += 1
+        timings.append((time.perf_counter() - start) * 1e6)
+    return percentiles(timings) + (failures,)
+
+
+def main():
+    rng = random.Random(42)
+    matched_signs_json = json.dumps([
+        {'rank': i + 1, 'common_word': f'WORD{i}', 'sign_id': str(i), 'confidence': 1.0}
+        for i in range(TOP_SIGNS)
+    ])
+
+    print(f"{'empty':>6} | {'legacy p50':>11} {'legacy p99':>11} {'errors':>6} | {'index p50':>10} {'index p99':>10}")
+    for empty_share in EMPTY_SHARES:
+        groups = make_groups(empty_share, rng)
+        index = ExampleIndex(groups)
+
+        legacy = measure(lambda: legacy_choose(matched_signs_json, groups, rng))
+        indexed = measure(lambda: index.choose(rng))
+
+        print(f"{empty_share:>6.0%} | {legacy[0]:>9.1f}us {legacy[1]:>9.1f}us {legacy[2]:>6} | "
+              f"{indexed[0]:>8.2f}us {indexed[1]:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Benchmark /score_translation throughput and its effect on other routes.
+
+Starts the stub Anthropic API and the app under gunicorn (using
+gunicorn.conf.py), then runs concurrent scoring requests while probing
+/random_video. Reports throughput, p50/p99 latency and 429s per route.
+Needs a prepared nzsl.db in the repo root:
+
+    python benchmarks/bench_scoring.py --concurrency 32 --duration 20
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from stub_anthropic import start_stub_server
+
+SCORE_BODY = json.dumps({
+    'original_translation': "I play deaf basketball. The coach is good and I've learnt lots.",
+    'user_translation': 'I play basketball with deaf people and the coach is good',
+    'sign_sequence': [{'word': 'me'}, {'word': 'play'}, {'word': 'deaf'}, {'word': 'basketball'}],
+}).encode('utf-8')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(port, stub_url):
+    """Run the app under gunicorn with the production config"""
+    env = dict(os.environ, ANTHROPIC_BASE_URL=stub_url, ANTHROPIC_API_KEY='stub')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/random_video', timeout=2).read()
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('App did not start')
+
+
+def timed_request(request):
+    """Return (status, seconds) for one request"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 'error'
+    return status, time.perf_counter() - start
+
+
+def run_load(make_request, concurrency, stop_at, results):
+    def worker():
+        while time.time() < stop_at:
+            status, seconds = timed_request(make_request())
+            results.append((status, seconds))
+            if status == 429:
+                # Back off like a real client instead of hammering the server
+                time.sleep(0.5)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def report(route, results, duration):
+    statuses = Counter(status for status, _ in results)
+    ok = sorted(seconds * 1000 for status, seconds in results if status == 200)
+    if ok:
+        p50 = statistics.median(ok)
+        p99 = ok[min(len(ok) - 1, int(len(ok) * 0.99))]
+        latency = f"p50 {p50:8.1f}ms  p99 {p99:8.1f}ms"
+    else:
+        latency = "no successful requests"
+    print(f"{route:20} {len(ok) / duration:7.1f} ok/s  {latency}  statuses {dict(statuses)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Benchmark an already running app instead of starting one')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent scoring clients')
+    parser.add_argument('--probes', type=int, default=2, help='Concurrent /random_video clients')
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--latency', type=float, default=1.5, help='Stub Claude mean latency (s)')
+    args = parser.parse_args()
+
+    app_process = None
+    stub = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        stub = start_stub_server(latency=args.latency)
+        port = free_port()
+        app_process = start_app(port, f'http://127.0.0.1:{stub.server_address[1]}')
+        base_url = f'http://127.0.0.1:{port}'
+
+    try:
+        stop_at = time.time() + args.duration
+        scoring_results = []
+        probe_results = []
+        threads = run_load(
+            lambda: urllib.request.Request(f'{base_url}/score_translation', data=SCORE_BODY,
+                                           headers={'Content-Type': 'application/json'}),
+            args.concurrency, stop_at, scoring_results)
+        threads += run_load(
+            lambda: urllib.request.Request(f'{base_url}/random_video'),
+            args.probes, stop_at, probe_results)
+        for thread in threads:
+            thread.join()
+
+        print(f"{args.concurrency} scoring clients, {args.probes} /random_video clients, "
+              f"{args.duration:.0f}s, stub latency {args.latency}s")
+        report('/score_translation', scoring_results, args.duration)
+        report('/random_video', probe_results, args.duration)
+    finally:
+        if app_process:
+            app_process.terminate()
+            app_process.wait()
+        if stub:
+            stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
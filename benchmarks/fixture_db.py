@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Generate a deterministic fixture site for benchmarking the app.
+
+Writes a synthetic nzsl.db (the raw schema, then prepared by prepare_db.py)
+and matched_signs.json into a directory, links in the app's runtime files
+(the same set the Dockerfile copies) and builds examples.bin and dist/ there.
+The same seed always gives the same data, so benchmark runs on different
+commits are comparable without the real dictionary:
+
+    python benchmarks/fixture_db.py --output /tmp/nzsl-fixture
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from prepare_db import prepare
+
+# Runtime files linked into a fixture site, as copied by the Dockerfile
+SITE_FILES = ['index.html', 'script.js', 'DragDropTouch.js', 'assets', 'NZSLGrammar']
+
+SYLLABLES = ['ka', 'to', 'ri', 'mu', 'ne', 'sa', 'lo', 'pe', 'hi', 'wa', 'tu', 'mo', 'ra', 'ki', 'no', 'fe']
+
+
+def make_gloss(rng, used):
+    while True:
+        gloss = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.15:
+            gloss += '-' + ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 2)))
+        if gloss not in used:
+            used.add(gloss)
+            return gloss
+
+
+def build_fixture_db(path, matched_signs_path, words=4000, signs=350, seed=1):
+    """Write a fixture matched_signs.json and a prepared fixture nzsl.db"""
+    rng = random.Random(seed)
+    used = set()
+    word_rows = []
+    for i in range(words):
+        gloss = make_gloss(rng, used)
+        minor = ', '.join(make_gloss(rng, used) for _ in range(rng.randint(0, 4)))
+        word_rows.append((str(1000 + i), gloss, minor))
+
+    video_rows = []
+    example_rows = []
+    for word_id, gloss, _ in word_rows:
+        base = f'https://example.invalid/glossvideo/{word_id}/{gloss}.{word_id}'
+        video_rows.append((word_id, 'main', f'{base}.main_glosses.mb.r480x360.mp4', 1))
+        video_rows.append((word_id, 'main', f'{base}.main_glosses.mb.r480x360.webm', 2))
+
+    matched_signs = []
+    for rank, (word_id, gloss, _) in enumerate(rng.sample(word_rows, signs), start=1):
+        # Most signs have one example sentence, a few have up to four
+        for number in range(1, 1 + min(4, 1 + int(rng.expovariate(2.0)))):
+            sequence = rng.sample(word_rows, rng.randint(3, 10))
+            sentence = ' '.join(f'{other_gloss}[{other_id}]' for other_id, other_gloss, _ in sequence)
+            translation = ' '.join(other_gloss for _, other_gloss, _ in sequence).capitalize() + '.'
+            url = f'https://example.invalid/glossvideo/{word_id}/{gloss}.{word_id}.finalexample{number}.mb.r480x360.mp4'
+            video_rows.append((word_id, f'finalexample{number}', url, number))
+            example_rows.append((word_id, number, sentence, translation, url))
+        matched_signs.append({
+            'common_word': gloss.upper(),
+            'sign_id': word_id,
+            'matched_word': gloss,
+            'confidence': 1.0,
+            'source': 'gloss',
+            'rank': rank,
+        })
+
+    with open(matched_signs_path, 'w') as f:
+        json.dump(matched_signs, f, indent=2)
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE words (id TEXT PRIMARY KEY, gloss TEXT, minor TEXT)")
+        conn.execute("CREATE TABLE videos (word_id TEXT, video_type TEXT, url TEXT, display_order INTEGER)")
+        conn.execute("CREATE TABLE examples (word_id TEXT, display_order INTEGER, sentence TEXT, "
+                     "translation TEXT, video TEXT)")
+        conn.executemany("INSERT INTO words VALUES (?, ?, ?)", word_rows)
+        conn.executemany("INSERT INTO videos VALUES (?, ?, ?, ?)", video_rows)
+        conn.executemany("INSERT INTO examples VALUES (?, ?, ?, ?, ?)", example_rows)
+        conn.commit()
+        prepare(conn, matched_signs_path)
+    finally:
+        conn.close()
+
+
+def build_site(directory, words=4000, signs=350, seed=1):
+    """Create a runnable fixture copy of the app in directory"""
+    os.makedirs(directory, exist_ok=True)
+    build_fixture_db(os.path.join(directory, 'nzsl.db'), os.path.join(directory, 'matched_signs.json'),
+                     words, signs, seed)
+
+    for path in [os.path.basename(path) for path in glob.glob(os.path.join(ROOT, '*.py'))] + SITE_FILES:
+        link = os.path.join(directory, path)
+        if not os.path.lexists(link):
+            os.symlink(os.path.join(ROOT, path), link)
+
+    for script in ('example_store.py', 'build_assets.py'):
+        subprocess.run([sys.executable, script], cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', required=True, help='Directory to create the fixture site in')
+    parser.add_argument('--words', type=int, default=4000, help='Dictionary rows')
+    parser.add_argument('--signs', type=int, default=350, help='Matched signs with example sentences')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    build_site(args.output, args.words, args.signs, args.seed)
+    print(f"Fixture site with {args.words} words and {args.signs} signs in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
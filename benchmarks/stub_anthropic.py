@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Anthropic Messages API, for offline benchmarks.
+
+Answers POST /v1/messages with a canned scoring reply after a configurable
+delay, either as one JSON message or, for "stream": true, as server-sent
+events. Point the app at it with:
+
+    python benchmarks/stub_anthropic.py --port 8099 --latency 1.5 &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8099 ANTHROPIC_API_KEY=stub python app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_TEXT = json.dumps({
+    'score': 8,
+    'feedback': "Great work! You captured the main meaning of the sentence. "
+                "Next time, watch closely for the time sign at the start."
+})
+
+
+class StubAnthropicHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        config = self.server.config
+        delay = max(0.0, random.gauss(config['latency'], config['jitter']))
+
+        prompt = ''.join(message.get('content', '') for message in body.get('messages', [])
+                         if isinstance(message.get('content'), str))
+        usage = {'input_tokens': len(prompt) // 4, 'output_tokens': len(REPLY_TEXT) // 4}
+        message = {
+            'id': f'msg_stub_{threading.get_ident()}',
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'stub'),
+            'content': [{'type': 'text', 'text': REPLY_TEXT}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': usage,
+        }
+
+        if body.get('stream'):
+            self._stream(message, delay)
+            return
+
+        time.sleep(delay)
+        payload = json.dumps(message).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, message, delay):
+        """Send the reply as Messages API server-sent events.
+
+        The first token arrives after a third of the delay; the rest of the
+        text is spread over the remainder in small chunks.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        time.sleep(delay / 3)
+        start = dict(message, content=[], stop_reason=None,
+                     usage=dict(message['usage'], output_tokens=1))
+        send('message_start', {'type': 'message_start', 'message': start})
+        send('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                     'content_block': {'type': 'text', 'text': ''}})
+        chunks = [REPLY_TEXT[i:i + 8] for i in range(0, len(REPLY_TEXT), 8)]
+        for chunk in chunks:
+            send('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                         'delta': {'type': 'text_delta', 'text': chunk}})
+            time.sleep(delay * 2 / 3 / len(chunks))
+        send('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        send('message_delta', {'type': 'message_delta',
+                               'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                               'usage': {'output_tokens': message['usage']['output_tokens']}})
+        send('message_stop', {'type': 'message_stop'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=1.0, jitter=0.2):
+    """Start the stub in a background thread; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubAnthropicHandler)
+    server.daemon_threads = True
+    server.config = {'latency': latency, 'jitter': jitter}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=1.0, help='Mean reply delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Std deviation of the delay')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.jitter)
+    print(f"Stub Anthropic API on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
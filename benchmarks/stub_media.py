@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Local stand-in for the S3 media origin, for testing the media proxy.
+
+Answers GET and HEAD for any .mp4/.webm path with deterministic bytes of a
+fixed size after a configurable delay, with ETag and Last-Modified, answers
+matching conditional requests with 304 and single byte ranges with 206.
+--missing-every N makes about one path in N a 404, and --refuse-head answers
+HEAD with 405, for exercising media_health.py. Point the app at it with:
+
+    python benchmarks/stub_media.py --port 8098 --latency 0.2 &
+    MEDIA_PROXY=1 MEDIA_ORIGIN=http://127.0.0.1:8098 python app.py
+"""
+
+import argparse
+import hashlib
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+
+
+def media_bytes(path, size):
+    """Deterministic content for a path"""
+    block = hashlib.sha256(path.encode('utf-8')).digest()
+    return (block * (size // len(block) + 1))[:size]
+
+
+class StubMediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        config = self.server.config
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(config['latency'])
+
+        path = self.path.split('?')[0]
+        if not path.endswith(('.mp4', '.webm')) or is_missing(path, config['missing_every']):
+            self.send_error(404)
+            return
+        if not send_body and config['refuse_head']:
+            self.send_error(405)
+            return
+        body = media_bytes(path, config['size'])
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+
+        if self.headers.get('If-None-Match') == etag or self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        content_range = None
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match and int(match.group(1)) < len(body):
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(body) - 1), len(body) - 1)
+            content_range = f'bytes {start}-{end}/{len(body)}'
+            body = body[start:end + 1]
+
+        self.send_response(206 if content_range else 200)
+        self.send_header('Content-Type', 'video/mp4' if path.endswith('.mp4') else 'video/webm')
+        self.send_header('Content-Length', str(len(body)))
+        if content_range:
+            self.send_header('Content-Range', content_range)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def is_missing(path, missing_every):
+    """Whether the stub answers 404 for a path"""
+    return bool(missing_every) and int(hashlib.sha256(path.encode('utf-8')).hexdigest()[:8], 16) % missing_every == 0
+
+
+def start_stub_server(port=0, latency=0.2, size=512 * 1024, missing_every=0, refuse_head=False):
+    """Start the stub in a background thread; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubMediaHandler)
+    server.daemon_threads = True
+    server.config = {'latency': latency, 'size': size, 'missing_every': missing_every, 'refuse_head': refuse_head}
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--latency', type=float, default=0.2, help='Delay before each reply in seconds')
+    parser.add_argument('--size', type=int, default=512 * 1024, help='Bytes per video')
+    parser.add_argument('--missing-every', type=int, default=0, metavar='N', help='Answer 404 for about 1 in N paths')
+    parser.add_argument('--refuse-head', action='store_true', help='Answer HEAD with 405')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency, args.size, args.missing_every, args.refuse_head)
+    print(f"Stub media origin on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
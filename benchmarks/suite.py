@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""Reproducible load test and microbenchmark suite for the app.
+
+Builds the fixture site (benchmarks/fixture_db.py), then for each traffic
+mix starts app:app under gunicorn against it, with the stub Anthropic API
+standing in for Claude. Every client runs a seeded mix of routes, and the
+suite reports throughput and p50/p95/p99 latency per route. It then times
+parse_sign_sequence, gloss matching and the example enrichment loop in
+process, and the media health check against the stub media origin.
+
+Results are written as JSON along with the commit they were measured on.
+--compare prints the change against an earlier result and exits non-zero
+when anything regressed by more than --threshold:
+
+    python benchmarks/suite.py --duration 10
+    python benchmarks/suite.py --compare benchmarks/results/<commit>.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from bench_scoring import free_port
+from fixture_db import build_site
+from stub_anthropic import start_stub_server
+from stub_media import start_stub_server as start_stub_media
+
+RESULTS_FORMAT = 1
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Relative weight of each kind of request in a traffic mix
+MIXES = {
+    # A learner watching examples, opening sign definitions and loading pages
+    'practice': {'random_video': 30, 'session_deck': 10, 'sign_definition': 20, 'sign_definitions': 10,
+                 'search': 10, 'grammar_rounds': 5, 'static': 25, 'score': 5},
+    # Scoring-heavy traffic, with Claude latency in the mix
+    'scoring': {'score': 50, 'random_video': 20, 'sign_definition': 15, 'static': 15},
+    # First visits: mostly pages and assets
+    'static': {'static': 70, 'random_video': 20, 'sign_definition': 10},
+}
+
+ENCODINGS = ['gzip, deflate, br', 'gzip', '']
+
+
+class Fixture:
+    """Request parameters drawn from the fixture site"""
+
+    def __init__(self, site):
+        with open(os.path.join(site, 'matched_signs.json')) as f:
+            self.sign_ids = [item['sign_id'] for item in json.load(f)]
+        conn = sqlite3.connect(os.path.join(site, 'nzsl.db'))
+        try:
+            words = conn.execute("SELECT id, gloss FROM words ORDER BY id").fetchall()
+            self.word_ids = [word_id for word_id, _ in words]
+            self.glosses = [gloss for _, gloss in words]
+            self.examples = conn.execute(
+                "SELECT word_id, translation FROM servable_examples WHERE translation IS NOT NULL "
+                "ORDER BY word_id, example_number").fetchall()
+        finally:
+            conn.close()
+        with open(os.path.join(site, 'dist', 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.static_paths = ['/', '/NZSLGrammar/index.html'] + [f"/{asset['path']}" for asset in manifest.values()
+                                                      if asset['immutable']]
+
+
+def make_request(kind, base_url, fixture, rng):
+    """Build one request of a kind"""
+    if kind == 'random_video':
+        return urllib.request.Request(f'{base_url}/random_video')
+    if kind == 'session_deck':
+        return json_request(f'{base_url}/session_deck', {'count': 5})
+    if kind == 'sign_definition':
+        return json_request(f'{base_url}/get_sign_definition', {'sign_id': rng.choice(fixture.word_ids)})
+    if kind == 'sign_definitions':
+        ids = ','.join(rng.sample(fixture.word_ids, rng.randint(3, 10)))
+        return urllib.request.Request(f'{base_url}/get_sign_definitions?ids={ids}')
+    if kind == 'search':
+        # A typeahead prefix of a gloss
+        gloss = rng.choice(fixture.glosses)
+        return urllib.request.Request(f'{base_url}/search_signs?q={gloss[:rng.randint(1, len(gloss))]}')
+    if kind == 'grammar_rounds':
+        return urllib.request.Request(f'{base_url}/grammar_rounds?seed={rng.getrandbits(31)}&limit=4')
+    if kind == 'static':
+        return urllib.request.Request(f'{base_url}{rng.choice(fixture.static_paths)}',
+                                      headers={'Accept-Encoding': rng.choice(ENCODINGS)})
+    if kind == 'score':
+        word_id, translation = rng.choice(fixture.examples)
+        words = translation.rstrip('.').split()
+        # Drop a word so most answers need Claude; a few repeat and hit the cache
+        del words[rng.randrange(len(words))]
+        return json_request(f'{base_url}/score_translation', {
+            'original_translation': translation,
+            'user_translation': ' '.join(words),
+            'sign_sequence': [],
+            'word_id': word_id,
+        })
+    raise ValueError(kind)
+
+
+def json_request(url, body):
+    return urllib.request.Request(url, data=json.dumps(body).encode('utf-8'),
+                                  headers={'Content-Type': 'application/json'})
+
+
+def timed_request(opener, request):
+    """Return (status, seconds) for one request"""
+    start = time.perf_counter()
+    try:
+        with opener.open(request, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 'error'
+    return status, time.perf_counter() - start
+
+
+def run_mix(mix, base_url, fixture, concurrency, warmup, duration, seed):
+    """Drive a mix from concurrency clients; returns [(kind, status, seconds)]"""
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    started = time.time()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    results = []
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        # Each client keeps its own session cookie, like a browser
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        while True:
+            now = time.time()
+            if now >= stop_at:
+                break
+            kind = rng.choices(kinds, weights)[0]
+            status, seconds = timed_request(opener, make_request(kind, base_url, fixture, rng))
+            if now >= measure_from:
+                results.append((kind, status, seconds))
+            if status == 429:
+                time.sleep(0.5)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(results, duration):
+    """Per-route throughput, latency percentiles and statuses"""
+    summary = {}
+    for kind in sorted({kind for kind, _, _ in results}):
+        statuses = Counter(str(status) for k, status, _ in results if k == kind)
+        ok = sorted(seconds * 1000 for k, status, seconds in results
+                    if k == kind and status in (200, 304))
+        summary[kind] = {
+            'requests': sum(statuses.values()),
+            'throughput': round(len(ok) / duration, 2),
+            'p50_ms': round(percentile(ok, 0.50), 2) if ok else None,
+            'p95_ms': round(percentile(ok, 0.95), 2) if ok else None,
+            'p99_ms': round(percentile(ok, 0.99), 2) if ok else None,
+            'statuses': dict(statuses),
+        }
+    return summary
+
+
+def start_app(site, port, stub_url):
+    """Run the fixture site under gunicorn with the production config"""
+    env = dict(os.environ, ANTHROPIC_BASE_URL=stub_url, ANTHROPIC_API_KEY='stub', SECRET_KEY='benchmark',
+               SCORING_BUDGET_HOURLY='', SCORING_BUDGET_DAILY='', LOG_LEVEL='WARNING')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=site, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/random_video', timeout=2).read()
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('App did not start')
+
+
+def clear_state(site):
+    """Remove the learner, metering and metrics state of a previous run"""
+    for name in os.listdir(site):
+        if name.startswith(('learners.db', 'metering.db', 'score_cache.db')):
+            os.remove(os.path.join(site, name))
+    metrics_dir = os.path.join(site, '.metrics')
+    if os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def run_load(site, args):
+    fixture = Fixture(site)
+    stub = start_stub_server(latency=args.claude_latency)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    load = {}
+    try:
+        for name in args.mixes:
+            # A fresh app per mix, so one mix's caches and state don't carry over
+            clear_state(site)
+            port = free_port()
+            process = start_app(site, port, stub_url)
+            try:
+                results = run_mix(MIXES[name], f'http://127.0.0.1:{port}', fixture, args.concurrency,
+                                  args.warmup, args.duration, args.seed)
+            finally:
+                process.terminate()
+                process.wait()
+            load[name] = summarize(results, args.duration)
+            print(f"\n{name} mix: {args.concurrency} clients, {args.duration:.0f}s")
+            for kind, stats in load[name].items():
+                latency = (f"p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  p99 {stats['p99_ms']:8.1f}ms"
+                           if stats['p50_ms'] is not None else 'no successful requests')
+                print(f"  {kind:18} {stats['throughput']:8.1f} ok/s  {latency}  {stats['statuses']}")
+    finally:
+        stub.shutdown()
+    return load
+
+
+def time_per_op(fn, ops, rounds):
+    """Median and best microseconds per operation over rounds of fn()"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) / ops * 1e6)
+    return {'median_us': round(statistics.median(timings), 3), 'min_us': round(min(timings), 3), 'ops': ops}
+
+
+def run_micro(site, args):
+    import asyncio
+
+    import sign_definitions
+    from db import connect_readonly
+    from example_index import _build_sign_examples, parse_sign_sequence
+    from match_signs import GlossMatcher
+    from media_health import check_urls
+
+    conn = connect_readonly(os.path.join(site, 'nzsl.db'))
+    cursor = conn.cursor()
+    sentences = [row[0] for row in cursor.execute("SELECT sentence FROM examples ORDER BY rowid")]
+    db_words = cursor.execute("SELECT id, gloss, minor FROM words ORDER BY id").fetchall()
+    with open(os.path.join(site, 'matched_signs.json')) as f:
+        matched_signs = json.load(f)
+
+    # Vocabulary of exact glosses and near misses, like words.json against the dictionary
+    rng = random.Random(args.seed)
+    vocabulary = []
+    for _, gloss, _ in rng.sample(db_words, 300):
+        word = gloss.split('-')[0]
+        if rng.random() < 0.5 and len(word) > 2:
+            position = rng.randrange(len(word))
+            word = word[:position] + rng.choice('aeiou') + word[position + 1:]
+        vocabulary.append(word)
+    matcher = GlossMatcher(db_words)
+    sequences = [parse_sign_sequence(sentence) for sentence in sentences]
+
+    def enrich_cold():
+        # Every sign's examples from a cold definition cache, as at startup
+        sign_definitions._definition_cache.clear()
+        for item in matched_signs:
+            _build_sign_examples(cursor, item)
+
+    def enhance_warm():
+        for sequence in sequences:
+            sign_definitions.enhance_sign_sequence(cursor, sequence)
+
+    # Every video URL probed against a local origin where 1 in 20 is missing,
+    # so the figure is the checker's own overhead per URL
+    media_urls = [row[0] for row in cursor.execute("SELECT DISTINCT url FROM videos ORDER BY url")]
+    media_origin = start_stub_media(latency=0, size=4096, missing_every=20)
+    media_prefix = f'http://127.0.0.1:{media_origin.server_address[1]}/'
+
+    def check_media():
+        results = []
+        asyncio.run(check_urls(media_urls, results.append, concurrency=16,
+                               rewrite=lambda url: media_prefix + url.split('/', 3)[3]))
+        assert not [row for row in results if row[1] is None], 'media health probes failed'
+
+    micro = {
+        'parse_sign_sequence': time_per_op(lambda: [parse_sign_sequence(s) for s in sentences],
+                                           len(sentences), args.rounds),
+        'find_best_match': time_per_op(lambda: [matcher.best_match(word) for word in vocabulary],
+                                       len(vocabulary), max(1, args.rounds // 5)),
+        'build_sign_examples_cold': time_per_op(enrich_cold, len(matched_signs), args.rounds),
+        'enhance_sign_sequence_warm': time_per_op(enhance_warm, len(sequences), args.rounds),
+        'media_health_probe': time_per_op(check_media, len(media_urls), max(1, args.rounds // 5)),
+    }
+    conn.close()
+    media_origin.shutdown()
+
+    print("\nmicrobenchmarks (per operation)")
+    for name, stats in micro.items():
+        print(f"  {name:28} median {stats['median_us']:10.2f}us  best {stats['min_us']:10.2f}us  "
+              f"({stats['ops']} ops)")
+    return micro
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def comparisons(baseline, current):
+    """(name, before, after, change) for each metric both results have; change > 0 is worse"""
+    rows = []
+    for mix, routes in current.get('load', {}).items():
+        for kind, stats in routes.items():
+            before = baseline.get('load', {}).get(mix, {}).get(kind)
+            if not before:
+                continue
+            if before['throughput'] and stats['throughput']:
+                rows.append((f'{mix}/{kind} throughput', before['throughput'], stats['throughput'],
+                             before['throughput'] / stats['throughput'] - 1))
+            for key in ('p95_ms', 'p99_ms'):
+                if before[key] and stats[key]:
+                    rows.append((f'{mix}/{kind} {key}', before[key], stats[key], stats[key] / before[key] - 1))
+    for name, stats in current.get('micro', {}).items():
+        before = baseline.get('micro', {}).get(name)
+        if before:
+            rows.append((f'{name} median_us', before['median_us'], stats['median_us'],
+                         stats['median_us'] / before['median_us'] - 1))
+    return rows
+
+
+def compare(baseline_path, current, threshold):
+    """Print the change against a baseline; returns the regressed metrics"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    config = baseline.get('config', {})
+    if config.get('fixture') != current['config']['fixture']:
+        print("\nwarning: the baseline used a different fixture; results are not comparable")
+    for key in ('concurrency', 'claude_latency'):
+        if config.get(key) != current['config'][key]:
+            print(f"\nwarning: the baseline used {key} {config.get(key)}, this run {current['config'][key]}")
+
+    print(f"\ncompared with {baseline.get('commit', 'unknown')} (regression threshold {threshold:.0%})")
+    regressions = []
+    for name, before, after, change in comparisons(baseline, current):
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  improved'
+        print(f"  {name:45} {before:10.2f} -> {after:10.2f}  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mixes', nargs='+', choices=sorted(MIXES), default=sorted(MIXES))
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients per mix')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds per mix')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds before each mix')
+    parser.add_argument('--claude-latency', type=float, default=0.5, help='Stub Claude mean latency (s)')
+    parser.add_argument('--rounds', type=int, default=20, help='Rounds per microbenchmark')
+    parser.add_argument('--seed', type=int, default=1, help='Fixture and traffic seed')
+    parser.add_argument('--words', type=int, default=4000, help='Fixture dictionary rows')
+    parser.add_argument('--signs', type=int, default=350, help='Fixture signs with examples')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Relative change counted as a regression (default 0.15)')
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    results = {
+        'format': RESULTS_FORMAT,
+        'commit': commit + ('-dirty' if dirty else ''),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'config': {
+            'fixture': {'words': args.words, 'signs': args.signs, 'seed': args.seed},
+            'mixes': {name: MIXES[name] for name in args.mixes},
+            'concurrency': args.concurrency, 'duration': args.duration, 'warmup': args.warmup,
+            'claude_latency': args.claude_latency, 'rounds': args.rounds,
+        },
+    }
+
+    with tempfile.TemporaryDirectory(prefix='nzsl-bench-') as site:
+        print(f"Building fixture site ({args.words} words, {args.signs} signs, seed {args.seed})")
+        build_site(site, args.words, args.signs, args.seed)
+        if not args.skip_load:
+            results['load'] = run_load(site, args)
+        if not args.skip_micro:
+            results['micro'] = run_micro(site, args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(args.compare, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Fingerprint and precompress the static assets into dist/.
+
+Every asset is copied to a content-hashed name (script.js ->
+script.1a2b3c4d5e.js) that can be cached forever. The HTML pages and the web
+manifest keep their names and have their references rewritten to the hashed
+names. Text assets also get .gz and .br variants so the app never compresses
+on the request path. The manifest records a hash of each source file, and the
+app serves dist/ only while every source still matches; after an edit it
+falls back to the source files until this is run again:
+
+    python build_assets.py
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # gzip variants only
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Fingerprinted assets. Files that reference others come after them so
+# their references can be rewritten to hashed names first.
+ASSETS = sorted(set(glob.glob('assets/icons/*')) - {'assets/icons/site.webmanifest'}) + [
+    'assets/icons/site.webmanifest',
+    'DragDropTouch.js',
+    'script.js',
+    'NZSLGrammar/game.js',
+    'NZSLGrammar/game_data.js',
+    'NZSLGrammar/styles.css',
+]
+
+# Pages are requested by their plain URL, so they keep their names and are
+# revalidated on every visit instead
+PAGES = ['index.html', 'NZSLGrammar/index.html']
+
+MIMETYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.webmanifest': 'application/manifest+json',
+    '.png': 'image/png',
+    '.ico': 'image/vnd.microsoft.icon',
+}
+COMPRESSIBLE = {'.html', '.js', '.css', '.webmanifest', '.ico'}
+
+# src/href attributes in pages and "src" entries in the web manifest
+REFERENCE_PATTERNS = {
+    '.html': re.compile(r'((?:src|href)=")([^"]+)(")'),
+    '.webmanifest': re.compile(r'("src":\s*")([^"]+)(")'),
+}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprinted_name(path, digest):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{digest[:10]}{ext}'
+
+
+def rewrite_references(path, data, manifest):
+    """Point src/href references at the fingerprinted copies of assets"""
+    pattern = REFERENCE_PATTERNS.get(os.path.splitext(path)[1])
+    if not pattern:
+        return data
+
+    base = os.path.dirname(path)
+
+    def replace(match):
+        url = match.group(2)
+        if '://' in url or url.startswith(('mailto:', '#', 'data:')) or not url:
+            return match.group(0)
+        logical = url.lstrip('/') if url.startswith('/') else os.path.normpath(os.path.join(base, url))
+        asset = manifest.get(logical)
+        if not asset:
+            return match.group(0)
+        return f"{match.group(1)}/{asset['path']}{match.group(3)}"
+
+    return pattern.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+
+def write_variants(out_dir, path, data):
+    """Write a file plus whichever precompressed variants are smaller"""
+    target = os.path.join(out_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+
+    encodings = []
+    if os.path.splitext(path)[1] not in COMPRESSIBLE:
+        return encodings
+    variants = [('gzip', '.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', brotli.compress(data, quality=11)))
+    for encoding, suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(target + suffix, 'wb') as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+
+def build(dist_dir=DIST_DIR):
+    """Build a fresh dist/ and swap it in; returns the manifest"""
+    out_dir = f'{dist_dir}.new'
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    manifest = {}
+    for path, fingerprint in [(path, True) for path in ASSETS] + [(path, False) for path in PAGES]:
+        with open(path, 'rb') as f:
+            source = f.read()
+        data = rewrite_references(path, source, manifest)
+        digest = content_hash(data)
+        served_path = fingerprinted_name(path, digest) if fingerprint else path
+        manifest[path] = {
+            'path': served_path,
+            'etag': digest[:32],
+            'mimetype': MIMETYPES.get(os.path.splitext(path)[1], 'application/octet-stream'),
+            'encodings': write_variants(out_dir, served_path, data),
+            'immutable': fingerprint,
+            'source': content_hash(source),
+        }
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    old_dir = f'{dist_dir}.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(dist_dir):
+        os.replace(dist_dir, old_dir)
+    os.replace(out_dir, dist_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+def main():
+    manifest = build()
+    for path, asset in manifest.items():
+        encodings = ', '.join(asset['encodings']) or 'uncompressed'
+        print(f"  {path:40} -> {asset['path']} ({encodings})")
+    print(f"Built {len(manifest)} assets into {DIST_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Build video_examples.json, examples.bin and NZSLGrammar/game_data.js from nzsl.db.
+
+Each sign is a unit of work whose inputs (its example rows, the dictionary
+entries its sentences refer to and its matched_signs.json entry) are hashed.
+Units whose hash is unchanged since the last build are reused from the build
+cache; the rest are rebuilt on a process pool. Outputs are written atomically.
+
+    python build_datasets.py               # incremental build
+    python build_datasets.py --top-n 500   # only the new signs are built
+    python build_datasets.py --force       # ignore the build cache
+
+Examples whose video media_health.py found broken are left out.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from multiprocessing import Pool
+
+from db import DB_PATH, connect_readonly, require_prepared
+from example_index import EXAMPLES_QUERY, TOP_SIGNS, _build_sign_examples, parse_sign_sequence
+from example_store import EXAMPLE_STORE_PATH, store_sources, write_example_store
+from grammar_sentences import GAME_DATA_PATH
+from media_health import MEDIA_HEALTH_PATH, broken_urls_version, load_broken_urls
+from sign_definitions import lookup_sign_definitions
+
+CACHE_PATH = os.path.join('.build_cache', 'datasets.json')
+VIDEO_EXAMPLES_PATH = 'video_examples.json'
+
+# Bump when the output format changes so cached units are rebuilt
+BUILD_VERSION = 1
+
+GAME_DATA_HEADER = """// NZSL Grammar Game Data - Complete Dataset
+// Total sentences: {count}
+// URL pattern: https://www.nzsl.nz/signs/{{word_id}}
+const gameData = """
+
+_cursor = None
+_broken_urls = frozenset()
+
+
+def file_hash(path):
+    """sha1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def atomic_write(path, text):
+    """Write text to path so readers never see a partial file"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _init_worker(db_path, broken_urls):
+    global _cursor, _broken_urls
+    conn = connect_readonly(db_path)
+    require_prepared(conn)
+    _cursor = conn.cursor()
+    _broken_urls = broken_urls
+
+
+def _unit_inputs(sign_id):
+    """Example rows of a sign with working videos, and every dictionary entry they depend on"""
+    _cursor.execute(EXAMPLES_QUERY, (sign_id,))
+    rows = [row for row in _cursor.fetchall() if row[3] not in _broken_urls]
+    referenced = [sign_id] + [sign['id'] for row in rows for sign in parse_sign_sequence(row[4])]
+    return rows, lookup_sign_definitions(_cursor, referenced)
+
+
+def _content_hash(*parts):
+    raw = json.dumps([BUILD_VERSION, *parts], sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _game_entries(sign_id, rows, definitions):
+    """Grammar game sentences for one sign: examples with sign notation and an mp4"""
+    definition = definitions[str(sign_id)]
+    if not definition:
+        return []
+    entries = []
+    for word_id, _, _, video_url, sentence, translation in rows:
+        if not (translation and video_url and video_url.endswith('.mp4') and parse_sign_sequence(sentence)):
+            continue
+        entries.append({
+            'english': translation,
+            'nzsl': sentence,
+            'video': video_url,
+            'word_id': int(word_id),
+            'gloss': definition[0]
+        })
+    return entries
+
+
+def build_unit(task):
+    """Hash one unit's inputs; rebuild its entries only if the hash changed.
+
+    Returns (kind, key, hash, entries), with entries None when the cached
+    entries are still valid.
+    """
+    kind, key, item, cached_hash = task
+    sign_id = item['sign_id']
+    rows, definitions = _unit_inputs(sign_id)
+    content_hash = _content_hash(kind, item, rows, definitions)
+    if content_hash == cached_hash:
+        return kind, key, content_hash, None
+
+    if kind == 'video_examples':
+        entries = _build_sign_examples(_cursor, item, _broken_urls)
+    else:
+        entries = _game_entries(sign_id, rows, definitions)
+    return kind, key, content_hash, entries
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {'inputs': None, 'units': {}}
+    return cache
+
+
+def plan_units(db_path, matched_signs, top_n):
+    """(kind, key, item) for every unit, in output order"""
+    units = []
+    for item in matched_signs[:top_n]:
+        units.append(('video_examples', f"{item['rank']}:{item['sign_id']}", item))
+
+    conn = connect_readonly(db_path)
+    try:
+        require_prepared(conn)
+        sign_ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT word_id FROM servable_examples ORDER BY CAST(word_id AS INTEGER)")]
+    finally:
+        conn.close()
+    for sign_id in sign_ids:
+        units.append(('game_data', str(sign_id), {'sign_id': sign_id}))
+    return units
+
+
+def build(db_path=DB_PATH, matched_signs_path='matched_signs.json', top_n=TOP_SIGNS,
+          cache_path=CACHE_PATH, workers=None, force=False, health_path=MEDIA_HEALTH_PATH):
+    """Run an incremental build; returns (units rebuilt, units total)"""
+    cache = {'inputs': None, 'units': {}} if force else load_cache(cache_path)
+    # Units hash their rows after broken videos are dropped, so only the
+    # signs whose videos changed health are rebuilt
+    broken_urls = load_broken_urls(health_path)
+    inputs = {
+        'build_version': BUILD_VERSION,
+        'db': file_hash(db_path),
+        'matched_signs': file_hash(matched_signs_path),
+        'top_n': top_n,
+        'media_health': broken_urls_version(broken_urls)
+    }
+    outputs_exist = all(os.path.exists(path) for path in (VIDEO_EXAMPLES_PATH, EXAMPLE_STORE_PATH, GAME_DATA_PATH))
+    if cache['inputs'] == inputs and outputs_exist:
+        print("Inputs unchanged since the last build")
+        return 0, len(cache['units'])
+
+    with open(matched_signs_path, 'r') as f:
+        matched_signs = json.load(f)
+
+    units = plan_units(db_path, matched_signs, top_n)
+    tasks = [(kind, key, item, cache['units'].get(f'{kind}/{key}', {}).get('hash'))
+             for kind, key, item in units]
+
+    workers = workers or os.cpu_count() or 1
+    with Pool(workers, initializer=_init_worker, initargs=(db_path, broken_urls)) as pool:
+        results = pool.map(build_unit, tasks, chunksize=max(1, len(tasks) // (workers * 8)))
+
+    unit_cache = {}
+    rebuilt = 0
+    for kind, key, content_hash, entries in results:
+        cache_key = f'{kind}/{key}'
+        if entries is None:
+            entries = cache['units'][cache_key]['entries']
+        else:
+            rebuilt += 1
+        unit_cache[cache_key] = {'hash': content_hash, 'entries': entries}
+
+    video_groups = [unit['entries'] for key, unit in unit_cache.items() if key.startswith('video_examples/')]
+    video_examples = [entry for group in video_groups for entry in group]
+    game_data = [entry for key, unit in unit_cache.items() if key.startswith('game_data/')
+                 for entry in unit['entries']]
+
+    atomic_write(VIDEO_EXAMPLES_PATH, json.dumps(video_examples, indent=2))
+    write_example_store(EXAMPLE_STORE_PATH, video_groups,
+                        store_sources(db_path, matched_signs_path, top_n, health_path))
+    atomic_write(GAME_DATA_PATH, GAME_DATA_HEADER.format(count=len(game_data))
+                 + json.dumps(game_data, indent=2, ensure_ascii=False) + ';\n')
+    # The cache goes last: if a build dies part way, the next one redoes it
+    atomic_write(cache_path, json.dumps({'inputs': inputs, 'units': unit_cache}))
+
+    print(f"Wrote {len(video_examples)} video examples (top {top_n} signs) to {VIDEO_EXAMPLES_PATH}")
+    print(f"Wrote {len(game_data)} grammar sentences to {GAME_DATA_PATH}")
+    return rebuilt, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DB_PATH, help='Path to a prepared nzsl.db')
+    parser.add_argument('--matched-signs', default='matched_signs.json')
+    parser.add_argument('--top-n', type=int, default=TOP_SIGNS, help='Number of top-ranked signs to include')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='Rebuild every unit')
+    parser.add_argument('--media-health', default=MEDIA_HEALTH_PATH, help='Broken URLs from media_health.py')
+    args = parser.parse_args()
+
+    rebuilt, total = build(args.db, args.matched_signs, args.top_n, workers=args.workers, force=args.force,
+                           health_path=args.media_health)
+    print(f"Rebuilt {rebuilt} of {total} units; the rest were reused from the build cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+DB_PATH = 'nzsl.db'
+
+# Map the whole database into memory and keep a generous page cache. nzsl.db
+# is a few tens of MB, so after warmup reads never touch the filesystem.
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+
+# Compiled statements kept per connection; sqlite3 reuses them whenever the
+# same SQL text is executed again
+CACHED_STATEMENTS = 256
+
+# PRAGMA user_version written by prepare_db.py once indexes, precomputed
+# columns, servable_examples and the dictionary search index exist
+PREPARED_SCHEMA_VERSION = 2
+
+_local = threading.local()
+
+
+def connect_readonly(path=DB_PATH):
+    """Open a read-only connection with pragmas tuned for nzsl.db lookups.
+
+    immutable=1 tells SQLite the file cannot change, so it skips locking and
+    change detection entirely. Only use this for databases that are not
+    written while the connection is open.
+    """
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=CACHED_STATEMENTS)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    return conn
+
+
+def _thread_connections():
+    # Connections are kept per thread and per process. A gunicorn worker
+    # forked from a --preload master gets fresh connections instead of sharing
+    # the master's, and each gthread thread gets its own.
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+    return connections
+
+
+def get_connection(path=DB_PATH):
+    """Return this thread's pooled read-only connection, opening it if needed"""
+    connections = _thread_connections()
+    conn = connections.get(('ro', path))
+    if conn is None:
+        conn = connections[('ro', path)] = connect_readonly(path)
+    return conn
+
+
+def get_writable_connection(path):
+    """Return this thread's connection to a writable store such as learners.db.
+
+    Opened once per thread in WAL mode, so readers and the single writer
+    never block each other, and in autocommit mode so transaction() controls
+    exactly where each transaction begins.
+    """
+    connections = _thread_connections()
+    conn = connections.get(('rw', path))
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None, cached_statements=CACHED_STATEMENTS)
+        conn.execute("PRAGMA journal_mode = WAL")
+        connections[('rw', path)] = conn
+    return conn
+
+
+@contextmanager
+def transaction(path, immediate=False):
+    """This thread's writable connection to path inside one transaction.
+
+    immediate takes the write lock up front, so a read-modify-write can't
+    interleave with another writer's.
+    """
+    conn = get_writable_connection(path)
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def execute(path, *statements):
+    """Run (sql, params) statements on a writable store in one transaction; returns the last rows"""
+    with transaction(path) as conn:
+        for statement in statements:
+            sql, params = statement if isinstance(statement, tuple) else (statement, ())
+            rows = conn.execute(sql, params).fetchall()
+    return rows
+
+
+def require_prepared(conn):
+    """Raise if nzsl.db has not been through prepare_db.py yet"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < PREPARED_SCHEMA_VERSION:
+        raise RuntimeError("nzsl.db has not been prepared; run python prepare_db.py first")
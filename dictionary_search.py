@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""English-word search over the dictionary's glosses and minor meanings.
+
+prepare_db.py materializes search_words (every sign with its frequency rank
+from matched_signs.json) and two FTS5 indexes over it: words_fts, tokenized
+by word with prefix indexes, answers typeahead prefixes like "hou" and
+"thank yo"; words_trigram answers substrings inside a word ("ouse") when the
+prefix search finds too few. Both are index lookups, so search time stays
+flat however large the dictionary is.
+"""
+
+import json
+import os
+import re
+
+SEARCH_INDEX_STATEMENTS = [
+    "DROP TABLE IF EXISTS words_fts",
+    "DROP TABLE IF EXISTS words_trigram",
+    "DROP TABLE IF EXISTS search_words",
+    """
+    CREATE TABLE search_words (
+        docid INTEGER PRIMARY KEY,
+        word_id TEXT NOT NULL,
+        gloss TEXT,
+        minor TEXT,
+        frequency_rank INTEGER
+    )
+    """,
+    # Prefix indexes for one to three characters keep short typeahead
+    # queries from expanding into every matching term
+    """
+    CREATE VIRTUAL TABLE words_fts USING fts5(
+        gloss, minor, content='search_words', content_rowid='docid',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE words_trigram USING fts5(
+        gloss, minor, content='search_words', content_rowid='docid', tokenize='trigram'
+    )
+    """,
+]
+
+MAX_SEARCH_RESULTS = 50
+DEFAULT_SEARCH_RESULTS = 10
+MAX_QUERY_LENGTH = 100
+
+# Trigram matching needs at least three characters
+MIN_SUBSTRING_LENGTH = 3
+
+# Exact gloss matches first, then glosses starting with the query, then the
+# rest; within each tier the commoner signs (lower frequency rank) first and
+# signs without a rank by relevance, gloss matches weighted over minor meanings
+SEARCH_QUERY = """
+    SELECT s.word_id, s.gloss, s.minor, s.frequency_rank
+    FROM {table} f
+    JOIN search_words s ON s.docid = f.rowid
+    WHERE {table} MATCH ?
+    ORDER BY
+        lower(s.gloss) = ? DESC,
+        instr(lower(s.gloss), ?) = 1 DESC,
+        s.frequency_rank IS NULL,
+        s.frequency_rank,
+        bm25({table}, 10.0, 1.0)
+    LIMIT ?
+"""
+
+
+def load_frequency_ranks(matched_signs_path):
+    """Sign ID -> best frequency rank in matched_signs.json ({} if missing)"""
+    if not os.path.exists(matched_signs_path):
+        return {}
+    with open(matched_signs_path, 'r') as f:
+        matched_signs = json.load(f)
+    ranks = {}
+    for item in matched_signs:
+        sign_id = str(item['sign_id'])
+        rank = item.get('rank')
+        if rank is not None and (sign_id not in ranks or rank < ranks[sign_id]):
+            ranks[sign_id] = rank
+    return ranks
+
+
+def build_search_index(cursor, frequency_ranks):
+    """(Re)create search_words and its FTS5 indexes; returns the word count"""
+    for statement in SEARCH_INDEX_STATEMENTS:
+        cursor.execute(statement)
+    cursor.execute("SELECT id, gloss, minor FROM words ORDER BY id")
+    cursor.executemany(
+        "INSERT INTO search_words (word_id, gloss, minor, frequency_rank) VALUES (?, ?, ?, ?)",
+        [(str(word_id), gloss, minor, frequency_ranks.get(str(word_id)))
+         for word_id, gloss, minor in cursor.fetchall()]
+    )
+    cursor.execute("INSERT INTO words_fts (words_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO words_trigram (words_trigram) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO words_fts (words_fts) VALUES ('optimize')")
+    cursor.execute("INSERT INTO words_trigram (words_trigram) VALUES ('optimize')")
+    cursor.execute("SELECT COUNT(*) FROM search_words")
+    return cursor.fetchone()[0]
+
+
+def normalize_query(query):
+    """Lowercased query with runs of whitespace collapsed"""
+    return ' '.join(query.lower().split())[:MAX_QUERY_LENGTH]
+
+
+def prefix_match_expression(query):
+    """FTS5 expression matching every word of query, the last as a prefix"""
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    # Quoted so words like AND, OR and NEAR are searched for, not parsed
+    return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def substring_match_expression(query):
+    """FTS5 trigram expression matching query anywhere in a gloss or meaning"""
+    if len(query) < MIN_SUBSTRING_LENGTH:
+        return None
+    return '"' + query.replace('"', '""') + '"'
+
+
+def search_signs(cursor, query, limit=DEFAULT_SEARCH_RESULTS):
+    """Best matching signs for an English query as (id, gloss, minor, rank)"""
+    query = normalize_query(query)
+    results = []
+    seen = set()
+    for table, expression in (('words_fts', prefix_match_expression(query)),
+                              ('words_trigram', substring_match_expression(query))):
+        if expression is None or len(results) >= limit:
+            continue
+        cursor.execute(SEARCH_QUERY.format(table=table), (expression, query, query, limit + len(results)))
+        for row in cursor.fetchall():
+            if row[0] not in seen:
+                seen.add(row[0])
+                results.append(row)
+    return results[:limit]
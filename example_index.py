@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import bisect
+import itertools
+import json
+import random
+import re
+
+from db import DB_PATH, connect_readonly, require_prepared
+from media_health import MEDIA_HEALTH_PATH, load_broken_urls
+from sign_definitions import enhance_sign_sequence, lookup_sign_definitions
+
+# Number of top-ranked signs from matched_signs.json that are served
+TOP_SIGNS = 350
+
+# Example videos of one sign with their sentence, from the table materialized
+# by prepare_db.py
+EXAMPLES_QUERY = """
+    SELECT word_id, video_type, example_number, video_url, sentence, translation
+    FROM servable_examples
+    WHERE word_id = ?
+    ORDER BY video_type, display_order
+"""
+
+
+def parse_sign_sequence(sentence):
+    """Extract sign IDs from sentence notation"""
+    if not sentence:
+        return []
+    pattern = r'([a-zA-Z\-\^:]+)\[(\d+)\]'
+    matches = re.findall(pattern, sentence)
+    return [{'word': word, 'id': int(sign_id)} for word, sign_id in matches]
+
+
+def _build_sign_examples(cursor, item, broken_urls=frozenset()):
+    """Build every servable example entry for one matched sign, except broken videos"""
+    sign_id = item['sign_id']
+
+    # Get actual word definition
+    word_data = lookup_sign_definitions(cursor, [sign_id])[str(sign_id)]
+    if word_data:
+        actual_gloss, minor_meanings, definition_video_url = word_data
+    else:
+        actual_gloss = item['common_word']
+        minor_meanings = ""
+        definition_video_url = None
+
+    # Get all example videos for this sign with their sentences
+    cursor.execute(EXAMPLES_QUERY, (sign_id,))
+
+    entries = []
+    for word_id, video_type, example_number, video_url, sentence, translation in cursor.fetchall():
+        if video_url in broken_urls:
+            continue
+        if sentence is not None:
+            sign_sequence = parse_sign_sequence(sentence)
+        else:
+            sentence = ""
+            translation = f"Example for {item['common_word']}"
+            sign_sequence = []
+
+        entries.append({
+            'word_id': word_id,
+            'example_number': example_number,
+            'video_type': video_type,
+            'common_word': item['common_word'],
+            'actual_gloss': actual_gloss,
+            'minor_meanings': minor_meanings,
+            'definition_video_url': definition_video_url,
+            'rank': item['rank'],
+            'confidence': item['confidence'],
+            'video_url': video_url,
+            'english_translation': translation,
+            'sign_sequence': enhance_sign_sequence(cursor, sign_sequence),
+            'raw_sentence': sentence
+        })
+    return entries
+
+
+class ExampleIndex:
+    """Immutable, pre-serialized index of every servable example video.
+
+    Built once at startup so that serving /random_video needs no file or
+    database I/O. Each example is stored as ready-to-send JSON bytes.
+
+    Signs without example videos are filtered out up front, and the remaining
+    (sign, example) pairs are sampled with weight 1/len(examples of that sign).
+    That gives the same distribution as "random sign, then random example"
+    with a single draw, so a request never has to retry.
+    """
+
+    def __init__(self, groups):
+        entries = []
+        weights = []
+        for group in groups:
+            if not group:
+                continue
+            entries.extend(group)
+            weights.extend([1.0 / len(group)] * len(group))
+        self._entries = tuple(entries)
+        self._cum_weights = tuple(itertools.accumulate(weights))
+        self.sign_count = sum(1 for group in groups if group)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entry(self, position):
+        """JSON bytes of one example"""
+        return self._entries[position]
+
+    def weights(self):
+        """Sampling weight of each example, in position order"""
+        return [b - a for a, b in zip(itertools.chain((0.0,), self._cum_weights), self._cum_weights)]
+
+    def choose(self, rng=random):
+        """Pick a weighted random example as JSON bytes"""
+        target = rng.random() * self._cum_weights[-1]
+        position = bisect.bisect_right(self._cum_weights, target)
+        return self._entries[min(position, len(self._entries) - 1)]
+
+    @classmethod
+    def build(cls, db_path=DB_PATH, matched_signs_path='matched_signs.json', top_n=TOP_SIGNS,
+              health_path=MEDIA_HEALTH_PATH):
+        """Load matched signs and the database into a new index"""
+        with open(matched_signs_path, 'r') as f:
+            matched_signs = json.load(f)
+        broken_urls = load_broken_urls(health_path)
+
+        conn = connect_readonly(db_path)
+        try:
+            require_prepared(conn)
+            cursor = conn.cursor()
+            groups = []
+            for item in matched_signs[:top_n]:
+                entries = _build_sign_examples(cursor, item, broken_urls)
+                # Serialize the same way jsonify does so responses are unchanged
+                groups.append([
+                    (json.dumps(entry, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+                    for entry in entries
+                ])
+        finally:
+            conn.close()
+
+        return cls(groups)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Compact, memory-mapped store of the /random_video examples.
+
+Every value an example response contains (glosses, sentences, URLs, numbers)
+is stored once as a JSON fragment in a shared string table. Examples and the
+signs in their sequences are fixed-width rows of indexes into that table.
+Responses are spliced together from the fragments without parsing or
+re-serializing, and come out byte-for-byte equal to ExampleIndex's.
+
+The file is opened with mmap, so gunicorn workers share one copy through the
+page cache rather than each holding parsed Python objects. Build it after
+prepare_db.py (the Dockerfile does):
+
+    python example_store.py
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+
+from db import DB_PATH, connect_readonly, require_prepared
+from example_index import TOP_SIGNS, ExampleIndex, _build_sign_examples
+from http_caching import content_version
+from media_health import MEDIA_HEALTH_PATH, broken_urls_version, load_broken_urls
+
+logger = logging.getLogger(__name__)
+
+EXAMPLE_STORE_PATH = 'examples.bin'
+
+MAGIC = b'NZEX'
+FORMAT_VERSION = 2
+
+# magic, format version, strings, examples, sequence signs, signs with
+# examples, then the sources it was built from: top_n and the content
+# versions of nzsl.db, matched_signs.json and the broken media URLs
+_HEADER = struct.Struct('<4sIIIIII16s16s16s')
+_SOURCE_VERSIONS = ('db', 'matched_signs', 'media_health')
+
+# Response keys in jsonify (sorted) order; sign_sequence is stored as a
+# (start, count) range of sequence rows instead of a string
+EXAMPLE_FIELDS = ('actual_gloss', 'common_word', 'confidence', 'definition_video_url',
+                  'english_translation', 'example_number', 'minor_meanings', 'rank',
+                  'raw_sentence', 'sign_sequence', 'video_type', 'video_url', 'word_id')
+SIGN_FIELDS = ('definition_video_url', 'gloss', 'id', 'minor_meanings', 'word')
+
+_SEQUENCE_COLUMN = EXAMPLE_FIELDS.index('sign_sequence')
+_EXAMPLE_WIDTH = len(EXAMPLE_FIELDS) + 1
+_SIGN_WIDTH = len(SIGN_FIELDS)
+
+# '{"key":' / ',"key":' prefixes that the fragments are spliced between
+_EXAMPLE_KEYS = [(b'{' if i == 0 else b',') + f'"{field}":'.encode() for i, field in enumerate(EXAMPLE_FIELDS)]
+_SIGN_KEYS = [(b'{' if i == 0 else b',') + f'"{field}":'.encode() for i, field in enumerate(SIGN_FIELDS)]
+
+
+def store_sources(db_path=DB_PATH, matched_signs_path='matched_signs.json', top_n=TOP_SIGNS,
+                  health_path=MEDIA_HEALTH_PATH):
+    """The inputs a store is built from; a store whose recorded sources differ is stale"""
+    return {
+        'top_n': top_n,
+        'db': content_version(db_path),
+        'matched_signs': content_version(matched_signs_path),
+        'media_health': broken_urls_version(load_broken_urls(health_path)),
+    }
+
+
+def _aligned(offset):
+    return (offset + 7) & ~7
+
+
+def write_example_store(path, groups, sources):
+    """Write per-sign groups of example dicts, built from sources, to a store file atomically"""
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(json.dumps(value), len(strings))
+
+    weights = []
+    example_rows = []
+    sequence_rows = []
+    for group in groups:
+        for entry in group:
+            if tuple(sorted(entry)) != EXAMPLE_FIELDS:
+                raise ValueError(f"Unexpected example fields: {sorted(entry)}")
+            row = [intern(entry[field]) for field in EXAMPLE_FIELDS]
+            row[_SEQUENCE_COLUMN] = len(sequence_rows) // _SIGN_WIDTH
+            row.append(len(entry['sign_sequence']))
+            example_rows.extend(row)
+            for sign in entry['sign_sequence']:
+                sequence_rows.extend(intern(sign[field]) for field in SIGN_FIELDS)
+            weights.append(1.0 / len(group))
+
+    blob = bytearray()
+    offsets = [0]
+    for fragment in strings:
+        blob += fragment.encode('utf-8')
+        offsets.append(len(blob))
+
+    sections = [
+        struct.pack(f'<{len(weights)}d', *itertools.accumulate(weights)),
+        struct.pack(f'<{len(offsets)}I', *offsets),
+        struct.pack(f'<{len(example_rows)}I', *example_rows),
+        struct.pack(f'<{len(sequence_rows)}I', *sequence_rows),
+        bytes(blob),
+    ]
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(strings), len(weights),
+                          len(sequence_rows) // _SIGN_WIDTH,
+                          sum(1 for group in groups if group), sources['top_n'],
+                          *(sources[name].encode('ascii') for name in _SOURCE_VERSIONS))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for section in sections:
+            f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+            f.write(section)
+    os.replace(tmp_path, path)
+
+
+class ExampleStore:
+    """Read-only view of a store file with the same interface as ExampleIndex"""
+
+    def __init__(self, path=EXAMPLE_STORE_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+
+        magic, format_version, string_count, example_count, sequence_count, sign_count, top_n, *versions = \
+            _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} example store")
+        self.sources = {'top_n': top_n}
+        for name, version in zip(_SOURCE_VERSIONS, versions):
+            self.sources[name] = version.rstrip(b'\0').decode('ascii')
+        self.sign_count = sign_count
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        sections = []
+        for count, width, code in ((example_count, 1, 'd'), (string_count + 1, 1, 'I'),
+                                   (example_count, _EXAMPLE_WIDTH, 'I'),
+                                   (sequence_count, _SIGN_WIDTH, 'I')):
+            offset = _aligned(offset)
+            size = count * width * struct.calcsize(code)
+            if offset + size > len(self._mmap):
+                raise ValueError(f"{path} is truncated")
+            sections.append(view[offset:offset + size].cast(code))
+            offset += size
+        self._cum_weights, self._offsets, self._examples, self._sequence = sections
+        self._blob = _aligned(offset)
+        if self._blob + self._offsets[-1] > len(self._mmap):
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return len(self._cum_weights)
+
+    def _fragment(self, index):
+        offsets = self._offsets
+        return self._mmap[self._blob + offsets[index]:self._blob + offsets[index + 1]]
+
+    def _sign(self, row):
+        base = row * _SIGN_WIDTH
+        parts = []
+        for key, index in zip(_SIGN_KEYS, self._sequence[base:base + _SIGN_WIDTH]):
+            parts.append(key)
+            parts.append(self._fragment(index))
+        parts.append(b'}')
+        return b''.join(parts)
+
+    def entry(self, position):
+        """JSON bytes of one example, as jsonify would render it"""
+        base = position * _EXAMPLE_WIDTH
+        row = self._examples[base:base + _EXAMPLE_WIDTH].tolist()
+        parts = []
+        for column, key in enumerate(_EXAMPLE_KEYS):
+            parts.append(key)
+            if column == _SEQUENCE_COLUMN:
+                start = row[column]
+                parts.append(b'[' + b','.join(map(self._sign, range(start, start + row[-1]))) + b']')
+            else:
+                parts.append(self._fragment(row[column]))
+        parts.append(b'}\n')
+        return b''.join(parts)
+
+    def weights(self):
+        """Sampling weight of each example, in position order"""
+        cum_weights = self._cum_weights.tolist()
+        return [b - a for a, b in zip(itertools.chain((0.0,), cum_weights), cum_weights)]
+
+    def choose(self, rng=random):
+        """Pick a weighted random example as JSON bytes"""
+        target = rng.random() * self._cum_weights[-1]
+        position = bisect.bisect_right(self._cum_weights, target)
+        return self.entry(min(position, len(self) - 1))
+
+
+def load_examples(path=EXAMPLE_STORE_PATH):
+    """Open the example store if it is up to date, else build an ExampleIndex from nzsl.db.
+
+    A store is current when the inputs recorded in it match the files now on
+    disk. The top_n it was built with is kept, so a store built with
+    build_datasets.py --top-n is neither judged stale nor rebuilt smaller.
+    """
+    top_n = TOP_SIGNS
+    if os.path.exists(path):
+        try:
+            store = ExampleStore(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error("Can't read %s (%s); building the example index from nzsl.db instead", path, e)
+        else:
+            top_n = store.sources['top_n']
+            current = store_sources(top_n=top_n)
+            if store.sources == current:
+                return store
+            changed = ', '.join(name for name in current if store.sources[name] != current[name])
+            logger.warning("%s is out of date (%s changed); building the example index from nzsl.db instead",
+                           path, changed)
+    return ExampleIndex.build(top_n=top_n)
+
+
+def build_groups(db_path=DB_PATH, matched_signs_path='matched_signs.json', top_n=TOP_SIGNS,
+                 health_path=MEDIA_HEALTH_PATH):
+    """Example dicts of the top-N matched signs, one group per sign, without broken videos"""
+    with open(matched_signs_path, 'r') as f:
+        matched_signs = json.load(f)
+    broken_urls = load_broken_urls(health_path)
+
+    conn = connect_readonly(db_path)
+    try:
+        require_prepared(conn)
+        cursor = conn.cursor()
+        return [_build_sign_examples(cursor, item, broken_urls) for item in matched_signs[:top_n]]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the memory-mapped /random_video example store')
+    parser.add_argument('--db', default=DB_PATH, help='Path to a prepared nzsl.db')
+    parser.add_argument('--matched-signs', default='matched_signs.json')
+    parser.add_argument('--media-health', default=MEDIA_HEALTH_PATH, help='Broken URLs from media_health.py')
+    parser.add_argument('--output', default=EXAMPLE_STORE_PATH)
+    args = parser.parse_args()
+
+    groups = build_groups(args.db, args.matched_signs, health_path=args.media_health)
+    write_example_store(args.output, groups,
+                        store_sources(args.db, args.matched_signs, health_path=args.media_health))
+    store = ExampleStore(args.output)
+    print(f"Wrote {len(store)} examples for {store.sign_count} signs to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
 import json
-import sqlite3
 import re
 
+from db import connect_readonly
+
 def parse_sign_sequence(sentence):
     """Extract sign IDs from sentence notation like 'clothes[1523] plenty[3721]'"""
     # Find all patterns like word[id]
@@ -20,7 +21,7 @@ def main():
     sign_id_to_common = {item['sign_id']: item for item in matched_signs}
     
     # Connect to database
-    conn = sqlite3.connect('nzsl.db')
+    conn = connect_readonly()
     cursor = conn.cursor()
     
     video_data = []
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
 import json
-import sqlite3
 import re
 
+from db import connect_readonly, require_prepared
+from sign_definitions import enhance_sign_sequence, lookup_sign_definitions
+
 def parse_sign_sequence(sentence):
     """Extract sign IDs from sentence notation like 'clothes[1523] plenty[3721]'"""
     if not sentence:
@@ -22,7 +24,8 @@ def main():
     sign_id_to_common = {item['sign_id']: item for item in matched_signs}
     
     # Connect to database
-    conn = sqlite3.connect('nzsl.db')
+    conn = connect_readonly()
+    require_prepared(conn)
     cursor = conn.cursor()
     
     video_data = []
@@ -32,15 +35,7 @@ def main():
         sign_id = item['sign_id']
         
         # Get the actual word definition and definition video URL from the database
-        cursor.execute("""
-            SELECT w.gloss, w.minor, v.url 
-            FROM words w
-            LEFT JOIN videos v ON w.id = v.word_id AND v.video_type = 'main' AND v.url LIKE '%.mp4'
-            WHERE w.id = ?
-            LIMIT 1
-        """, (sign_id,))
-        
-        word_data = cursor.fetchone()
+        word_data = lookup_sign_definitions(cursor, [sign_id])[str(sign_id)]
         if word_data:
             actual_gloss, minor_meanings, definition_video_url = word_data
         else:
@@ -77,36 +72,8 @@ def main():
                 translation = f"Example for {item['common_word']}"
                 sign_sequence = []
             
-            # Enhance sign sequence with definition video URLs
-            enhanced_sign_sequence = []
-            for sign in sign_sequence:
-                # Get definition video URL for each sign in the sequence
-                cursor.execute("""
-                    SELECT w.gloss, w.minor, v.url 
-                    FROM words w
-                    INNER JOIN videos v ON w.id = v.word_id AND v.video_type = 'main' AND v.url LIKE '%.mp4'
-                    WHERE w.id = ?
-                    LIMIT 1
-                """, (str(sign['id']),))
-                
-                sign_data = cursor.fetchone()
-                if sign_data:
-                    enhanced_sign = {
-                        'word': sign['word'],
-                        'id': sign['id'],
-                        'gloss': sign_data[0],
-                        'minor_meanings': sign_data[1] or '',
-                        'definition_video_url': sign_data[2]
-                    }
-                else:
-                    enhanced_sign = {
-                        'word': sign['word'],
-                        'id': sign['id'],
-                        'gloss': sign['word'],
-                        'minor_meanings': '',
-                        'definition_video_url': None
-                    }
-                enhanced_sign_sequence.append(enhanced_sign)
+            # Enhance sign sequence with definition video URLs (one batched lookup)
+            enhanced_sign_sequence = enhance_sign_sequence(cursor, sign_sequence)
 
             video_entry = {
                 'word_id': word_id,
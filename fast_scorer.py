@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import re
+import threading
+from collections import Counter
+
+from normalize import normalize_translation
+
+# Equivalent phrasings, from the examples given to Claude in the scoring
+# prompt. Each phrase is rewritten to the first entry of its group, whatever
+# the context, so only phrasings that mean the same in every sentence belong
+# here: "phone"/"call"/"ring" do not ("my ring", "what do you call this"),
+# and are left for Claude to judge.
+SYNONYM_GROUPS = [
+    ['burglar', 'intruder'],
+    ['neighbour', 'neighbor'],
+    ['neighbours', 'neighbors'],
+    ['arrived home', 'got home', 'came home'],
+    ['arrive home', 'get home', 'come home'],
+]
+
+# Contractions as they look after normalize_translation drops apostrophes.
+# Ones that become real words that way ("ill", "id", "lets") are left out.
+CONTRACTIONS = {
+    'im': 'i am', 'ive': 'i have',
+    'youre': 'you are', 'youve': 'you have', 'theyre': 'they are', 'weve': 'we have',
+    'dont': 'do not', 'doesnt': 'does not', 'didnt': 'did not', 'cant': 'can not',
+    'cannot': 'can not', 'wont': 'will not', 'isnt': 'is not', 'arent': 'are not',
+    'wasnt': 'was not', 'werent': 'were not', 'havent': 'have not', 'hasnt': 'has not',
+    'couldnt': 'could not', 'shouldnt': 'should not', 'wouldnt': 'would not',
+    'thats': 'that is', 'theres': 'there is', 'whats': 'what is',
+}
+
+# Words that can differ without changing the meaning of a translation
+STOPWORDS = {'a', 'an', 'the'}
+
+NEGATIONS = {'not', 'no', 'never', 'nothing', 'nobody', 'none'}
+
+# Share of tokens (F1 over the whole token multiset) that must agree
+MIN_TOKEN_OVERLAP = 0.8
+
+PERFECT_FEEDBACK = ("Perfect interpretation! You nailed it - your interpretation matches "
+                    "the official translation.")
+EXCELLENT_FEEDBACK = ("Excellent work! You captured all of the meaning; only small words "
+                      "like \"{words}\" differ from the official translation.")
+
+
+def _build_phrase_pattern():
+    replacements = {}
+    for group in SYNONYM_GROUPS:
+        for phrase in group[1:]:
+            replacements[phrase] = group[0]
+    replacements.update(CONTRACTIONS)
+    # Longest phrases first so "came home" wins over any single word
+    phrases = sorted(replacements, key=len, reverse=True)
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(phrase) for phrase in phrases) + r')\b')
+    return pattern, replacements
+
+
+_PHRASE_PATTERN, _REPLACEMENTS = _build_phrase_pattern()
+
+
+def canonical_tokens(text):
+    """Normalized, synonym- and contraction-folded tokens of a translation"""
+    text = normalize_translation(text)
+    text = _PHRASE_PATTERN.sub(lambda m: _REPLACEMENTS[m.group(1)], text)
+    return text.split()
+
+
+def token_overlap(a, b):
+    """F1 of two token multisets"""
+    common = sum((Counter(a) & Counter(b)).values())
+    if not common:
+        return 0.0
+    precision = common / len(b)
+    recall = common / len(a)
+    return 2 * precision * recall / (precision + recall)
+
+
+def fast_score(original_translation, user_translation):
+    """Score an interpretation locally when it is clearly (near-)exact.
+
+    Returns a {score, feedback} dict, or None when the case is ambiguous and
+    should go to Claude. Only answers whose content words all match the
+    official translation are scored here.
+    """
+    original = canonical_tokens(original_translation)
+    user = canonical_tokens(user_translation)
+    if not original or not user:
+        return None
+
+    if user == original:
+        return {'score': 10.0, 'feedback': PERFECT_FEEDBACK}
+
+    # A dropped or added "not" flips the meaning however close the rest is
+    if bool(NEGATIONS & set(original)) != bool(NEGATIONS & set(user)):
+        return None
+
+    # Content words must match in order ("dog bit man" is not "man bit dog")
+    original_content = [token for token in original if token not in STOPWORDS]
+    user_content = [token for token in user if token not in STOPWORDS]
+    if original_content != user_content or token_overlap(original, user) < MIN_TOKEN_OVERLAP:
+        return None
+
+    differing = sorted(set(original) ^ set(user))
+    if not differing:
+        # Only a repeated filler word differs
+        return {'score': 10.0, 'feedback': PERFECT_FEEDBACK}
+    return {'score': 9.0, 'feedback': EXCELLENT_FEEDBACK.format(words='", "'.join(differing))}
+
+
+class FastPathStats:
+    """Counts how often the local scorer lets a request skip Claude"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.bypassed = 0
+
+    def record(self, bypassed):
+        with self._lock:
+            self.checked += 1
+            if bypassed:
+                self.bypassed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'bypassed': self.bypassed,
+                'bypass_rate': round(self.bypassed / self.checked, 3) if self.checked else 0.0
+            }
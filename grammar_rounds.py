@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import heapq
+import math
+import random
+import re
+from collections import Counter, defaultdict
+from itertools import permutations
+
+from example_index import parse_sign_sequence
+
+# Rounds one seed can deal; small next to the sentence count, so a game's
+# rounds are sampled without copying or shuffling the whole population
+MAX_GAME_ROUNDS = 50
+DEFAULT_ROUNDS_PAGE = 4
+MAX_ROUNDS_PAGE = 20
+
+# Distractor glosses added to each word bank, by difficulty
+DISTRACTOR_COUNTS = {'easy': 1, 'medium': 2, 'hard': 3}
+DEFAULT_DISTRACTORS = 2
+MAX_DISTRACTORS = 4
+
+# Co-occurring signs kept per sign, and distractor candidates per sentence
+SIGN_NEIGHBOURS = 8
+SENTENCE_CANDIDATES = 8
+
+
+def sentence_tokens(nzsl):
+    """Word bank tokens of a gloss sentence, as the grammar game parses them"""
+    return [word if word.startswith('^') else re.sub(r'\[\d+\]', '', word, count=1) for word in nzsl.split(' ')]
+
+
+def build_distractor_sets(sentences):
+    """Candidate distractor glosses for each sentence, best first.
+
+    Signs that often appear in the same sentences as a sentence's signs are
+    plausible in its context, so they make convincing wrong answers. Each
+    sign's neighbours are ranked by co-occurrences over the square root of
+    their frequency, so the commonest signs (me, you, he) don't dominate
+    every word bank.
+    """
+    sequences = []
+    words = defaultdict(Counter)
+    for sentence in sentences:
+        signs = parse_sign_sequence(sentence['nzsl'])
+        for sign in signs:
+            words[sign['id']][sign['word']] += 1
+        sequences.append({sign['id'] for sign in signs})
+    frequency = Counter(sign_id for sign_ids in sequences for sign_id in sign_ids)
+    co_occurrences = defaultdict(Counter)
+    for sign_ids in sequences:
+        for a, b in permutations(sign_ids, 2):
+            co_occurrences[a][b] += 1
+
+    weight = {sign_id: 1 / math.sqrt(count) for sign_id, count in frequency.items()}
+    neighbours = {
+        sign_id: heapq.nsmallest(SIGN_NEIGHBOURS, counts, key=lambda other: (-counts[other] * weight[other], other))
+        for sign_id, counts in co_occurrences.items()
+    }
+    # Each sign's commonest spelling in the notation is its token
+    gloss = {sign_id: counts.most_common(1)[0][0] for sign_id, counts in words.items()}
+
+    distractor_sets = []
+    for sentence, sign_ids in zip(sentences, sequences):
+        # A candidate scores by how many of the sentence's signs it neighbours,
+        # and how closely
+        scores = Counter()
+        for sign_id in sign_ids:
+            for position, other in enumerate(neighbours.get(sign_id, ())):
+                if other not in sign_ids:
+                    scores[other] += SIGN_NEIGHBOURS - position
+        answer = set(sentence_tokens(sentence['nzsl']))
+        candidates = []
+        for other, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+            if gloss[other] not in answer and gloss[other] not in candidates:
+                candidates.append(gloss[other])
+                if len(candidates) == SENTENCE_CANDIDATES:
+                    break
+        distractor_sets.append(tuple(candidates))
+    return distractor_sets
+
+
+class GrammarRounds:
+    """Ready-made grammar game rounds: a sentence plus a shuffled word bank.
+
+    Distractor candidates for every sentence are precomputed at startup, so
+    dealing a round is a seeded sample of sentence positions, a pick from the
+    sentence's candidates and a shuffle of a handful of tokens.
+    """
+
+    def __init__(self, sentences):
+        self.sentences = sentences
+        self._distractors = build_distractor_sets([sentences.sentence(position) for position in range(len(sentences))])
+
+    def round(self, seed, position, distractors):
+        """One round: the sentence with its distractors and shuffled tokens"""
+        sentence = self.sentences.sentence(position)
+        rng = random.Random(f'{seed}:{position}')
+        # Mostly the strongest candidates, with some variety between games
+        candidates = self._distractors[position]
+        chosen = rng.sample(candidates[:distractors * 2], min(distractors, len(candidates)))
+        tokens = sentence_tokens(sentence['nzsl']) + chosen
+        rng.shuffle(tokens)
+        return dict(sentence, distractors=chosen, tokens=tokens)
+
+    def page(self, seed, offset=0, limit=DEFAULT_ROUNDS_PAGE, min_length=1, max_length=None,
+             distractors=DEFAULT_DISTRACTORS):
+        """Return (rounds, total rounds) for one page of a seeded game"""
+        positions, total = self.sentences.sample(seed, offset, limit, min_length, max_length, MAX_GAME_ROUNDS)
+        return [self.round(seed, position, distractors) for position in positions], total
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import functools
+import json
+import os
+import random
+
+GAME_DATA_PATH = os.path.join('NZSLGrammar', 'game_data.js')
+
+# Sentence length in signs for each difficulty; None means no upper bound
+DIFFICULTY_LENGTHS = {
+    'easy': (1, 4),
+    'medium': (5, 7),
+    'hard': (8, None),
+}
+
+
+def load_game_data(path=GAME_DATA_PATH):
+    """Read the sentence list out of the game_data.js literal"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    return json.loads(source[source.index('['):source.rindex(']') + 1])
+
+
+def sentence_length(nzsl):
+    """Number of signs in a gloss sentence"""
+    return len(nzsl.split())
+
+
+class GrammarSentences:
+    """Grammar game sentences with seeded, filtered samples of them.
+
+    A game picks a random seed and pages through one fixed sample of the
+    sentences matching its filters, so every page of a game is a cacheable
+    GET and pages never repeat a sentence.
+    """
+
+    def __init__(self, sentences):
+        self._sentences = tuple(sentences)
+        self._lengths = tuple(sentence_length(sentence['nzsl']) for sentence in self._sentences)
+        self._population = functools.lru_cache(maxsize=16)(self._matching)
+
+    def __len__(self):
+        return len(self._sentences)
+
+    def sentence(self, position):
+        return self._sentences[position]
+
+    def _matching(self, min_length, max_length):
+        return tuple(position for position, length in enumerate(self._lengths)
+                     if length >= min_length and (max_length is None or length <= max_length))
+
+    def sample(self, seed, offset, limit, min_length=1, max_length=None, count=None):
+        """Return (positions, total) for one page of a seeded sample of count sentences.
+
+        Only the sampled positions are drawn: nothing the size of the whole
+        sentence list is copied or shuffled per seed.
+        """
+        population = self._population(min_length, max_length)
+        total = len(population) if count is None else min(count, len(population))
+        # Always the same sample size for a seed, so every page agrees
+        order = random.Random(seed).sample(population, total)
+        return order[offset:offset + limit], total
+
+    @classmethod
+    def load(cls, path=GAME_DATA_PATH, broken_urls=frozenset()):
+        """Load game_data.js, leaving out sentences whose video is broken"""
+        return cls(sentence for sentence in load_game_data(path) if sentence['video'] not in broken_urls)
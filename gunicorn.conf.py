@@ -0,0 +1,15 @@
+# Gunicorn settings for the production container (gunicorn -c gunicorn.conf.py app:app)
+
+bind = '0.0.0.0:5000'
+workers = 2
+timeout = 60
+
+# Build the example index once in the master and share it with the workers
+preload_app = True
+
+# Threaded workers: scoring requests wait on the bounded Claude pool in
+# scoring.py, which never takes more than SCORING_MAX_IN_FLIGHT +
+# SCORING_MAX_QUEUED threads, so the rest keep serving static files and
+# /random_video while Claude is slow
+worker_class = 'gthread'
+threads = 16
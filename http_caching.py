@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import gzip
+import hashlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Cacheable API responses are tied to the nzsl.db version via their ETag, so a
+# day of freshness is safe; a rebuilt database changes every ETag.
+API_CACHE_CONTROL = 'public, max-age=86400'
+
+# Bodies smaller than this go uncompressed; the saving doesn't cover the cost
+MIN_COMPRESS_SIZE = 1024
+
+# Each encoding is its own representation, so it gets its own strong ETag
+ENCODING_ETAG_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+
+
+def content_version(path, chunk_size=1024 * 1024):
+    """Short hash of a file's contents, used to version cached responses"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def make_etag(version, *parts):
+    """Strong ETag for a response derived from a content version"""
+    digest = hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8'))
+    return f'{version}-{digest.hexdigest()[:12]}'
+
+
+def is_not_modified(etag):
+    """Whether the client's If-None-Match already covers this ETag"""
+    return request.if_none_match.contains(etag)
+
+
+def set_cache_headers(response, etag, cache_control=API_CACHE_CONTROL):
+    """Attach validator and freshness headers to a cacheable response"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def negotiate_encoding(available=None):
+    """Best content coding the client accepts among those available: 'br', 'gzip' or None"""
+    if available is None:
+        available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    """Encode a response body with the given content coding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def cacheable_response(body, etag, mimetype='application/json', cache_control=API_CACHE_CONTROL):
+    """Compressed response with validators, or a 304 if the client is current"""
+    encoding = negotiate_encoding() if len(body) >= MIN_COMPRESS_SIZE else None
+    if encoding:
+        etag = f'{etag}-{ENCODING_ETAG_SUFFIXES[encoding]}'
+
+    if is_not_modified(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(compress(body, encoding) if encoding else body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return set_cache_headers(response, etag, cache_control)
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
-import sqlite3
+import os
 import re
+from collections import Counter, defaultdict
 from difflib import SequenceMatcher
+from itertools import repeat
+from multiprocessing import Pool
+
+from db import connect_readonly
 
 def similarity(a, b):
     """Calculate similarity between two strings"""
@@ -21,39 +27,163 @@ def normalize_word(word):
     normalized = re.sub(r'^mime-', '', normalized) # Remove mime markers
     return normalized.strip()
 
-def find_best_match(target_word, db_words):
-    """Find the best matching word in database"""
-    normalized_target = normalize_word(target_word)
-    best_match = None
-    best_score = 0
-    
-    for word_id, gloss, minor in db_words:
-        # Check main gloss
-        gloss_words = [w.strip() for w in gloss.split(',')]
-        for gloss_word in gloss_words:
-            score = similarity(normalized_target, normalize_word(gloss_word))
-            if score > best_score:
-                best_score = score
-                best_match = (word_id, gloss_word, score, 'gloss')
-        
-        # Check minor meanings if they exist
-        if minor:
-            minor_words = [w.strip() for w in minor.split(',')]
-            for minor_word in minor_words:
-                score = similarity(normalized_target, normalize_word(minor_word))
-                if score > best_score:
-                    best_score = score
-                    best_match = (word_id, minor_word, score, 'minor')
-    
-    return best_match
+# Candidates sharing the most trigrams with a word are scored first, so the
+# exact sweep below starts from a good best score and can prune early
+TRIGRAM_SHORTLIST = 20
+
+
+def trigrams(text):
+    """Set of character trigrams of a padded word"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GlossMatcher:
+    """Finds the best matching dictionary gloss for a word.
+
+    The dictionary is normalized once, and each distinct normalized gloss is kept
+    at its first position. That position is the one the original full
+    scan would have picked on a tie. A trigram index picks a shortlist to score
+    first. Every remaining candidate is then ruled out by SequenceMatcher's
+    length and character-count upper bounds, or scored in full. So the
+    result is exactly what a full scan of every gloss returns.
+    """
+
+    def __init__(self, db_words):
+        self.candidates = []  # (normalized, word_id, raw word, source)
+        positions = {}
+        for word_id, gloss, minor in db_words:
+            entries = [(w.strip(), 'gloss') for w in gloss.split(',')]
+            if minor:
+                entries += [(w.strip(), 'minor') for w in minor.split(',')]
+            for raw, source in entries:
+                normalized = normalize_word(raw)
+                if normalized not in positions:
+                    positions[normalized] = len(self.candidates)
+                    self.candidates.append((normalized, word_id, raw, source))
+        self.positions = positions
+
+        # SequenceMatcher caches its analysis of the second sequence
+        self.matchers = []
+        self.by_length = defaultdict(list)
+        self.trigram_index = defaultdict(list)
+        for position, (normalized, *_) in enumerate(self.candidates):
+            matcher = SequenceMatcher(None)
+            matcher.set_seq2(normalized)
+            self.matchers.append(matcher)
+            self.by_length[len(normalized)].append(position)
+            for gram in trigrams(normalized):
+                self.trigram_index[gram].append(position)
+
+        # Per length, one column of counts per character, so the quick_ratio
+        # bound for a whole length bucket is a few C-level passes
+        self.char_columns = {}
+        for length, bucket in self.by_length.items():
+            counts = [Counter(self.candidates[position][0]) for position in bucket]
+            chars = set().union(*counts)
+            self.char_columns[length] = {char: [c[char] for c in counts] for char in chars}
+
+    def _ratio(self, target, position):
+        matcher = self.matchers[position]
+        matcher.set_seq1(target)
+        return matcher.ratio()
+
+    def best_match(self, target_word):
+        """Return (word_id, matched word, score, source), or None"""
+        target = normalize_word(target_word)
+
+        # Identical strings are the only way to score 1.0
+        position = self.positions.get(target)
+        if position is not None:
+            return self._result(position, 1.0)
+
+        best_score, best_position = 0.0, len(self.candidates)
+
+        def consider(position):
+            nonlocal best_score, best_position
+            score = self._ratio(target, position)
+            if score > best_score or (score == best_score and score > 0 and position < best_position):
+                best_score, best_position = score, position
+
+        shared = Counter()
+        for gram in trigrams(target):
+            shared.update(self.trigram_index.get(gram, ()))
+        shortlist = [position for position, _ in shared.most_common(TRIGRAM_SHORTLIST)]
+        for position in shortlist:
+            consider(position)
+        scored = set(shortlist)
+
+        target_length = len(target)
+        target_counts = Counter(target)
+        # real_quick_ratio bound per length, best first
+        lengths = sorted(self.by_length, key=lambda n: self._bound(min(n, target_length), n, target_length),
+                         reverse=True)
+        for length in lengths:
+            if self._bound(min(length, target_length), length, target_length) < best_score:
+                break
+            bucket = self.by_length[length]
+            columns = self.char_columns[length]
+            # quick_ratio bound: size of the character multiset intersection
+            parts = [map(min, repeat(n), columns[char]) for char, n in target_counts.items() if char in columns]
+            common = list(map(sum, zip(*parts))) if parts else [0] * len(bucket)
+            # Highest bound first; the sort is stable, so ties stay in position order
+            for index in sorted(range(len(bucket)), key=common.__getitem__, reverse=True):
+                bound = self._bound(common[index], length, target_length)
+                if bound == 0 or bound < best_score:
+                    break
+                position = bucket[index]
+                if position in scored or (bound == best_score and position > best_position):
+                    continue
+                consider(position)
+
+        if best_score == 0:
+            return None
+        return self._result(best_position, best_score)
+
+    @staticmethod
+    def _bound(matches, length, target_length):
+        total = length + target_length
+        return 2.0 * matches / total if total else 1.0
+
+    def _result(self, position, score):
+        _, word_id, raw, source = self.candidates[position]
+        return (word_id, raw, score, source)
+
+
+_matcher = None
+
+
+def _init_worker(db_words):
+    global _matcher
+    _matcher = GlossMatcher(db_words)
+
+
+def _match_word(word):
+    return _matcher.best_match(word)
+
+
+def match_words(words, db_words, workers=None):
+    """Best match for each word, in order, spread over worker processes"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(words) < 100:
+        matcher = GlossMatcher(db_words)
+        return [matcher.best_match(word) for word in words]
+    with Pool(workers, initializer=_init_worker, initargs=(db_words,)) as pool:
+        return pool.map(_match_word, words, chunksize=max(1, len(words) // (workers * 8)))
 
 def main():
+    parser = argparse.ArgumentParser(description='Match common English words to NZSL signs')
+    parser.add_argument('--words', default='words.json', help='JSON list of words, most common first')
+    parser.add_argument('--output', default='matched_signs.json')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    args = parser.parse_args()
+
     # Load common words
-    with open('words.json', 'r') as f:
+    with open(args.words, 'r') as f:
         common_words = json.load(f)
     
     # Connect to database
-    conn = sqlite3.connect('nzsl.db')
+    conn = connect_readonly()
     cursor = conn.cursor()
     
     # Get all words from database
@@ -62,8 +192,8 @@ def main():
     
     # Match each common word
     results = []
-    for index, word in enumerate(common_words):
-        match = find_best_match(word, db_words)
+    matches = match_words(common_words, db_words, args.workers)
+    for index, (word, match) in enumerate(zip(common_words, matches)):
         if match:
             word_id, matched_word, score, source = match
             results.append({
@@ -87,7 +217,7 @@ def main():
             print(f"{index+1:3}. {word:20} -> NO MATCH FOUND")
     
     # Save results
-    with open('matched_signs.json', 'w') as f:
+    with open(args.output, 'w') as f:
         json.dump(results, f, indent=2)
     
     # Print summary
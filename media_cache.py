@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Optional caching proxy for the sign videos.
+
+With MEDIA_PROXY=1 the app points the media URLs in its responses at
+/media/<path> and serves them from a bounded on-disk cache, fetching misses
+from MEDIA_ORIGIN. Cached files are served with send_file, so Range and
+conditional requests work and gunicorn sends whole files with sendfile.
+
+Each cached video is a file named by a hash of its path, next to a JSON
+file holding its ETag, Last-Modified and type. A file's mtime is its last
+use; when the cache grows past MEDIA_CACHE_MAX_MB the least recently used
+are deleted. The cache lives on disk only, so every gunicorn worker shares
+it. Entries older than MEDIA_REVALIDATE_AFTER are revalidated against the
+origin with a conditional request, and served stale if it is unreachable.
+
+Warm the cache with the videos of the top-ranked signs ahead of time:
+
+    python media_cache.py --warm 100
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from flask import send_file
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MEDIA_PROXY_ENABLED = os.getenv('MEDIA_PROXY', '').lower() in ('1', 'true', 'yes')
+
+# Prefix of the media URLs in nzsl.db and game_data.js
+MEDIA_URL_PREFIX = os.getenv('MEDIA_URL_PREFIX', 'https://nzsl-signbank-media-production.s3.amazonaws.com/')
+# Where misses are fetched from; point it at a local stand-in for testing
+MEDIA_ORIGIN = os.getenv('MEDIA_ORIGIN', MEDIA_URL_PREFIX)
+
+MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR', '.media_cache')
+MEDIA_CACHE_MAX_BYTES = int(float(os.getenv('MEDIA_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+MEDIA_REVALIDATE_AFTER = float(os.getenv('MEDIA_REVALIDATE_AFTER', str(7 * 24 * 3600)))
+
+PROXY_PATH = '/media/'
+
+# Browsers may keep a video a week before revalidating it
+MEDIA_CACHE_CONTROL_MAX_AGE = 7 * 24 * 3600
+
+ORIGIN_TIMEOUT = 20
+# Sign videos are a few MB at most; anything far larger isn't one
+MAX_MEDIA_BYTES = 64 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+
+# A hit refreshes its file's mtime at most this often
+TOUCH_INTERVAL = 60
+# Eviction frees down to this fraction of the limit, so it doesn't run on
+# every insert once the cache is full
+EVICT_TO = 0.9
+
+# Video paths only: no empty, . or .. segments
+_MEDIA_KEY = re.compile(r'^(?:[A-Za-z0-9_~%+\-][A-Za-z0-9._~%+\-]*/)*[A-Za-z0-9_~%+\-][A-Za-z0-9._~%+\-]*\.(?:mp4|webm)$')
+
+_PROXY_PREFIX_BYTES = MEDIA_URL_PREFIX.encode('utf-8')
+
+
+def is_media_key(key):
+    return bool(_MEDIA_KEY.match(key)) and '..' not in key
+
+
+def proxy_url(url):
+    """A media URL pointed at the proxy; other URLs are unchanged"""
+    if url and url.startswith(MEDIA_URL_PREFIX):
+        return PROXY_PATH + url[len(MEDIA_URL_PREFIX):]
+    return url
+
+
+def proxy_urls(body):
+    """Every media URL in a JSON body pointed at the proxy"""
+    return body.replace(_PROXY_PREFIX_BYTES, PROXY_PATH.encode('ascii'))
+
+
+class MediaUnavailable(Exception):
+    """Raised when a video can't be fetched; carries the status to answer with"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class MediaCache:
+    """Bounded on-disk LRU cache of origin videos"""
+
+    def __init__(self, directory=MEDIA_CACHE_DIR, origin=MEDIA_ORIGIN, max_bytes=MEDIA_CACHE_MAX_BYTES,
+                 revalidate_after=MEDIA_REVALIDATE_AFTER):
+        self.directory = os.path.abspath(directory)
+        self.origin = origin.rstrip('/') + '/'
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest() + os.path.splitext(key)[1]
+        path = os.path.join(self.directory, name)
+        return path, path + '.json'
+
+    def _key_lock(self, key):
+        # One fetch per key at a time in this worker; other workers may race
+        # it, which only costs a duplicate download
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def lookup(self, key):
+        """(path, metadata) of a cached video, or None"""
+        path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            os.stat(path)
+        except (OSError, ValueError):
+            return None
+        return path, meta
+
+    def _touch(self, path):
+        try:
+            if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def _fresh(self, meta):
+        return time.time() - meta['fetched_at'] < self.revalidate_after
+
+    def get(self, key):
+        """Local (path, metadata) of a video, fetching or revalidating it first if needed"""
+        entry = self.lookup(key)
+        if entry and self._fresh(entry[1]):
+            metrics.CACHE_REQUESTS.inc(cache='media', result='hit')
+            self._touch(entry[0])
+            return entry
+
+        with self._key_lock(key):
+            # Another thread may have fetched it while this one waited
+            entry = self.lookup(key)
+            if entry and self._fresh(entry[1]):
+                metrics.CACHE_REQUESTS.inc(cache='media', result='hit')
+                return entry
+            try:
+                return self._fetch(key, entry)
+            except MediaUnavailable as e:
+                if entry and e.status != 404:
+                    logger.warning("Serving stale %s: %s", key, e)
+                    metrics.CACHE_REQUESTS.inc(cache='media', result='stale')
+                    return entry
+                raise
+
+    def _fetch(self, key, stale=None):
+        """Download a video from the origin, or revalidate a stale copy"""
+        path, meta_path = self._paths(key)
+        request = urllib.request.Request(self.origin + key)
+        if stale:
+            if stale[1].get('origin_etag'):
+                request.add_header('If-None-Match', stale[1]['origin_etag'])
+            if stale[1].get('origin_last_modified'):
+                request.add_header('If-Modified-Since', stale[1]['origin_last_modified'])
+
+        try:
+            response = urllib.request.urlopen(request, timeout=ORIGIN_TIMEOUT)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and stale:
+                meta = dict(stale[1], fetched_at=time.time())
+                self._write_meta(meta_path, meta)
+                os.utime(path)
+                metrics.CACHE_REQUESTS.inc(cache='media', result='revalidated')
+                return path, meta
+            raise MediaUnavailable(f"Origin answered {e.code} for {key}", 404 if e.code in (403, 404) else 502)
+        except (urllib.error.URLError, OSError) as e:
+            raise MediaUnavailable(f"Origin unreachable for {key}: {e}", 502)
+
+        metrics.CACHE_REQUESTS.inc(cache='media', result='miss')
+        digest = hashlib.sha1()
+        size = 0
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+        try:
+            with response, open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if size > MAX_MEDIA_BYTES:
+                        raise MediaUnavailable(f"{key} is larger than {MAX_MEDIA_BYTES} bytes", 502)
+                    digest.update(chunk)
+                    f.write(chunk)
+            origin_last_modified = response.headers.get('Last-Modified')
+            try:
+                last_modified = parsedate_to_datetime(origin_last_modified).timestamp()
+            except (TypeError, ValueError):
+                last_modified = time.time()
+            meta = {
+                'key': key,
+                'size': size,
+                'content_type': (response.headers.get_content_type() if response.headers.get('Content-Type')
+                                 else mimetypes.guess_type(key)[0] or 'application/octet-stream'),
+                # Our own validator, so it stays strong whatever the origin sends
+                'etag': digest.hexdigest()[:20],
+                'last_modified': last_modified,
+                'origin_etag': response.headers.get('ETag'),
+                'origin_last_modified': origin_last_modified,
+                'fetched_at': time.time(),
+            }
+            # The video lands before its metadata, so a lookup never finds one without the other
+            os.replace(tmp_path, path)
+            self._write_meta(meta_path, meta)
+        except (OSError, urllib.error.URLError) as e:
+            raise MediaUnavailable(f"Downloading {key} failed: {e}", 502)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.evict()
+        return path, meta
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = f'{meta_path}.{os.getpid()}.{threading.get_ident()}.part'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def usage(self):
+        """[(last used, size, path)] of every cached video"""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(('.json', '.part')):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used videos until the cache is within its limit"""
+        entries = self.usage()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            # Metadata first, so the video is never listed without its file
+            for victim in (path + '.json', path):
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def response(self, key):
+        """Flask response serving a video from the cache, with Range and conditional support"""
+        for _ in range(2):
+            path, meta = self.get(key)
+            try:
+                response = send_file(path, mimetype=meta['content_type'], download_name=os.path.basename(key),
+                                     conditional=True, etag=meta['etag'], last_modified=meta['last_modified'],
+                                     max_age=MEDIA_CACHE_CONTROL_MAX_AGE)
+            except FileNotFoundError:
+                # Evicted by another worker between the lookup and the open
+                continue
+            response.cache_control.public = True
+            # Werkzeug only advertises ranges on range requests; players seek
+            # more readily when every response does
+            response.headers['Accept-Ranges'] = 'bytes'
+            return response
+        raise MediaUnavailable(f"{key} was evicted while being served", 503)
+
+    def warm(self, urls, workers=8):
+        """Fetch every origin URL in urls that isn't cached; returns (fetched, failed)"""
+        keys = [url[len(MEDIA_URL_PREFIX):] for url in dict.fromkeys(urls)
+                if url and url.startswith(MEDIA_URL_PREFIX)]
+        keys = [key for key in keys if is_media_key(key)]
+
+        def fetch(key):
+            try:
+                self.get(key)
+                return True
+            except MediaUnavailable as e:
+                logger.warning("Warming %s failed: %s", key, e)
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch, keys))
+        return results.count(True), results.count(False)
+
+
+def top_sign_urls(examples, top_n):
+    """Example and definition video URLs of the top_n ranked signs, commonest first"""
+    ranked = []
+    for position in range(len(examples)):
+        entry = json.loads(examples.entry(position))
+        if entry['rank'] > top_n:
+            continue
+        urls = [entry['video_url'], entry['definition_video_url']]
+        urls.extend(sign['definition_video_url'] for sign in entry['sign_sequence'])
+        ranked.append((entry['rank'], urls))
+    ranked.sort(key=lambda item: item[0])
+    return [url for _, urls in ranked for url in urls if url]
+
+
+def main():
+    from example_store import load_examples
+
+    parser = argparse.ArgumentParser(description='Warm the media cache with the videos of the top-ranked signs')
+    parser.add_argument('--warm', type=int, default=100, metavar='TOP_N', help='Signs to warm (by rank)')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent origin downloads')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    cache = MediaCache()
+    urls = top_sign_urls(load_examples(), args.warm)
+    started = time.time()
+    fetched, failed = cache.warm(urls, args.workers)
+    size = sum(size for _, size, _ in cache.usage())
+    print(f"Warmed {fetched} videos of the top {args.warm} signs ({failed} failed) in {time.time() - started:.1f}s; "
+          f"cache holds {size / 1024 / 1024:.0f} MiB in {cache.directory}")
+
+
+if __name__ == "__main__":
+    main()
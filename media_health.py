@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""Health check of every sign video URL the app can serve.
+
+Collects the URLs in nzsl.db's videos table, video_examples.json and
+NZSLGrammar/game_data.js and probes each with a HEAD request, or a one-byte
+Range GET where the origin refuses HEAD. Probes run on a fixed number of
+asyncio workers, each keeping one keep-alive connection per host, so the
+whole manifest is checked in minutes without a connection per URL.
+
+Results go in the media_health table of a sidecar database next to nzsl.db
+(which is opened immutable, so it can't hold them). A URL the origin answers
+with a 4xx, or with an empty body, is broken: the example builders and the
+app leave its examples out. Timeouts, connection errors and 5xx replies are
+recorded but exclude nothing, so a flaky run can't empty the dataset.
+
+    python media_health.py                    # check URLs not checked in the last week
+    python media_health.py --all              # recheck everything
+    python media_health.py --concurrency 64
+
+MEDIA_ORIGIN (see media_cache.py) redirects the probes, e.g. to
+benchmarks/stub_media.py for testing.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import ssl
+import time
+from urllib.parse import quote, urlsplit
+
+from db import DB_PATH, connect_readonly
+from grammar_sentences import GAME_DATA_PATH, load_game_data
+
+MEDIA_HEALTH_PATH = os.getenv('MEDIA_HEALTH_DB', 'media_health.db')
+
+DEFAULT_CONCURRENCY = 32
+PROBE_TIMEOUT = 10
+# URLs that were healthy more recently than this are skipped unless --all
+RECHECK_AFTER = 7 * 24 * 3600
+
+# HEAD answers meaning "try a GET instead"
+HEAD_REFUSED = (405, 501)
+# Larger error bodies close the connection rather than being read
+MAX_DRAIN_BYTES = 64 * 1024
+# Results written per transaction while a check runs
+WRITE_BATCH = 200
+
+USER_AGENT = 'nzsl-translation-practice media health check'
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS media_health (
+        url TEXT PRIMARY KEY,
+        status INTEGER,
+        content_length INTEGER,
+        content_type TEXT,
+        method TEXT,
+        error TEXT,
+        elapsed_ms REAL,
+        checked_at REAL NOT NULL
+    )
+"""
+COLUMNS = ('url', 'status', 'content_length', 'content_type', 'method', 'error', 'elapsed_ms', 'checked_at')
+
+# The origin says the video is gone, or serves it empty
+BROKEN_CONDITION = "(status BETWEEN 400 AND 499 OR (status BETWEEN 200 AND 299 AND content_length = 0))"
+
+
+def load_broken_urls(path=MEDIA_HEALTH_PATH):
+    """URLs found broken by the last check (empty if it was never run)"""
+    if not os.path.exists(path):
+        return frozenset()
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    try:
+        return frozenset(row[0] for row in conn.execute(f"SELECT url FROM media_health WHERE {BROKEN_CONDITION}"))
+    except sqlite3.OperationalError:
+        return frozenset()
+    finally:
+        conn.close()
+
+
+def broken_urls_version(broken_urls):
+    """Short hash of a set of broken URLs, '' for none"""
+    if not broken_urls:
+        return ''
+    return hashlib.sha1('\n'.join(sorted(broken_urls)).encode('utf-8')).hexdigest()[:12]
+
+
+def manifest_urls(db_path=DB_PATH, video_examples_path=None, game_data_path=GAME_DATA_PATH):
+    """Every video URL in the database and the built datasets, sorted"""
+    if video_examples_path is None:
+        # Imported here because build_datasets imports this module
+        from build_datasets import VIDEO_EXAMPLES_PATH
+        video_examples_path = VIDEO_EXAMPLES_PATH
+
+    conn = connect_readonly(db_path)
+    try:
+        urls = {row[0] for row in conn.execute("SELECT DISTINCT url FROM videos WHERE url IS NOT NULL")}
+    finally:
+        conn.close()
+
+    if os.path.exists(video_examples_path):
+        with open(video_examples_path, 'r') as f:
+            for entry in json.load(f):
+                urls.add(entry['video_url'])
+                urls.add(entry['definition_video_url'])
+                urls.update(sign.get('definition_video_url') for sign in entry['sign_sequence'])
+    if os.path.exists(game_data_path):
+        urls.update(sentence['video'] for sentence in load_game_data(game_data_path))
+
+    return sorted(url for url in urls if url)
+
+
+async def _connect(scheme, host, port):
+    ssl_context = ssl.create_default_context() if scheme == 'https' else None
+    return await asyncio.open_connection(host, port, ssl=ssl_context)
+
+
+def _close(connection):
+    if connection is not None:
+        connection[1].close()
+
+
+async def _drain_chunked(reader):
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        if size == 0:
+            # Trailers, up to the blank line
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            return
+        await reader.readexactly(size + 2)
+
+
+async def _exchange(reader, writer, method, host, target, extra_headers):
+    """Send one request on a connection; returns (status, headers, reusable)"""
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {host}', f'User-Agent: {USER_AGENT}', 'Accept: */*',
+             *extra_headers]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+
+    status_line, *header_lines = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    version, status = status_line.split(' ', 2)[:2]
+    status = int(status)
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    # Read the body off the connection so the next request can use it
+    reusable = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    if method == 'HEAD' or status in (204, 304) or status < 200:
+        pass
+    elif 'chunked' in headers.get('transfer-encoding', '').lower():
+        await _drain_chunked(reader)
+    elif 'content-length' in headers and int(headers['content-length']) <= MAX_DRAIN_BYTES:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        reusable = False
+    return status, headers, reusable
+
+
+def response_length(status, headers):
+    """Full size of the video from a HEAD, 200 or 206 response, if given"""
+    content_range = headers.get('content-range', '')
+    if status == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get('content-length', '')
+    return int(length) if length.isdigit() else None
+
+
+async def probe(url, connections, timeout=PROBE_TIMEOUT, rewrite=None):
+    """Check one URL, reusing connections (origin -> (reader, writer)); returns a media_health row"""
+    started = time.perf_counter()
+    parts = urlsplit(rewrite(url) if rewrite else url)
+
+    def result(method, status=None, headers=None, error=None):
+        headers = headers or {}
+        return (url, status, response_length(status, headers) if status else None, headers.get('content-type'),
+                method, error, round((time.perf_counter() - started) * 1000, 1), time.time())
+
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return result(None, error='Unsupported URL')
+    origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+    method, extra_headers = 'HEAD', ()
+    retried = False
+    while True:
+        reused = origin in connections
+        try:
+            if not reused:
+                connections[origin] = await asyncio.wait_for(_connect(*origin), timeout)
+            status, headers, reusable = await asyncio.wait_for(
+                _exchange(*connections[origin], method, parts.netloc, target, extra_headers), timeout)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError) as e:
+            _close(connections.pop(origin, None))
+            # The origin may have closed an idle kept-alive connection; retry once on a new one
+            if reused and not retried:
+                retried = True
+                continue
+            return result(method, error=f'{type(e).__name__}: {e}'[:200])
+
+        if not reusable:
+            _close(connections.pop(origin))
+        if method == 'HEAD' and status in HEAD_REFUSED:
+            method, extra_headers = 'GET', ('Range: bytes=0-0',)
+            continue
+        return result(method, status, headers)
+
+
+async def check_urls(urls, on_result, concurrency=DEFAULT_CONCURRENCY, timeout=PROBE_TIMEOUT, rewrite=None):
+    """Probe every URL on concurrency workers, calling on_result with each row"""
+    pending = iter(urls)
+
+    async def worker():
+        connections = {}
+        try:
+            for url in pending:
+                on_result(await probe(url, connections, timeout, rewrite))
+        finally:
+            for connection in connections.values():
+                _close(connection)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+
+def open_health_db(path=MEDIA_HEALTH_PATH):
+    """Open (creating if needed) the sidecar database for writing"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def urls_to_check(conn, urls, recheck_after=RECHECK_AFTER):
+    """URLs never checked, not checked recently, or not healthy when last checked"""
+    cutoff = time.time() - recheck_after
+    fresh = {row[0] for row in conn.execute(
+        f"SELECT url FROM media_health WHERE checked_at >= ? AND status BETWEEN 200 AND 399 AND NOT {BROKEN_CONDITION}",
+        (cutoff,))}
+    return [url for url in urls if url not in fresh]
+
+
+def run_check(urls, health_path=MEDIA_HEALTH_PATH, concurrency=DEFAULT_CONCURRENCY, timeout=PROBE_TIMEOUT,
+              rewrite=None):
+    """Check urls and record the results; returns (checked, broken, failed)"""
+    conn = open_health_db(health_path)
+    batch = []
+    counts = {'checked': 0, 'broken': 0, 'failed': 0}
+    insert = f"INSERT OR REPLACE INTO media_health ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+    def on_result(row):
+        _, status, content_length = row[:3]
+        counts['checked'] += 1
+        if status is None or status >= 500:
+            counts['failed'] += 1
+        elif 400 <= status < 500 or (200 <= status < 300 and content_length == 0):
+            counts['broken'] += 1
+        batch.append(row)
+        if len(batch) >= WRITE_BATCH:
+            with conn:
+                conn.executemany(insert, batch)
+            batch.clear()
+
+    try:
+        asyncio.run(check_urls(urls, on_result, concurrency, timeout, rewrite))
+    finally:
+        with conn:
+            conn.executemany(insert, batch)
+        conn.close()
+    return counts['checked'], counts['broken'], counts['failed']
+
+
+def main():
+    from media_cache import MEDIA_ORIGIN, MEDIA_URL_PREFIX
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DB_PATH, help='Path to nzsl.db')
+    parser.add_argument('--output', default=MEDIA_HEALTH_PATH, help='Sidecar database for the results')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Requests in flight')
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT, help='Seconds per request')
+    parser.add_argument('--all', action='store_true', help='Recheck URLs checked in the last week too')
+    args = parser.parse_args()
+
+    urls = manifest_urls(args.db)
+    conn = open_health_db(args.output)
+    try:
+        to_check = urls if args.all else urls_to_check(conn, urls)
+    finally:
+        conn.close()
+
+    origin = MEDIA_ORIGIN.rstrip('/') + '/'
+    rewrite = None
+    if origin != MEDIA_URL_PREFIX:
+        def rewrite(url):
+            return origin + url[len(MEDIA_URL_PREFIX):] if url.startswith(MEDIA_URL_PREFIX) else url
+
+    started = time.time()
+    checked, broken, failed = run_check(to_check, args.output, args.concurrency, args.timeout, rewrite)
+    print(f"Checked {checked} of {len(urls)} media URLs in {time.time() - started:.1f}s: "
+          f"{broken} broken, {failed} unreachable or server errors")
+    print(f"{len(load_broken_urls(args.output))} broken URLs recorded in {args.output}; "
+          f"rebuild with build_datasets.py or example_store.py to leave their examples out")
+
+
+if __name__ == "__main__":
+    main()
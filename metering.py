@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from db import execute
+
+logger = logging.getLogger(__name__)
+
+# SQLite file the gunicorn workers aggregate their Claude usage in
+METERING_DB_PATH = os.getenv('METERING_DB_PATH', 'metering.db')
+
+# Claude 3.5 Haiku pricing (approximate)
+INPUT_COST_PER_TOKEN = 0.000001  # $1.00 per 1M tokens
+OUTPUT_COST_PER_TOKEN = 0.000005  # $5.00 per 1M tokens
+
+# Usage is buffered in memory and written behind in one transaction this
+# often; the other workers' usage is re-read at the same interval
+FLUSH_INTERVAL = float(os.getenv('METERING_FLUSH_INTERVAL', '2'))
+
+# Usage is kept in per-minute buckets for the rolling windows
+BUCKET_SECONDS = 60
+RETENTION = 2 * 24 * 3600
+
+WINDOWS = {'1m': 60, '1h': 3600, '24h': 24 * 3600}
+
+# Optional caps on Claude spend (USD) per rolling window; scoring is refused
+# with 429 while either is reached
+BUDGETS = {
+    seconds: float(os.getenv(name))
+    for name, seconds in (('SCORING_BUDGET_HOURLY', 3600), ('SCORING_BUDGET_DAILY', 24 * 3600))
+    if os.getenv(name)
+}
+
+# requests, input tokens, output tokens, cost, total latency
+_FIELDS = 5
+
+
+def usage_cost(input_tokens, output_tokens):
+    """Estimated USD cost of one Claude call"""
+    return input_tokens * INPUT_COST_PER_TOKEN + output_tokens * OUTPUT_COST_PER_TOKEN
+
+
+def _add(bucket, values):
+    for i, value in enumerate(values):
+        bucket[i] += value
+
+
+class BudgetExceeded(Exception):
+    """Raised when a scoring budget is spent; carries a Retry-After hint"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Scoring budget reached, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class UsageMeter:
+    """Claude usage, cost and latency metered across gunicorn workers.
+
+    Recording only adds to an in-memory per-minute bucket. A background
+    thread writes the buckets behind to SQLite, adding them to the shared
+    per-minute rows and all-time totals, and reads back what every worker
+    has written. Rolling windows and budget checks are answered from memory:
+    the shared rows plus this worker's unwritten usage.
+    """
+
+    def __init__(self, path=METERING_DB_PATH, flush_interval=FLUSH_INTERVAL, budgets=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.budgets = BUDGETS if budgets is None else budgets
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._flushing = {}
+        self._shared = {}
+        self._shared_totals = [0] * _FIELDS
+        self._thread_pid = None
+        execute(
+            self.path,
+            """
+            CREATE TABLE IF NOT EXISTS usage_minutes (
+                minute INTEGER PRIMARY KEY,
+                requests INTEGER NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                latency REAL NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS usage_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                requests INTEGER NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                latency REAL NOT NULL
+            )
+            """,
+            "INSERT OR IGNORE INTO usage_totals VALUES (0, 0, 0, 0, 0, 0)"
+        )
+        self._refresh()
+        atexit.register(self.flush)
+
+    def _ensure_flusher(self):
+        # Started lazily so each forked worker runs its own; call with _lock held
+        if self._thread_pid != os.getpid():
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error("Writing usage failed: %s", e)
+
+    def record(self, input_tokens, output_tokens, latency):
+        """Meter one Claude call; returns its estimated cost"""
+        cost = usage_cost(input_tokens, output_tokens)
+        minute = int(time.time() // BUCKET_SECONDS)
+        with self._lock:
+            bucket = self._pending.setdefault(minute, [0] * _FIELDS)
+            _add(bucket, (1, input_tokens, output_tokens, cost, latency))
+            self._ensure_flusher()
+        return cost
+
+    def flush(self):
+        """Write buffered usage to SQLite and re-read every worker's usage"""
+        with self._flush_lock:
+            with self._lock:
+                # Still counted from _flushing until the shared rows include it
+                self._flushing, self._pending = self._pending, {}
+                pending = self._flushing
+            if pending:
+                totals = [0] * _FIELDS
+                for values in pending.values():
+                    _add(totals, values)
+                cutoff = int((time.time() - RETENTION) // BUCKET_SECONDS)
+                try:
+                    execute(
+                        self.path,
+                        *[("""
+                            INSERT INTO usage_minutes VALUES (?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (minute) DO UPDATE SET
+                                requests = requests + excluded.requests,
+                                input_tokens = input_tokens + excluded.input_tokens,
+                                output_tokens = output_tokens + excluded.output_tokens,
+                                cost = cost + excluded.cost,
+                                latency = latency + excluded.latency
+                           """, (minute, *values)) for minute, values in pending.items()],
+                        ("""
+                            UPDATE usage_totals SET
+                                requests = requests + ?, input_tokens = input_tokens + ?,
+                                output_tokens = output_tokens + ?, cost = cost + ?, latency = latency + ?
+                         """, totals),
+                        ("DELETE FROM usage_minutes WHERE minute < ?", (cutoff,))
+                    )
+                except sqlite3.Error:
+                    # Keep the usage for the next attempt
+                    with self._lock:
+                        for minute, values in pending.items():
+                            _add(self._pending.setdefault(minute, [0] * _FIELDS), values)
+                        self._flushing = {}
+                    raise
+            self._refresh()
+
+    def _refresh(self):
+        first_minute = int((time.time() - max(WINDOWS.values())) // BUCKET_SECONDS)
+        rows = execute(self.path, ("SELECT * FROM usage_minutes WHERE minute >= ?", (first_minute,)))
+        totals = execute(self.path, "SELECT requests, input_tokens, output_tokens, cost, latency FROM usage_totals")
+        with self._lock:
+            self._shared = {row[0]: list(row[1:]) for row in rows}
+            self._shared_totals = list(totals[0])
+            self._flushing = {}
+
+    def _buckets(self):
+        """Per-minute usage of every worker, including unwritten usage"""
+        with self._lock:
+            self._ensure_flusher()
+            buckets = {minute: list(values) for minute, values in self._shared.items()}
+            for source in (self._flushing, self._pending):
+                for minute, values in source.items():
+                    _add(buckets.setdefault(minute, [0] * _FIELDS), values)
+        return buckets
+
+    def window(self, seconds, buckets=None):
+        """Usage in the last seconds (whole minutes, including this one)"""
+        buckets = self._buckets() if buckets is None else buckets
+        first_minute = int((time.time() - seconds) // BUCKET_SECONDS) + 1
+        totals = [0] * _FIELDS
+        for minute, values in buckets.items():
+            if minute >= first_minute:
+                _add(totals, values)
+        return self._summary(totals, seconds)
+
+    def _summary(self, totals, seconds):
+        requests, input_tokens, output_tokens, cost, latency = totals
+        return {
+            'requests': requests,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'estimated_cost': round(cost, 6),
+            'average_latency_ms': round(latency / requests * 1000, 1) if requests else 0.0,
+            'requests_per_minute': round(requests / (seconds / 60), 3)
+        }
+
+    def check_budget(self):
+        """Raise BudgetExceeded while any rolling spend cap is reached"""
+        if not self.budgets:
+            return
+        buckets = self._buckets()
+        now_minute = int(time.time() // BUCKET_SECONDS)
+        for seconds, cap in self.budgets.items():
+            first_minute = now_minute - seconds // BUCKET_SECONDS + 1
+            costs = sorted((minute, values[3]) for minute, values in buckets.items() if minute >= first_minute)
+            spent = sum(cost for _, cost in costs)
+            if spent < cap or not costs:
+                continue
+            # Wait until enough of the oldest spend has left the window
+            for minute, cost in costs:
+                spent -= cost
+                if spent < cap:
+                    break
+            retry_after = (minute + seconds // BUCKET_SECONDS) * BUCKET_SECONDS - time.time()
+            raise BudgetExceeded(max(1, int(retry_after) + 1))
+
+    def totals(self):
+        """All-time usage of every worker"""
+        with self._lock:
+            self._ensure_flusher()
+            totals = list(self._shared_totals)
+            for source in (self._flushing, self._pending):
+                for values in source.values():
+                    _add(totals, values)
+        return totals
+
+    def stats(self):
+        """Totals, rolling windows and budgets for /usage_stats"""
+        requests, input_tokens, output_tokens, cost, _ = self.totals()
+        buckets = self._buckets()
+        return {
+            'total_requests': requests,
+            'total_input_tokens': input_tokens,
+            'total_output_tokens': output_tokens,
+            'estimated_cost': round(cost, 6),
+            'windows': {name: self.window(seconds, buckets) for name, seconds in WINDOWS.items()},
+            'budgets': {
+                name: {'cap': self.budgets[seconds], 'spent': self.window(seconds, buckets)['estimated_cost']}
+                for name, seconds in WINDOWS.items() if seconds in self.budgets
+            }
+        }
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Prometheus metrics for the app, merged across gunicorn workers.
+
+Each worker keeps its counters, gauges and histograms in memory and a
+background thread writes a snapshot of them to METRICS_DIR every few
+seconds. /metrics refreshes the serving worker's snapshot and merges every
+worker's, so a scrape sees the whole app whichever worker answers it, and
+counters never appear to go backwards between scrapes. Gauges of workers
+that have exited are dropped; their counters and histograms still count
+until the app restarts.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv('METRICS_DIR', '.metrics')
+SNAPSHOT_INTERVAL = float(os.getenv('METRICS_SNAPSHOT_INTERVAL', '5'))
+
+# Seconds; covers fast cached lookups through slow Claude calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A metric family with one value per combination of label values"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[(label values, value)] for a snapshot"""
+        with self._lock:
+            return [(list(key), value) for key, value in self._values.items()]
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def merge(self, merged, samples):
+        for key, value in samples:
+            key = tuple(key)
+            merged[key] = merged.get(key, 0) + value
+
+    def render(self, merged):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, value in sorted(merged.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A gauge set directly, or read from a function at snapshot time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set_function(self, function):
+        self._function = function
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self._function is not None:
+            return [([], self._function())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # Per-bucket counts (the last is +Inf), then the sum
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            return [(list(key), list(state)) for key, state in self._values.items()]
+
+    def merge(self, merged, samples):
+        for key, state in samples:
+            key = tuple(key)
+            if key in merged:
+                merged[key] = [a + b for a, b in zip(merged[key], state)]
+            else:
+                merged[key] = list(state)
+
+    def render(self, merged):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for key, state in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), state):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Every metric of this process, with the snapshot files of its peers"""
+
+    def __init__(self, directory=METRICS_DIR, interval=SNAPSHOT_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._metrics = []
+        self._writer_pid = None
+        self._write_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def _after_fork(self):
+        # A forked worker starts from zero rather than counting its parent's values
+        for metric in self._metrics:
+            metric.reset()
+        self._writer_pid = None
+        self._write_lock = threading.Lock()
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def snapshot(self):
+        return {metric.name: metric.samples() for metric in self._metrics}
+
+    def write_snapshot(self):
+        """Write this process's values where the other workers can merge them"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f'{path}.tmp'
+        with self._write_lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+
+    def ensure_writer(self):
+        """Start this process's snapshot thread if it isn't running"""
+        if self._writer_pid != os.getpid():
+            self._writer_pid = os.getpid()
+            threading.Thread(target=self._write_loop, daemon=True).start()
+
+    def _write_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_snapshot()
+            except OSError:
+                # Retried on the next tick
+                pass
+
+    def remove_stale(self):
+        """Delete snapshots of processes that no longer exist"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            pid = name.split('.')[0]
+            if pid.isdigit() and not _alive(int(pid)):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _snapshots(self):
+        """[(alive, snapshot)] of every process, this one included"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        snapshots = []
+        for name in names:
+            pid = name[:-len('.json')]
+            if not name.endswith('.json') or not pid.isdigit():
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append((_alive(int(pid)), json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self):
+        """Prometheus text exposition of every worker's metrics"""
+        self.write_snapshot()
+        snapshots = self._snapshots()
+        lines = []
+        for metric in self._metrics:
+            merged = {}
+            for alive, snapshot in snapshots:
+                if alive or metric.kind != 'gauge':
+                    metric.merge(merged, snapshot.get(metric.name, []))
+            lines.extend(metric.render(merged))
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = Counter('nzsl_http_requests_total', 'HTTP requests by route, method and status',
+                        ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = Histogram('nzsl_http_request_duration_seconds',
+                                 'Time to produce a response (streamed bodies excluded)', ('route',))
+HTTP_IN_FLIGHT = Gauge('nzsl_http_requests_in_flight', 'Requests being handled')
+SQLITE_QUERY_SECONDS = Histogram('nzsl_sqlite_query_duration_seconds', 'SQLite query time by query',
+                                 ('query',))
+CLAUDE_REQUEST_SECONDS = Histogram('nzsl_claude_request_duration_seconds',
+                                   'Claude scoring call time by mode (blocking or stream)', ('mode',))
+CLAUDE_TOKENS = Counter('nzsl_claude_tokens_total', 'Claude tokens used by direction', ('direction',))
+SCORING_IN_FLIGHT = Gauge('nzsl_scoring_in_flight', 'Claude calls running or waiting for a scoring slot')
+SCORING_REJECTED = Counter('nzsl_scoring_rejected_total', 'Scoring requests turned away by reason',
+                           ('reason',))
+SCORE_PARSE_FAILURES = Counter('nzsl_score_parse_failures_total',
+                               'Claude replies that could not be parsed or validated')
+CACHE_REQUESTS = Counter('nzsl_cache_requests_total', 'Cache lookups by cache and result',
+                         ('cache', 'result'))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import re
+
+_ONES = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine',
+         'ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+         'seventeen', 'eighteen', 'nineteen']
+_TENS = ['', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+_SCALES = [(1_000_000, 'million'), (1_000, 'thousand'), (100, 'hundred')]
+
+
+def number_to_words(number):
+    """Spell out a non-negative integer, e.g. 42 -> 'forty two'"""
+    if number < 20:
+        return _ONES[number]
+    if number < 100:
+        tens, ones = divmod(number, 10)
+        return _TENS[tens] + (f' {_ONES[ones]}' if ones else '')
+    for scale, name in _SCALES:
+        if number >= scale:
+            count, rest = divmod(number, scale)
+            words = f'{number_to_words(count)} {name}'
+            return words + (f' {number_to_words(rest)}' if rest else '')
+    return str(number)
+
+
+def normalize_translation(text):
+    """Canonical form of an English translation for comparison and caching.
+
+    Lowercases, spells out numbers ("9" -> "nine"), drops apostrophes so
+    "I've" and "Ive" agree, turns other punctuation into spaces and collapses
+    whitespace.
+    """
+    text = text.lower().replace('’', "'")
+    # Thousands separators: "1,200" -> "1200"
+    text = re.sub(r'(?<=\d),(?=\d{3}\b)', '', text)
+    # Spell out numbers; longer digit runs are read nine digits at a time
+    text = re.sub(r'\d{1,9}', lambda m: f' {number_to_words(int(m.group()))} ', text)
+    text = text.replace("'", '')
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Prepare nzsl.db for serving: precomputed columns, indexes and tables.
+
+Run once after downloading or rebuilding nzsl.db (the Dockerfile does this at
+build time). The app opens the database read-only and immutable, so it has to
+be prepared before the app starts:
+
+    python prepare_db.py          # prepare, then check query plans
+    python prepare_db.py --check  # only check query plans
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+
+from db import DB_PATH, PREPARED_SCHEMA_VERSION
+from dictionary_search import SEARCH_QUERY, build_search_index, load_frequency_ranks
+from example_index import EXAMPLES_QUERY
+from sign_definitions import DEFINITION_QUERY
+
+# Queries on the request path, with sample parameters for EXPLAIN QUERY PLAN.
+# None of them may fall back to a full table scan.
+HOT_QUERIES = [
+    ('sign definitions', DEFINITION_QUERY.format(placeholders='?,?,?'), ('2556', '3658', '1376')),
+    ('sign examples', EXAMPLES_QUERY, ('3658',)),
+    ('dictionary search', SEARCH_QUERY.format(table='words_fts'), ('"hou"*', 'hou', 'hou', 10)),
+    ('dictionary substring search', SEARCH_QUERY.format(table='words_trigram'), ('"ouse"', 'ouse', 'ouse', 10)),
+]
+
+INDEXES = [
+    # Main definition video lookup by sign (covering)
+    "CREATE INDEX IF NOT EXISTS idx_videos_word_type_mp4 ON videos (word_id, video_type, is_mp4, url)",
+    # Example sentence by (sign, example number)
+    "CREATE INDEX IF NOT EXISTS idx_examples_word_order ON examples (word_id, display_order)",
+    "CREATE INDEX IF NOT EXISTS idx_servable_examples_word ON servable_examples (word_id, video_type, display_order)",
+]
+
+
+def add_column(cursor, table, column, definition):
+    """Add a column unless it already exists"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def prepare(conn, matched_signs_path='matched_signs.json'):
+    """Add precomputed columns, materialize servable_examples and index"""
+    cursor = conn.cursor()
+
+    # Precomputed columns replacing LIKE '%.mp4' and int(video_type[12:])
+    add_column(cursor, 'videos', 'is_mp4', 'INTEGER NOT NULL DEFAULT 0')
+    add_column(cursor, 'videos', 'example_number', 'INTEGER')
+    cursor.execute("""
+        UPDATE videos SET
+            is_mp4 = (url LIKE '%.mp4'),
+            example_number = CASE
+                WHEN video_type LIKE 'finalexample%' THEN CAST(substr(video_type, 13) AS INTEGER)
+            END
+    """)
+
+    # Every example video joined with its sentence, ready to serve
+    cursor.execute("DROP TABLE IF EXISTS servable_examples")
+    cursor.execute("""
+        CREATE TABLE servable_examples (
+            word_id,
+            video_type TEXT NOT NULL,
+            example_number INTEGER NOT NULL,
+            display_order INTEGER,
+            video_url TEXT,
+            sentence TEXT,
+            translation TEXT
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO servable_examples
+        SELECT v.word_id, v.video_type, v.example_number, v.display_order, v.url, e.sentence, e.translation
+        FROM videos v
+        LEFT JOIN examples e ON e.rowid = (
+            SELECT rowid FROM examples
+            WHERE word_id = v.word_id AND display_order = v.example_number
+            LIMIT 1
+        )
+        WHERE v.example_number IS NOT NULL
+        ORDER BY v.word_id, v.video_type, v.display_order
+    """)
+
+    # Indexes no query uses (idx_words_id duplicated the primary key's);
+    # dropped from databases prepared before they were removed
+    for index in ('idx_words_id', 'idx_videos_word_example'):
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+    for statement in INDEXES:
+        cursor.execute(statement)
+
+    # Dictionary search, ranked by matched_signs.json frequency rank
+    frequency_ranks = load_frequency_ranks(matched_signs_path)
+    if not frequency_ranks:
+        print(f"No ranks in {matched_signs_path}; search results will be ordered by relevance only")
+    searchable = build_search_index(cursor, frequency_ranks)
+
+    cursor.execute("ANALYZE")
+    cursor.execute(f"PRAGMA user_version = {PREPARED_SCHEMA_VERSION}")
+    conn.commit()
+
+    cursor.execute("SELECT COUNT(*) FROM servable_examples")
+    print(f"Prepared nzsl.db: {cursor.fetchone()[0]} servable examples, {searchable} searchable words")
+
+
+def check_query_plans(conn):
+    """Return the hot queries whose plan contains a full table scan"""
+    failures = []
+    for name, query, params in HOT_QUERIES:
+        try:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        except sqlite3.OperationalError as e:
+            print(f"  {name}: ERROR ({e}) - has prepare_db.py been run?")
+            failures.append(name)
+            continue
+        # A virtual table "scan" with an index string (an FTS5 MATCH) is an index lookup
+        scans = [step for step in plan if step.startswith('SCAN') and 'CONSTANT ROW' not in step
+                 and not re.search(r'VIRTUAL TABLE INDEX \d+:\S', step)]
+        status = 'FULL SCAN' if scans else 'ok'
+        print(f"  {name}: {status}")
+        for step in plan:
+            print(f"      {step}")
+        if scans:
+            failures.append(name)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DB_PATH, help='Path to nzsl.db')
+    parser.add_argument('--matched-signs', default='matched_signs.json', help='Frequency ranks for search')
+    parser.add_argument('--check', action='store_true', help='Only check hot query plans')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if not args.check:
+            prepare(conn, args.matched_signs)
+
+        print("Query plans:")
+        failures = check_query_plans(conn)
+    finally:
+        conn.close()
+
+    if failures:
+        print(f"\n{len(failures)} hot queries fall back to a full scan: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
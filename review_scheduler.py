@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import math
+import os
+import time
+
+from db import execute, transaction
+
+# SQLite file holding every learner's review schedule; shared by the gunicorn
+# workers and kept across restarts
+LEARNER_DB_PATH = os.getenv('LEARNER_DB_PATH', 'learners.db')
+
+DAY = 24 * 3600
+
+# SM-2 parameters
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL_DAYS = 1
+SECOND_INTERVAL_DAYS = 6
+# SM-2 grades are 0-5; scores are 0-10 and a grade of 3 or more is a pass
+PASSING_GRADE = 3
+
+# A failed sign comes back later in the same session rather than tomorrow
+RELEARN_DELAY = 10 * 60
+
+# When several signs are due the commoner ones (lower rank) come first: each
+# e-fold of rank queues a sign this much later than its due time
+RANK_SPREAD = 10 * 60
+
+# A sign dealt for review is held back this long so the next batch doesn't
+# deal it again before it has been answered
+DEAL_LEASE = 10 * 60
+
+
+def sm2(repetitions, interval_days, ease, score):
+    """Next (repetitions, interval in days, ease) after a 0-10 score.
+
+    Follows SuperMemo 2, with the score halved to SM-2's 0-5 grade. A failed
+    review restarts the repetitions with a zero interval.
+    """
+    grade = max(0.0, min(5.0, score / 2))
+    ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    if grade < PASSING_GRADE:
+        return 0, 0, ease
+    if repetitions == 0:
+        interval_days = FIRST_INTERVAL_DAYS
+    elif repetitions == 1:
+        interval_days = SECOND_INTERVAL_DAYS
+    else:
+        interval_days = interval_days * ease
+    return repetitions + 1, interval_days, ease
+
+
+def queue_time(due_at, rank):
+    """Position of a sign in a learner's review queue"""
+    return due_at + RANK_SPREAD * math.log(max(rank, 1))
+
+
+class ReviewScheduler:
+    """Per-learner, per-sign spaced-repetition schedules in SQLite.
+
+    Each learner's due signs form a priority queue: reviews is indexed on
+    (learner_id, queue_at), so dealing the next due signs is an index seek
+    that stays O(log n) however long the history grows. Every attempt is also
+    appended to review_log.
+    """
+
+    def __init__(self, path=LEARNER_DB_PATH):
+        self.path = path
+        execute(
+            self.path,
+            """
+            CREATE TABLE IF NOT EXISTS reviews (
+                learner_id TEXT NOT NULL,
+                sign_id TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                repetitions INTEGER NOT NULL,
+                interval_days REAL NOT NULL,
+                ease REAL NOT NULL,
+                due_at REAL NOT NULL,
+                queue_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_score REAL NOT NULL,
+                reviewed_at REAL NOT NULL,
+                PRIMARY KEY (learner_id, sign_id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS reviews_queue ON reviews (learner_id, queue_at)",
+            """
+            CREATE TABLE IF NOT EXISTS review_log (
+                learner_id TEXT NOT NULL,
+                sign_id TEXT NOT NULL,
+                score REAL NOT NULL,
+                reviewed_at REAL NOT NULL
+            )
+            """
+        )
+
+    def record(self, learner_id, sign_id, rank, score, now=None):
+        """Schedule a sign's next review from the score of an attempt.
+
+        The card is read and rewritten in one immediate transaction, so two
+        scores for the same sign arriving together both count.
+        """
+        now = time.time() if now is None else now
+        with transaction(self.path, immediate=True) as conn:
+            row = conn.execute(
+                "SELECT repetitions, interval_days, ease, attempts FROM reviews WHERE learner_id = ? AND sign_id = ?",
+                (learner_id, sign_id)
+            ).fetchone()
+            repetitions, interval_days, ease, attempts = row if row else (0, 0, INITIAL_EASE, 0)
+
+            repetitions, interval_days, ease = sm2(repetitions, interval_days, ease, score)
+            due_at = now + (interval_days * DAY if repetitions else RELEARN_DELAY)
+            conn.execute("INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (learner_id, sign_id, rank, repetitions, interval_days, ease, due_at,
+                          queue_time(due_at, rank), attempts + 1, score, now))
+            conn.execute("INSERT INTO review_log VALUES (?, ?, ?, ?)", (learner_id, sign_id, score, now))
+        return due_at
+
+    def deal_due(self, learner_id, limit, now=None):
+        """Take up to limit due signs off the front of a learner's queue"""
+        now = time.time() if now is None else now
+        rows = execute(self.path, (
+            """
+            UPDATE reviews SET queue_at = ?
+            WHERE rowid IN (
+                SELECT rowid FROM reviews
+                WHERE learner_id = ? AND queue_at <= ?
+                ORDER BY queue_at
+                LIMIT ?
+            )
+            RETURNING sign_id, due_at
+            """,
+            (now + DEAL_LEASE, learner_id, now, limit)
+        ))
+        # RETURNING order is unspecified; most overdue first
+        return [sign_id for sign_id, _ in sorted(rows, key=lambda row: row[1])]
+
+    def reviewed_signs(self, learner_id):
+        """IDs of every sign a learner has been scored on"""
+        rows = execute(self.path, ("SELECT sign_id FROM reviews WHERE learner_id = ?", (learner_id,)))
+        return {sign_id for sign_id, in rows}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from db import execute
+from normalize import normalize_translation
+
+SCORE_CACHE_SIZE = int(os.getenv('SCORE_CACHE_SIZE', '2048'))
+SCORE_CACHE_TTL = float(os.getenv('SCORE_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Optional SQLite file that persists cached scores across restarts and shares
+# them between gunicorn workers
+SCORE_CACHE_PATH = os.getenv('SCORE_CACHE_PATH')
+# Rows kept on disk; the oldest beyond this are pruned
+SCORE_CACHE_MAX_ROWS = int(os.getenv('SCORE_CACHE_MAX_ROWS', '100000'))
+# Puts between pruning the disk table down to SCORE_CACHE_MAX_ROWS
+PRUNE_INTERVAL = 64
+
+
+def score_cache_key(original_translation, user_translation):
+    """Cache key for one example and a normalized learner interpretation"""
+    raw = f"{original_translation.strip()}\x1f{normalize_translation(user_translation)}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    """LRU cache of scoring results with a TTL and optional on-disk backing.
+
+    The in-memory LRU serves repeats within a worker. With a path set, results
+    are also written to a small SQLite table so other workers and restarts can
+    reuse them; a memory miss falls through to disk before counting as a miss.
+    The table drops expired rows on every insert and is pruned to the newest
+    max_rows every PRUNE_INTERVAL inserts.
+    """
+
+    def __init__(self, max_entries=SCORE_CACHE_SIZE, ttl=SCORE_CACHE_TTL, path=SCORE_CACHE_PATH,
+                 max_rows=SCORE_CACHE_MAX_ROWS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        if path:
+            execute(
+                self.path,
+                """
+                CREATE TABLE IF NOT EXISTS score_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+                """,
+                "CREATE INDEX IF NOT EXISTS score_cache_stored_at ON score_cache (stored_at)"
+            )
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+            if entry:
+                del self._entries[key]
+
+        result = self._load(key, now) if self.path else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result[0], result[1])
+            return dict(result[0])
+
+    def put(self, key, result):
+        """Store a scoring result"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, dict(result), now)
+            self._puts += 1
+            prune = self._puts % PRUNE_INTERVAL == 0
+        if self.path:
+            statements = [
+                ("INSERT OR REPLACE INTO score_cache VALUES (?, ?, ?)", (key, json.dumps(result), now)),
+                ("DELETE FROM score_cache WHERE stored_at < ?", (now - self.ttl,))
+            ]
+            if prune:
+                # Everything older than the max_rows-th newest row
+                statements.append(("""
+                    DELETE FROM score_cache WHERE stored_at < (
+                        SELECT stored_at FROM score_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?
+                    )
+                """, (self.max_rows - 1,)))
+            execute(self.path, *statements)
+
+    def stats(self):
+        """Hit/miss counters for /usage_stats"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size': len(self._entries)
+            }
+
+    def _remember(self, key, result, stored_at):
+        self._entries[key] = (result, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key, now):
+        rows = execute(self.path, ("SELECT result, stored_at FROM score_cache WHERE key = ?", (key,)))
+        if rows and now - rows[0][1] < self.ttl:
+            return json.loads(rows[0][0]), rows[0][1]
+        return None
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SCORING_MODEL = "claude-3-5-haiku-20241022"
+SCORING_MAX_TOKENS = 300
+
+# Claude calls allowed at once per worker, and how many more may wait for a
+# slot before new requests are turned away with 429
+MAX_IN_FLIGHT = int(os.getenv('SCORING_MAX_IN_FLIGHT', '4'))
+MAX_QUEUED = int(os.getenv('SCORING_MAX_QUEUED', '4'))
+
+# Seconds a request waits for its score before giving up
+SCORING_TIMEOUT = float(os.getenv('SCORING_TIMEOUT', '20'))
+
+
+class ScoringBusy(Exception):
+    """Raised when every scoring slot is taken; carries a Retry-After hint"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Scoring is busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def build_prompt(original_translation, user_translation, sign_sequence):
+    """Create the Claude scoring prompt for one interpretation"""
+    # Create sign sequence string for context
+    signs_text = " → ".join([sign['word'] for sign in sign_sequence])
+
+    return f"""You are scoring NZSL (New Zealand Sign Language) interpretation accuracy. Be encouraging and supportive.
+
+Original signed sentence signs: {signs_text}
+Official English translation: "{original_translation}"
+User's interpretation: "{user_translation}"
+
+IMPORTANT: Read the user's interpretation VERY carefully before scoring. The user is interpreting what they saw signed in the video. When the signer uses "I" in the original, the user should also use "I" in their interpretation - this shows they correctly understood the signer was talking about their own experience. The user is translating/interpreting, not describing what they observed.
+
+Before scoring, carefully check if the user's interpretation contains the same key information as the official translation, even if worded differently.
+
+Please score this interpretation on a scale of 0-10 where:
+- 10 = Perfect or near-perfect meaning match (minor differences like "I" vs "i", "nine" vs "9" don't matter)
+- 9 = Excellent - captures all meaning with very minor wording differences
+- 8 = Very good - captures main meaning with small differences  
+- 6-7 = Good - captures core idea but misses some details
+- 4-5 = Partially correct but significant gaps
+- 2-3 = Some elements correct but major misunderstanding
+- 0-1 = Completely incorrect or unrelated
+
+BE ACCURATE with scoring. If the user's interpretation is about completely different topics or concepts than the original, score it very low (0-2). Only give high scores when the interpretations are actually about the same topic and events.
+
+Focus on semantic meaning rather than exact word-for-word matching. Minor differences in capitalization, numbers vs words (9 vs nine), or slight rephrasing should not reduce the score if the meaning is the same. Examples of equivalent meanings: "burglar/intruder/scary person", "phone/call/ring", "neighbour/neighbor", "arrived home/got home/came home".
+
+Use encouraging, friendly language. Address the learner directly as "you". Focus on what they got right first, then gently explain what could be improved. Use phrases like "Excellent work!", "Perfect interpretation!", "You nailed it!", "Good catch on...", "You understood...".
+
+CRITICAL: Before giving feedback about what the user "missed", double-check that they actually missed it. Do not claim they missed something that is clearly present in their interpretation.
+
+REALITY CHECK: Ask yourself - are the user's interpretation and the official translation actually about the same topic/situation? If not, do not try to find connections that don't exist. Be honest about significant misunderstandings.
+
+Respond with ONLY a JSON object in this format:
+{{"score": X, "feedback": "Encouraging explanation addressing the learner directly about what they captured well and what to focus on next time"}}"""
+
+
+def request_score(client, prompt):
+    """Call Claude with a scoring prompt and return the message"""
+    return client.messages.create(
+        model=SCORING_MODEL,
+        max_tokens=SCORING_MAX_TOKENS,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+
+
+def open_score_stream(client, prompt):
+    """Start a streaming Claude call for a scoring prompt (a context manager)"""
+    return client.messages.stream(
+        model=SCORING_MODEL,
+        max_tokens=SCORING_MAX_TOKENS,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+
+
+def clamp_score(score):
+    """Keep a score within the 0-10 scale"""
+    return max(0, min(10, score))
+
+
+# Characters that follow a backslash in a JSON string
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class IncrementalScoreParser:
+    """Extracts the {score, feedback} object from Claude's reply as it streams.
+
+    Anything before the first '{' (such as a ```json fence or a sentence of
+    preamble) and after the matching '}' is ignored. feed() returns events as
+    soon as they can be decoded: ('score', float) once the score value is
+    complete, and ('feedback', text) for each newly decoded run of the
+    feedback string. result() parses and validates the complete object.
+    """
+
+    def __init__(self):
+        self.raw_text = ''
+        self._json_chars = []
+        self._started = False
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._unicode_digits = None
+        self._string_chars = []
+        self._number_chars = None
+        self._key = None
+        self._expect_key = True
+
+    def feed(self, chunk):
+        """Consume more reply text and return the events it completes"""
+        self.raw_text += chunk
+        events = []
+        feedback = []
+        for char in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if char != '{':
+                    continue
+                self._started = True
+            self._json_chars.append(char)
+            if self._in_string:
+                self._string_char(char, feedback, events)
+            else:
+                self._structural_char(char, feedback, events)
+        if feedback:
+            events.append(('feedback', ''.join(feedback)))
+        return events
+
+    def _string_char(self, char, feedback, events):
+        if self._unicode_digits is not None:
+            self._unicode_digits += char
+            if len(self._unicode_digits) == 4:
+                decoded = chr(int(self._unicode_digits, 16))
+                self._unicode_digits = None
+                self._decoded_char(decoded, feedback)
+        elif self._escape:
+            self._escape = False
+            if char == 'u':
+                self._unicode_digits = ''
+            else:
+                self._decoded_char(_JSON_ESCAPES.get(char, char), feedback)
+        elif char == '\\':
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            text = ''.join(self._string_chars)
+            if self._string_is_key:
+                self._key = text
+            elif self._depth == 1 and self._key == 'score':
+                # Claude occasionally quotes the score
+                try:
+                    self._flush_events(events, feedback)
+                    events.append(('score', clamp_score(float(text))))
+                except ValueError:
+                    pass
+        else:
+            self._decoded_char(char, feedback)
+
+    def _decoded_char(self, char, feedback):
+        self._string_chars.append(char)
+        if not self._string_is_key and self._depth == 1 and self._key == 'feedback':
+            feedback.append(char)
+
+    def _structural_char(self, char, feedback, events):
+        if self._number_chars is not None:
+            if char in '0123456789+-.eE':
+                self._number_chars.append(char)
+                return
+            if self._depth == 1 and self._key == 'score':
+                try:
+                    self._flush_events(events, feedback)
+                    events.append(('score', clamp_score(float(''.join(self._number_chars)))))
+                except ValueError:
+                    pass
+            self._number_chars = None
+
+        if char == '"':
+            self._in_string = True
+            self._string_is_key = self._depth == 1 and self._expect_key
+            self._string_chars = []
+        elif char == ':' and self._depth == 1:
+            self._expect_key = False
+        elif char == ',' and self._depth == 1:
+            self._expect_key = True
+            self._key = None
+        elif char in '{[':
+            self._depth += 1
+        elif char in '}]':
+            self._depth -= 1
+            if self._depth == 0:
+                self.complete = True
+        elif self._depth == 1 and not self._expect_key and (char.isdigit() or char == '-'):
+            self._number_chars = [char]
+
+    @staticmethod
+    def _flush_events(events, feedback):
+        """Keep feedback text emitted before a score in its original order"""
+        if feedback:
+            events.append(('feedback', ''.join(feedback)))
+            feedback.clear()
+
+    def result(self):
+        """Parse and validate the complete object (raises like json.loads)"""
+        json_text = ''.join(self._json_chars) if self._started else self.raw_text
+
+        logger.debug("Extracted JSON for parsing: %r", json_text)
+
+        result = json.loads(json_text)
+        if not isinstance(result, dict):
+            raise ValueError("Invalid response format - expected a JSON object")
+
+        # Validate response format
+        if 'score' not in result or 'feedback' not in result:
+            logger.warning("Missing required fields in response: %s", result)
+            raise ValueError("Invalid response format - missing score or feedback")
+
+        # Ensure score is within range
+        score = float(result['score'])
+        if score < 0 or score > 10:
+            logger.warning("Score %s out of range, clamping to 0-10", score)
+            score = clamp_score(score)
+
+        result['score'] = score
+        return result
+
+
+def parse_score_response(response_text):
+    """Parse Claude's complete reply into a validated {score, feedback} dict"""
+    parser = IncrementalScoreParser()
+    parser.feed(response_text)
+    return parser.result()
+
+
+class ScoringPool:
+    """Runs Claude calls off the request thread with a bounded in-flight limit.
+
+    At most max_in_flight calls run at once; up to max_queued more wait for a
+    free thread. Beyond that, run() raises ScoringBusy immediately instead of
+    tying up another request thread. A slot is only released when its call
+    actually finishes, so slow or hung calls keep applying backpressure.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queued=MAX_QUEUED, timeout=SCORING_TIMEOUT):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='scoring')
+        self._slots = threading.BoundedSemaphore(max_in_flight + max_queued)
+        self._lock = threading.Lock()
+        self._average_seconds = 1.0
+        self.in_flight = 0
+
+    def retry_after(self):
+        """Whole seconds a turned-away client should wait before retrying"""
+        return max(1, round(self._average_seconds))
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool and wait up to timeout for its result.
+
+        Raises ScoringBusy when full and concurrent.futures.TimeoutError when
+        the call takes longer than the timeout.
+        """
+        started = self.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self.release(started)
+            raise
+        future.add_done_callback(lambda _: self.release(started))
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def acquire(self):
+        """Claim a slot for a call made on the caller's own thread (streaming).
+
+        Raises ScoringBusy when full. Pass the returned token to release().
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ScoringBusy(self.retry_after())
+        with self._lock:
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started):
+        """Give back a slot claimed by acquire()"""
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.in_flight -= 1
+            # Exponential moving average of call time, used for Retry-After
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+        self._slots.release()
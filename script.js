@@ -25,11 +25,18 @@ document.addEventListener('DOMContentLoaded', () => {
     initializeTabs();
 });
 
+// Upcoming examples are dealt in batches from this session's deck on the
+// server, which never repeats an example until every one has been seen
+const DECK_BATCH_SIZE = 5;
+const DECK_REFILL_AT = 2;
+
 class NZSLPractice {
     constructor() {
         this.currentVideo = null;
         this.preloadedVideo = null; // Store preloaded next video
         this.preloadedVideoElement = null; // Store preloaded video element
+        this.deck = []; // Upcoming examples from /session_deck
+        this.pendingDeck = null;
         this.practiceHistory = this.loadPracticeHistory();
         this.initializeElements();
         this.setupEventListeners();
@@ -111,13 +118,8 @@ class NZSLPractice {
             this.videoLoading.style.display = 'flex';
             this.videoInfo.textContent = 'Loading video...';
             
-            // Fetch random video from server
-            const response = await fetch('/random_video');
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            
-            this.currentVideo = await response.json();
+            // Take the next example from the session deck
+            this.currentVideo = await this.nextFromDeck();
             
             // Load video
             this.video.src = this.currentVideo.video_url;
@@ -141,18 +143,53 @@ class NZSLPractice {
         }
     }
 
+    refillDeck() {
+        // One deck request at a time; later callers share the pending one
+        if (!this.pendingDeck) {
+            this.pendingDeck = fetch('/session_deck', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ count: DECK_BATCH_SIZE })
+            })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP error! status: ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(batch => {
+                    this.deck.push(...batch.examples);
+                    return batch;
+                })
+                .finally(() => {
+                    this.pendingDeck = null;
+                });
+        }
+        return this.pendingDeck;
+    }
+
+    async nextFromDeck() {
+        if (this.deck.length === 0) {
+            await this.refillDeck();
+        }
+        const example = this.deck.shift();
+        if (!example) {
+            throw new Error('Session deck is empty');
+        }
+        if (this.deck.length < DECK_REFILL_AT) {
+            // Top up in the background so the next rounds don't wait
+            this.refillDeck().catch(error => console.error('Error refilling session deck:', error));
+        }
+        return example;
+    }
+
     async preloadNextVideo() {
         try {
             // Don't preload if we already have a preloaded video
             if (this.preloadedVideo && this.preloadedVideoElement) return;
             
             console.log('Preloading next video data...');
-            const response = await fetch('/random_video');
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            
-            this.preloadedVideo = await response.json();
+            this.preloadedVideo = await this.nextFromDeck();
             console.log('Next video data preloaded successfully');
             
             // Now preload the actual video file
@@ -362,7 +399,7 @@ class NZSLPractice {
         this.submitBtn.disabled = true;
 
         try {
-            const response = await fetch('/score_translation', {
+            const response = await fetch('/score_translation_stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -370,7 +407,8 @@ class NZSLPractice {
                 body: JSON.stringify({
                     original_translation: this.currentVideo.english_translation,
                     user_translation: userText,
-                    sign_sequence: this.currentVideo.sign_sequence || []
+                    sign_sequence: this.currentVideo.sign_sequence || [],
+                    word_id: this.currentVideo.word_id
                 })
             });
 
@@ -378,7 +416,7 @@ class NZSLPractice {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
-            const result = await response.json();
+            const result = await this.readScoreStream(response, userText);
             this.displayResults(result, userText);
             
             // Start preloading the next video after successful submission
@@ -393,7 +431,49 @@ class NZSLPractice {
         }
     }
 
-    displayResults(result, userText) {
+    async readScoreStream(response, userText) {
+        // Render the score as soon as it arrives, then fill in feedback as it streams
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let feedback = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                }
+                const payload = data ? JSON.parse(data) : {};
+
+                if (event === 'score') {
+                    this.loading.style.display = 'none';
+                    this.displayResults({ score: payload.score, feedback: '' }, userText, false);
+                } else if (event === 'feedback') {
+                    feedback += payload.text;
+                    this.feedbackText.textContent = feedback;
+                } else if (event === 'done') {
+                    return payload;
+                } else if (event === 'error') {
+                    throw new Error(payload.error || 'Scoring failed');
+                }
+            }
+        }
+        throw new Error('Scoring stream ended early');
+    }
+
+    displayResults(result, userText, final = true) {
+
         // Display score with color coding
         const score = Math.round(result.score * 10) / 10; // Round to 1 decimal place
         this.scoreNumber.textContent = score;
@@ -438,8 +518,14 @@ class NZSLPractice {
         `;
 
         // Show results
+        const alreadyShown = this.results.style.display === 'block';
         this.results.style.display = 'block';
-        this.results.scrollIntoView({ behavior: 'smooth' });
+        if (!alreadyShown) {
+            this.results.scrollIntoView({ behavior: 'smooth' });
+        }
+
+        // A partial render only shows the score while feedback streams in
+        if (!final) return;
 
         // Save to practice history
         this.savePracticeSession(userText, result.score);
@@ -648,6 +734,7 @@ class NZSLPractice {
             // Show modal
             this.definitionModal.style.display = 'flex';
             document.body.style.overflow = 'hidden';
+            showMoreExamples(signData.id);
 
         } catch (error) {
             console.error('Error loading definition video:', error);
@@ -663,6 +750,12 @@ class NZSLPractice {
         // Stop the video
         this.definitionVideo.pause();
         this.definitionVideo.src = '';
+        
+        const definitionExamples = document.getElementById('definitionExamples');
+        if (definitionExamples) {
+            definitionExamples.innerHTML = '';
+            delete definitionExamples.dataset.signId;
+        }
     }
 
     // Dark mode functionality - follows browser/system preference
@@ -718,13 +811,134 @@ function parseNZSLSequence(nzslString) {
     return signs;
 }
 
+// Client-side cache of sign definitions, keyed by sign ID (null = not found)
+const signDefinitionCache = new Map();
+
+// Fetch definitions for many signs at once using the cacheable GET endpoint
+async function fetchSignDefinitions(signIds) {
+    const ids = signIds.map(String);
+    const missing = [...new Set(ids)]
+        .filter(id => !signDefinitionCache.has(id))
+        .sort((a, b) => a - b);
+    
+    // The server accepts up to 200 IDs per request
+    for (let start = 0; start < missing.length; start += 200) {
+        const batch = missing.slice(start, start + 200);
+        const response = await fetch(`/get_sign_definitions?ids=${batch.join(',')}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const result = await response.json();
+        Object.entries(result.definitions).forEach(([id, definition]) => {
+            signDefinitionCache.set(id, definition);
+        });
+        result.missing.forEach(id => signDefinitionCache.set(id, null));
+    }
+    
+    return Object.fromEntries(ids.map(id => [id, signDefinitionCache.get(id)]));
+}
+
+// Dictionary search results, keyed by lowercased query
+const signSearchCache = new Map();
+const SIGN_SEARCH_DELAY_MS = 150;
+
+async function searchSigns(query) {
+    const key = query.trim().toLowerCase();
+    if (!signSearchCache.has(key)) {
+        const response = await fetch(`/search_signs?${new URLSearchParams({ q: key })}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        signSearchCache.set(key, (await response.json()).results);
+    }
+    return signSearchCache.get(key);
+}
+
+// Examples using a sign, from the server's sign -> example index
+const signExamplesCache = new Map();
+const SIGN_EXAMPLES_SHOWN = 5;
+
+async function fetchSignExamples(signId) {
+    const key = String(signId);
+    if (!signExamplesCache.has(key)) {
+        const response = await fetch(`/sign_examples?signs=${key}&limit=${SIGN_EXAMPLES_SHOWN}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        signExamplesCache.set(key, await response.json());
+    }
+    return signExamplesCache.get(key);
+}
+
+// List "more examples with this sign" under the definition; clicking one
+// plays its video in the modal
+async function showMoreExamples(signId) {
+    const container = document.getElementById('definitionExamples');
+    if (!container) return;
+    container.innerHTML = '';
+    container.dataset.signId = String(signId);
+
+    let result;
+    try {
+        result = await fetchSignExamples(signId);
+    } catch (error) {
+        console.error('Error fetching sign examples:', error);
+        return;
+    }
+    // The modal may have moved on to another sign meanwhile
+    if (container.dataset.signId !== String(signId)) return;
+
+    const seenVideos = new Set();
+    const examples = [
+        ...result.examples.map(example => ({ video: example.video_url, english: example.english_translation })),
+        ...result.sentences.map(sentence => ({ video: sentence.video, english: sentence.english }))
+    ].filter(example => example.video && !seenVideos.has(example.video) && seenVideos.add(example.video))
+        .slice(0, SIGN_EXAMPLES_SHOWN);
+    if (!examples.length) return;
+
+    const total = Math.max(result.total_examples, result.total_sentences);
+    const heading = document.createElement('h4');
+    heading.textContent = `More examples with this sign (${total})`;
+    const list = document.createElement('ul');
+    examples.forEach(example => {
+        const item = document.createElement('li');
+        const button = document.createElement('button');
+        button.type = 'button';
+        button.textContent = `▶ ${example.english}`;
+        button.addEventListener('click', () => {
+            document.getElementById('definitionVideo').src = example.video;
+        });
+        item.appendChild(button);
+        list.appendChild(item);
+    });
+    container.append(heading, list);
+}
+
+// Grammar rounds (sentence, distractors and shuffled word bank) are fetched a
+// few at a time from /grammar_rounds
+const GRAMMAR_ROUNDS = 10;
+const GRAMMAR_PAGE_SIZE = 4;
+
+async function fetchGrammarRounds(seed, offset, limit) {
+    const params = new URLSearchParams({ seed, offset, limit });
+    const response = await fetch(`/grammar_rounds?${params}`);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
 class NZSLGrammarGame {
     constructor() {
         console.log('NZSLGrammarGame constructor called');
         this.currentQuestion = 0;
         this.score = 0;
-        this.totalQuestions = Math.min(10, gameData.length);
+        this.totalQuestions = GRAMMAR_ROUNDS;
         this.gameQuestions = [];
+        this.seed = Math.floor(Math.random() * 2147483647);
+        this.nextOffset = 0;
+        this.pendingPage = null;
         this.currentAnswer = [];
         this.correctAnswer = [];
         this.hintUsed = false;
@@ -744,7 +958,10 @@ class NZSLGrammarGame {
         
         this.initializeElements();
         this.setupEventListeners();
-        this.startGame();
+        this.startGame().catch(error => {
+            console.error('Error loading grammar sentences:', error);
+            this.englishText.textContent = 'Error loading sentences. Please refresh the page or try again.';
+        });
     }
 
     initializeElements() {
@@ -771,13 +988,38 @@ class NZSLGrammarGame {
         this.nextBtn.addEventListener('click', () => this.nextQuestion());
     }
 
-    startGame() {
-        // Shuffle the game data and select questions
-        this.gameQuestions = this.shuffleArray([...gameData]).slice(0, this.totalQuestions);
+    async startGame() {
+        // Only the first few rounds are needed to start; the rest load while playing
+        const firstPage = await this.loadMoreQuestions();
+        this.totalQuestions = Math.min(GRAMMAR_ROUNDS, firstPage.total);
         this.totalQuestionsElement.textContent = this.totalQuestions;
         this.loadQuestion();
     }
 
+    loadMoreQuestions() {
+        // One page request at a time; later callers share the pending one
+        if (!this.pendingPage) {
+            this.pendingPage = fetchGrammarRounds(this.seed, this.nextOffset, GRAMMAR_PAGE_SIZE)
+                .then(page => {
+                    this.gameQuestions.push(...page.rounds);
+                    this.nextOffset = page.next_offset;
+                    return page;
+                })
+                .finally(() => {
+                    this.pendingPage = null;
+                });
+        }
+        return this.pendingPage;
+    }
+
+    prefetchQuestions() {
+        const remaining = this.gameQuestions.length - this.currentQuestion - 1;
+        const needed = this.gameQuestions.length < this.totalQuestions;
+        if (remaining < 2 && needed && this.nextOffset !== null) {
+            this.loadMoreQuestions().catch(error => console.error('Error prefetching grammar sentences:', error));
+        }
+    }
+
     shuffleArray(array) {
         for (let i = array.length - 1; i > 0; i--) {
             const j = Math.floor(Math.random() * (i + 1));
@@ -806,6 +1048,7 @@ class NZSLGrammarGame {
 
         const question = this.gameQuestions[this.currentQuestion];
         this.englishText.textContent = question.english;
+        this.prefetchQuestions();
         
         // Parse the correct NZSL answer
         this.correctAnswer = this.parseNZSLGloss(question.nzsl);
@@ -813,8 +1056,12 @@ class NZSLGrammarGame {
         // Parse the sign sequence for clickable glosses
         this.currentSignSequence = parseNZSLSequence(question.nzsl);
         
-        // Create shuffled word tokens
-        const shuffledWords = this.shuffleArray([...this.correctAnswer]);
+        // Load this round's definitions in the background with one request
+        fetchSignDefinitions(this.currentSignSequence.map(sign => sign.id))
+            .catch(error => console.error('Error prefetching sign definitions:', error));
+        
+        // Word bank tokens come shuffled, with distractors, from the server
+        const shuffledWords = question.tokens ? [...question.tokens] : this.shuffleArray([...this.correctAnswer]);
         this.createWordTokens(shuffledWords);
         
         // Reset game state
@@ -1530,16 +1777,10 @@ class NZSLGrammarGame {
 
     async showSignDefinition(signId) {
         try {
-            // Get sign data from the server (reuse the existing database query logic)
-            const response = await fetch('/get_sign_definition', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ sign_id: signId })
-            });
+            // Usually already cached by the prefetch when the question loaded
+            const signData = (await fetchSignDefinitions([signId]))[String(signId)];
             
-            if (response.ok) {
-                const signData = await response.json();
-                
+            if (signData) {
                 // Use the interpretation game's modal elements
                 const definitionModal = document.getElementById('definitionModal');
                 const definitionTitle = document.getElementById('definitionTitle');
@@ -1561,6 +1802,7 @@ class NZSLGrammarGame {
                     
                     definitionModal.style.display = 'flex';
                     document.body.style.overflow = 'hidden';
+                    showMoreExamples(signId);
                 }
             }
         } catch (error) {
@@ -1629,11 +1871,25 @@ class NZSLGrammarGame {
         }
     }
 
-    nextQuestion() {
+    async nextQuestion() {
         this.currentQuestion++;
         this.nextBtn.style.display = 'none';
         this.submitBtn.style.display = 'inline-block';
         this.dictionaryBtn.style.display = 'none';
+        
+        // Wait for the next page if the prefetch hasn't brought this round in yet
+        try {
+            while (this.currentQuestion < this.totalQuestions &&
+                   this.currentQuestion >= this.gameQuestions.length && this.nextOffset !== null) {
+                await this.loadMoreQuestions();
+            }
+        } catch (error) {
+            console.error('Error loading grammar sentences:', error);
+        }
+        if (this.currentQuestion < this.totalQuestions && this.currentQuestion >= this.gameQuestions.length) {
+            // Out of sentences: finish with the rounds played so far
+            this.totalQuestions = this.currentQuestion;
+        }
         this.loadQuestion();
         
         // Scroll to grammar main section after loading the question
@@ -1716,13 +1972,13 @@ document.addEventListener('DOMContentLoaded', () => {
 
 // Initialize grammar game when grammar tab is activated
 function initializeGrammarGame() {
-    console.log('initializeGrammarGame called, gameData defined:', typeof gameData !== 'undefined', 'grammarGame exists:', !!grammarGame);
-    if (typeof gameData !== 'undefined' && !grammarGame) {
+    console.log('initializeGrammarGame called, grammarGame exists:', !!grammarGame);
+    if (!grammarGame) {
         console.log('Creating new NZSLGrammarGame...');
         grammarGame = new NZSLGrammarGame();
         console.log('Grammar game created:', grammarGame);
     } else {
-        console.log('Not creating grammar game - gameData defined:', typeof gameData !== 'undefined', 'grammarGame already exists:', !!grammarGame);
+        console.log('Not creating grammar game - grammarGame already exists');
     }
 }
 
@@ -1811,4 +2067,77 @@ document.addEventListener('DOMContentLoaded', function() {
             closeAboutModal();
         }
     });
-});
\ No newline at end of file
+});
+
+// Dictionary search in the definition modal
+document.addEventListener('DOMContentLoaded', function() {
+    const searchInput = document.getElementById('definitionSearch');
+    const searchResults = document.getElementById('definitionSearchResults');
+    if (!searchInput || !searchResults) return;
+
+    let searchTimer = null;
+    let latestQuery = '';
+
+    async function showSearchedSign(signId) {
+        const signData = (await fetchSignDefinitions([signId]))[String(signId)];
+        if (!signData) return;
+
+        document.getElementById('definitionTitle').textContent = `Sign: ${signData.gloss}`;
+        document.getElementById('definitionVideo').src = signData.definition_video_url;
+        const definitionMeanings = document.getElementById('definitionMeanings');
+        definitionMeanings.innerHTML = '';
+        if (signData.minor_meanings) {
+            const heading = document.createElement('h4');
+            heading.textContent = 'Alternative meanings:';
+            const meanings = document.createElement('p');
+            meanings.textContent = signData.minor_meanings;
+            definitionMeanings.append(heading, meanings);
+        }
+        document.getElementById('definitionModal').style.display = 'flex';
+        document.body.style.overflow = 'hidden';
+        showMoreExamples(signId);
+    }
+
+    function renderResults(results) {
+        searchResults.innerHTML = '';
+        results.forEach(result => {
+            const item = document.createElement('li');
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.textContent = result.gloss;
+            if (result.minor_meanings) {
+                const meanings = document.createElement('span');
+                meanings.textContent = result.minor_meanings;
+                button.appendChild(meanings);
+            }
+            button.addEventListener('click', () => {
+                searchInput.value = '';
+                searchResults.innerHTML = '';
+                showSearchedSign(result.id).catch(error => console.error('Error fetching sign definition:', error));
+            });
+            item.appendChild(button);
+            searchResults.appendChild(item);
+        });
+    }
+
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        const query = searchInput.value.trim();
+        latestQuery = query;
+        if (!query) {
+            searchResults.innerHTML = '';
+            return;
+        }
+        searchTimer = setTimeout(async () => {
+            try {
+                const results = await searchSigns(query);
+                // Ignore replies to queries the learner has already typed past
+                if (query === latestQuery) {
+                    renderResults(results);
+                }
+            } catch (error) {
+                console.error('Error searching signs:', error);
+            }
+        }, SIGN_SEARCH_DELAY_MS);
+    });
+});
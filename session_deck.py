@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import functools
+import json
+import random
+
+DEFAULT_DECK_BATCH = 5
+MAX_DECK_BATCH = 20
+
+
+class SessionDeck:
+    """Per-session decks of examples, dealt without replacement.
+
+    A session's deck is a weighted shuffle of every example, fully determined
+    by a seed. The session stores only the seed and a cursor (in the signed
+    session cookie), so any worker can deal the next cards without shared
+    state. The shuffle keeps /random_video's weighting, so signs with many
+    examples don't crowd out the rest, and a learner sees every example once
+    before a new shuffle starts.
+    """
+
+    def __init__(self, examples):
+        self.examples = examples
+        # The same example video can be listed under several signs; deal it
+        # once, with their weights combined
+        cards = {}
+        self._sign_positions = {}
+        self._sign_ranks = {}
+        for position, weight in enumerate(examples.weights()):
+            entry = json.loads(examples.entry(position))
+            card = cards.setdefault(entry['video_url'], [position, entry['word_id'], 0.0])
+            card[2] += weight
+            self._sign_positions.setdefault(entry['word_id'], []).append(position)
+            self._sign_ranks.setdefault(entry['word_id'], entry['rank'])
+        self._positions, self._signs, self._weights = (tuple(column) for column in zip(*cards.values()))
+        self._order = functools.lru_cache(maxsize=1024)(self._shuffled)
+
+    def __len__(self):
+        return len(self._weights)
+
+    def _shuffled(self, seed):
+        # Weighted sampling without replacement (Efraimidis-Spirakis keys)
+        rng = random.Random(seed)
+        keys = [(rng.random() ** (1.0 / weight), card) for card, weight in enumerate(self._weights)]
+        keys.sort(reverse=True)
+        return tuple(card for _, card in keys)
+
+    def new_seed(self):
+        return random.getrandbits(63)
+
+    def sign_rank(self, sign_id):
+        """Rank of a sign with examples, or None"""
+        return self._sign_ranks.get(sign_id)
+
+    def sign_example(self, sign_id, rng=random):
+        """A random example of one sign as JSON bytes"""
+        return self.examples.entry(rng.choice(self._sign_positions[sign_id]))
+
+    def deal(self, seed, cursor, count, skip_signs=()):
+        """Return (examples as JSON bytes, seed, cursor) for the next count cards.
+
+        Examples of skip_signs are passed over while other signs are left.
+        When the deck runs out a new shuffle starts with a fresh seed.
+        """
+        cards = []
+        skipped = 0
+        while len(cards) < count:
+            if cursor >= len(self):
+                seed, cursor = self.new_seed(), 0
+            card = self._order(seed)[cursor]
+            cursor += 1
+            # A whole deck's worth of skips means there is nothing else left
+            if skipped < len(self) and self._signs[card] in skip_signs:
+                skipped += 1
+                continue
+            cards.append(self.examples.entry(self._positions[card]))
+        return cards, seed, cursor
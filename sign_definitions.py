@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import threading
+from collections import OrderedDict
+
+# SQLite's default limit on bound parameters in one statement
+MAX_QUERY_PARAMS = 900
+
+# Definitions kept in memory; comfortably more than the dictionary holds
+DEFINITION_CACHE_SIZE = 16384
+
+# Sign ID (as a string) -> (gloss, minor, definition video url), least
+# recently used first. nzsl.db is never written at runtime, so entries never
+# go stale. Only signs found in the dictionary are cached: the IDs come from
+# clients, so caching misses would let them grow the cache without limit.
+_definition_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Main definition video for each requested sign; is_mp4 is precomputed by
+# prepare_db.py so the join can use an index instead of LIKE '%.mp4'
+DEFINITION_QUERY = """
+    SELECT w.id, w.gloss, w.minor, v.url
+    FROM words w
+    LEFT JOIN videos v ON w.id = v.word_id AND v.video_type = 'main' AND v.is_mp4 = 1
+    WHERE w.id IN ({placeholders})
+"""
+
+
+def lookup_sign_definitions(cursor, sign_ids):
+    """Resolve many sign IDs at once, querying only those not already cached"""
+    keys = [str(sign_id) for sign_id in sign_ids]
+    definitions = {}
+    with _cache_lock:
+        for key in dict.fromkeys(keys):
+            if key in _definition_cache:
+                _definition_cache.move_to_end(key)
+                definitions[key] = _definition_cache[key]
+    missing = [key for key in dict.fromkeys(keys) if key not in definitions]
+
+    for start in range(0, len(missing), MAX_QUERY_PARAMS):
+        chunk = missing[start:start + MAX_QUERY_PARAMS]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(DEFINITION_QUERY.format(placeholders=placeholders), chunk)
+
+        found = {}
+        for word_id, gloss, minor, url in cursor.fetchall():
+            # Keep the first matching video, like the old LIMIT 1 lookups
+            found.setdefault(str(word_id), (gloss, minor, url))
+        with _cache_lock:
+            for key in chunk:
+                definitions[key] = found.get(key)
+                if key in found:
+                    _definition_cache[key] = found[key]
+            while len(_definition_cache) > DEFINITION_CACHE_SIZE:
+                _definition_cache.popitem(last=False)
+
+    return {key: definitions[key] for key in keys}
+
+
+def enhance_sign_sequence(cursor, sign_sequence):
+    """Add gloss, minor meanings and definition video to each sign"""
+    definitions = lookup_sign_definitions(cursor, [sign['id'] for sign in sign_sequence])
+
+    enhanced_sign_sequence = []
+    for sign in sign_sequence:
+        definition = definitions[str(sign['id'])]
+        # Signs without a main mp4 video fall back to the notation word
+        if definition and definition[2]:
+            enhanced_sign = {
+                'word': sign['word'],
+                'id': sign['id'],
+                'gloss': definition[0],
+                'minor_meanings': definition[1] or '',
+                'definition_video_url': definition[2]
+            }
+        else:
+            enhanced_sign = {
+                'word': sign['word'],
+                'id': sign['id'],
+                'gloss': sign['word'],
+                'minor_meanings': '',
+                'definition_video_url': None
+            }
+        enhanced_sign_sequence.append(enhanced_sign)
+    return enhanced_sign_sequence
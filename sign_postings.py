@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import json
+from array import array
+from bisect import bisect_left
+
+from example_index import parse_sign_sequence
+
+DEFAULT_SIGN_EXAMPLES = 5
+MAX_SIGN_EXAMPLES = 20
+# Signs per "examples containing all of these signs" query
+MAX_QUERY_SIGNS = 5
+
+_EMPTY = array('I')
+
+
+def intersect_sorted(shorter, longer):
+    """Items of two ascending sequences found in both.
+
+    Each item of the shorter list is looked up in the rest of the longer one
+    with a binary search, so the cost is O(k log n) rather than O(k + n)
+    when a rare sign is queried alongside a common one.
+    """
+    result = []
+    low = 0
+    size = len(longer)
+    for item in shorter:
+        low = bisect_left(longer, item, low)
+        if low == size:
+            break
+        if longer[low] == item:
+            result.append(item)
+            low += 1
+    return result
+
+
+class SignPostings:
+    """Posting lists from sign ID to the positions of the documents using it.
+
+    Built once from the parsed sign sequences, so finding every example that
+    uses a sign (as its own sign or anywhere in its sentence) is a dict
+    lookup instead of a scan. Lists are ascending arrays of positions; a
+    query for several signs intersects them, rarest first.
+    """
+
+    def __init__(self, sequences):
+        postings = {}
+        for position, sign_ids in enumerate(sequences):
+            for sign_id in set(sign_ids):
+                postings.setdefault(sign_id, []).append(position)
+        self._postings = {sign_id: array('I', positions) for sign_id, positions in postings.items()}
+
+    def __len__(self):
+        return len(self._postings)
+
+    def count(self, sign_id):
+        """Number of documents using a sign"""
+        return len(self._postings.get(sign_id, _EMPTY))
+
+    def containing(self, sign_ids):
+        """Ascending positions of the documents using every one of sign_ids"""
+        lists = sorted((self._postings.get(sign_id, _EMPTY) for sign_id in set(sign_ids)), key=len)
+        if not lists:
+            return []
+        result = list(lists[0])
+        for postings in lists[1:]:
+            if not result:
+                break
+            result = intersect_sorted(result, postings)
+        return result
+
+
+def example_sequences(examples):
+    """Sign IDs of each served example: its own sign and its sentence's.
+
+    A video listed under several signs is indexed at its first position only,
+    so queries never return the same video twice.
+    """
+    seen_videos = set()
+    for position in range(len(examples)):
+        entry = json.loads(examples.entry(position))
+        if entry['video_url'] in seen_videos:
+            yield ()
+            continue
+        seen_videos.add(entry['video_url'])
+        yield [int(entry['word_id'])] + [sign['id'] for sign in entry['sign_sequence']]
+
+
+def sentence_sequences(sentences):
+    """Sign IDs of each grammar sentence: its own sign and its sentence's"""
+    for position in range(len(sentences)):
+        sentence = sentences.sentence(position)
+        yield [int(sentence['word_id'])] + [sign['id'] for sign in parse_sign_sequence(sentence['nzsl'])]
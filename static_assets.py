@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import logging
+import os
+
+from flask import current_app, send_file
+
+from http_caching import ENCODING_ETAG_SUFFIXES, is_not_modified, negotiate_encoding, set_cache_headers
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+
+# Fingerprinted names change whenever their content does
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Pages and plain asset names must be revalidated, which is a cheap 304
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# The only kinds of file served from the source tree. Everything else in the
+# app directory (code, .env, nzsl.db and the writable learners.db,
+# metering.db, score_cache.db and media_health.db) must never be.
+PUBLIC_EXTENSIONS = {'.html', '.js', '.css', '.png', '.ico', '.webmanifest'}
+
+
+def is_public_source(path):
+    """Whether a path in the source tree may be served as a static file"""
+    return os.path.splitext(path)[1].lower() in PUBLIC_EXTENSIONS
+
+
+class StaticAssets:
+    """Serves the fingerprinted, precompressed assets built by build_assets.py"""
+
+    def __init__(self, dist_dir, manifest):
+        self.dist_dir = os.path.abspath(dist_dir)
+        self._routes = {}
+        for logical_path, asset in manifest.items():
+            # Plain names still work but are revalidated on every request
+            self._routes[logical_path] = (asset, False)
+            self._routes[asset['path']] = (asset, asset['immutable'])
+
+    def response(self, path):
+        """Response for a URL path, or None when it is not a built asset"""
+        route = self._routes.get(path)
+        if route is None:
+            return None
+        asset, immutable = route
+
+        encoding = negotiate_encoding(asset['encodings'])
+        etag = asset['etag'] + (f'-{ENCODING_ETAG_SUFFIXES[encoding]}' if encoding else '')
+        if is_not_modified(etag):
+            response = current_app.response_class(status=304)
+        else:
+            filename = os.path.join(self.dist_dir, asset['path']) + ENCODING_SUFFIXES.get(encoding, '')
+            response = send_file(filename, conditional=False, etag=False)
+            response.headers['Content-Type'] = asset['mimetype']
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        cache_control = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        return set_cache_headers(response, etag, cache_control)
+
+    @classmethod
+    def load(cls, dist_dir=DIST_DIR, source_dir='.'):
+        """Load dist/manifest.json; returns None if the assets haven't been built.
+
+        Also None when any source file has changed since the build, so edits
+        are never shadowed by stale fingerprinted copies.
+        """
+        try:
+            with open(os.path.join(dist_dir, 'manifest.json'), 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            logger.warning("%s/manifest.json not found; serving unbuilt static files (run python build_assets.py)",
+                           dist_dir)
+            return None
+        stale = [path for path, asset in manifest.items() if asset.get('source') != source_hash(source_dir, path)]
+        if stale:
+            logger.warning("%s is out of date (%s changed); serving unbuilt static files (run python build_assets.py)",
+                           dist_dir, ', '.join(stale[:5]) + (', ...' if len(stale) > 5 else ''))
+            return None
+        return cls(dist_dir, manifest)
+
+
+def source_hash(source_dir, path):
+    """sha256 of a source file as build_assets.py records it, or None if it is missing"""
+    try:
+        with open(os.path.join(source_dir, path), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
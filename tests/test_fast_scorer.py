@@ -0,0 +1,35 @@
+import pytest
+
+from fast_scorer import canonical_tokens, fast_score
+
+
+@pytest.mark.parametrize('original, user', [
+    # "ring", "call" and "phone" only mean the same in the telephone sense
+    ('I lost my ring at the beach.', 'I lost my phone at the beach'),
+    ('The bell rang', 'The bell called'),
+    ('What do you call this?', 'What do you phone this?'),
+    ('An ambulance had to be called', 'An ambulance had to be rung'),
+    # Dropped words that carry meaning
+    ('The man is very tall', 'The man is tall'),
+    ('She also likes cats', 'She likes cats'),
+    ('I know that man', 'I know man'),
+    # Real words, not contractions
+    ('He was ill yesterday', 'He was I will yesterday'),
+    ('Show me your id', 'Show me your I would'),
+])
+def test_different_meanings_go_to_the_model(original, user):
+    assert fast_score(original, user) is None
+
+
+@pytest.mark.parametrize('word', ['ill', 'id', 'lets'])
+def test_ambiguous_contractions_are_not_expanded(word):
+    assert canonical_tokens(f'she {word} it') == ['she', word, 'it']
+
+
+@pytest.mark.parametrize('original, user, score', [
+    ('I lost my phone at the beach.', 'i lost my phone at the beach', 10.0),
+    ("I'm going to my neighbour's house", 'I am going to my neighbors house', 10.0),
+    ('The dog barked at the neighbour all night', 'The dog barked at a neighbor all night', 9.0),
+])
+def test_equivalent_answers_are_scored_locally(original, user, score):
+    assert fast_score(original, user)['score'] == score
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+from flask import Flask
+
+from media_cache import EVICT_TO, MediaCache, MediaUnavailable
+from stub_media import media_bytes, start_stub_server
+
+SIZE = 4096
+
+
+@pytest.fixture
+def origin():
+    server = start_stub_server(latency=0, size=SIZE)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_cache(tmp_path, server, **kwargs):
+    return MediaCache(directory=str(tmp_path / 'cache'), origin=f'http://127.0.0.1:{server.server_address[1]}/',
+                      **kwargs)
+
+
+def test_miss_hit_revalidate_then_stale(tmp_path, origin):
+    cache = make_cache(tmp_path, origin)
+    key = 'glossvideo/1/a.mp4'
+
+    path, meta = cache.get(key)
+    assert origin.requests == 1
+    with open(path, 'rb') as f:
+        assert f.read() == media_bytes('/' + key, SIZE)
+    assert meta['size'] == SIZE and meta['content_type'] == 'video/mp4'
+
+    assert cache.get(key) == (path, meta)
+    assert origin.requests == 1
+
+    # Stale: a conditional request the stub answers 304
+    cache.revalidate_after = 0
+    revalidated_path, revalidated = cache.get(key)
+    assert origin.requests == 2
+    assert revalidated_path == path
+    assert revalidated['etag'] == meta['etag'] and revalidated['fetched_at'] > meta['fetched_at']
+
+    origin.shutdown()
+    origin.server_close()
+    assert cache.get(key)[0] == path
+
+
+def test_unknown_video_is_not_cached(tmp_path, origin):
+    cache = make_cache(tmp_path, origin)
+    with pytest.raises(MediaUnavailable) as e:
+        cache.get('glossvideo/1/a.txt')
+    assert e.value.status == 404
+    assert cache.lookup('glossvideo/1/a.txt') is None
+
+
+def test_range_and_conditional_responses(tmp_path, origin):
+    cache = make_cache(tmp_path, origin)
+    key = 'glossvideo/2/b.mp4'
+    app = Flask(__name__)
+    app.add_url_rule('/media/<path:key>', 'media', cache.response)
+    client = app.test_client()
+    body = media_bytes('/' + key, SIZE)
+
+    response = client.get(f'/media/{key}', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{SIZE}'
+    assert response.data == body[100:200]
+
+    response = client.get(f'/media/{key}')
+    assert response.status_code == 200
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.data == body
+
+    response = client.get(f'/media/{key}', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert origin.requests == 1
+
+
+def test_evicts_least_recently_used(tmp_path, origin):
+    cache = make_cache(tmp_path, origin, max_bytes=3 * SIZE)
+    keys = [f'glossvideo/{i}/c.mp4' for i in range(3)]
+    for age, key in zip((300, 100, 200), keys):
+        path, _ = cache.get(key)
+        used = os.stat(path).st_mtime - age
+        os.utime(path, (used, used))
+
+    cache.get('glossvideo/3/c.mp4')
+    assert sum(size for _, size, _ in cache.usage()) <= cache.max_bytes * EVICT_TO
+    # The oldest two go to get back under the limit; the newest stay
+    assert cache.lookup(keys[0]) is None
+    assert cache.lookup(keys[2]) is None
+    assert cache.lookup(keys[1]) is not None
+    assert cache.lookup('glossvideo/3/c.mp4') is not None
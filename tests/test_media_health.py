@@ -0,0 +1,115 @@
+import importlib
+import json
+import sys
+import time
+
+import pytest
+
+import build_datasets
+from db import connect_readonly
+from example_index import ExampleIndex
+from example_store import build_groups
+from fixture_db import build_fixture_db
+from grammar_sentences import GrammarSentences, load_game_data
+from media_health import COLUMNS, load_broken_urls, open_health_db, run_check
+from stub_media import is_missing, start_stub_server
+
+PREFIX = 'https://example.invalid/'
+
+
+def check(tmp_path, urls, **config):
+    server = start_stub_server(latency=0, **config)
+    origin = f'http://127.0.0.1:{server.server_address[1]}/'
+    try:
+        counts = run_check(urls, str(tmp_path / 'media_health.db'), concurrency=4,
+                           rewrite=lambda url: origin + url[len(PREFIX):])
+    finally:
+        server.shutdown()
+        server.server_close()
+    return counts, load_broken_urls(str(tmp_path / 'media_health.db'))
+
+
+def test_missing_videos_are_broken(tmp_path):
+    urls = [f'{PREFIX}glossvideo/{i}/v.mp4' for i in range(40)]
+    missing = {url for url in urls if is_missing('/' + url[len(PREFIX):], 4)}
+    assert missing and len(missing) < len(urls)
+
+    counts, broken = check(tmp_path, urls, size=1024, missing_every=4)
+    assert counts == (len(urls), len(missing), 0)
+    assert broken == missing
+
+
+def test_empty_videos_are_broken(tmp_path):
+    urls = [f'{PREFIX}glossvideo/{i}/v.mp4' for i in range(5)]
+    counts, broken = check(tmp_path, urls, size=0)
+    assert counts == (5, 5, 0)
+    assert broken == set(urls)
+
+
+def test_refused_head_falls_back_to_range_get(tmp_path):
+    urls = [f'{PREFIX}glossvideo/{i}/v.mp4' for i in range(5)] + [f'{PREFIX}glossvideo/0/v.txt']
+    counts, broken = check(tmp_path, urls, size=1024, refuse_head=True)
+    assert counts == (6, 1, 0)
+    assert broken == {f'{PREFIX}glossvideo/0/v.txt'}
+
+    conn = open_health_db(str(tmp_path / 'media_health.db'))
+    rows = conn.execute("SELECT method, status, content_length FROM media_health WHERE url LIKE '%.mp4'").fetchall()
+    conn.close()
+    assert rows == [('GET', 206, 1024)] * 5
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """A small fixture site with a third of its example videos recorded as 404"""
+    build_fixture_db(str(tmp_path / 'nzsl.db'), str(tmp_path / 'matched_signs.json'), words=300, signs=20)
+    (tmp_path / 'NZSLGrammar').mkdir()
+
+    conn = connect_readonly(str(tmp_path / 'nzsl.db'))
+    urls = [row[0] for row in conn.execute("SELECT video FROM examples ORDER BY video")]
+    conn.close()
+    broken = set(urls[::3])
+
+    conn = open_health_db(str(tmp_path / 'media_health.db'))
+    with conn:
+        conn.executemany(f"INSERT INTO media_health ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(url, 404, None, None, 'HEAD', None, 1.0, time.time()) for url in broken])
+    conn.close()
+
+    monkeypatch.chdir(tmp_path)
+    return broken
+
+
+def example_urls(groups):
+    return {entry['video_url'] for group in groups for entry in group}
+
+
+def test_builders_leave_broken_videos_out(site):
+    broken = site
+    groups = build_groups(health_path='media_health.db')
+    assert example_urls(groups) and not example_urls(groups) & broken
+    assert example_urls(build_groups(health_path='missing.db')) >= broken
+
+    index = ExampleIndex.build(health_path='media_health.db')
+    served = {json.loads(index.entry(position))['video_url'] for position in range(len(index))}
+    assert served == example_urls(groups)
+
+    build_datasets.build(workers=1, health_path='media_health.db')
+    with open('video_examples.json', 'r') as f:
+        assert {entry['video_url'] for entry in json.load(f)} == example_urls(groups)
+    sentences = load_game_data()
+    assert sentences and not {sentence['video'] for sentence in sentences} & broken
+
+    videos = {sentence['video'] for sentence in sentences}
+    grammar = GrammarSentences.load(broken_urls=frozenset(list(videos)[:2]))
+    assert len(grammar) == len(sentences) - 2
+
+
+def test_random_video_leaves_broken_videos_out(site, monkeypatch):
+    broken = site
+    build_datasets.build(workers=1, health_path='media_health.db')
+
+    monkeypatch.delitem(sys.modules, 'app', raising=False)
+    app = importlib.import_module('app')
+    client = app.app.test_client()
+    served = {client.get('/random_video').get_json()['video_url'] for _ in range(200)}
+    assert served and not served & broken